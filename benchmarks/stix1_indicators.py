@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import time
+from misp_stix_converter import MISPtoSTIX1EventsParser
+from uuid import uuid4
+
+_ATTRIBUTES = (
+    ('ip-dst', 'Network activity', '198.51.100.{}'),
+    ('domain', 'Network activity', 'domain{}.example.com'),
+    ('md5', 'Payload delivery', '{:032x}'),
+    ('url', 'Network activity', 'https://www.example.com/{}')
+)
+_TAGS = (
+    (),
+    ('tlp:white',),
+    ('tlp:amber', 'misp:tool="misp2stix"'),
+    ('tlp:green', 'estimative-language:likelihood-probability="very-likely"')
+)
+
+
+def _create_event(indicators: int) -> dict:
+    attributes = []
+    for index in range(indicators):
+        attribute_type, category, value = _ATTRIBUTES[index % len(_ATTRIBUTES)]
+        attribute = {
+            'uuid': str(uuid4()),
+            'type': attribute_type,
+            'category': category,
+            'value': value.format(index),
+            # attributes are usually added to events in batches
+            'timestamp': str(1603642920 + index // 1000),
+            'to_ids': True
+        }
+        tags = _TAGS[index % len(_TAGS)]
+        if tags:
+            attribute['Tag'] = [{'name': tag} for tag in tags]
+        attributes.append(attribute)
+    return {
+        'Event': {
+            'uuid': str(uuid4()),
+            'info': 'STIX 1 indicators benchmark',
+            'date': '2020-10-25',
+            'timestamp': '1603642920',
+            'published': False,
+            'threat_level_id': '2',
+            'analysis': '1',
+            'Orgc': {'name': 'MISP-Project', 'uuid': str(uuid4())},
+            'Attribute': attributes
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the conversion of MISP attributes into STIX 1 Indicators.'
+    )
+    parser.add_argument('-i', '--indicators', type=int, default=100000, help='Number of attributes with the to_ids flag in the converted event.')
+    parser.add_argument('-v', '--version', choices=['1.1.1', '1.2'], default='1.1.1', help='STIX 1 version.')
+    args = parser.parse_args()
+
+    misp_event = _create_event(args.indicators)
+    stix_parser = MISPtoSTIX1EventsParser('MISP-Project', args.version)
+    start = time.perf_counter()
+    stix_parser.parse_misp_event(misp_event)
+    duration = time.perf_counter() - start
+    indicators = len(stix_parser.stix_package.incidents[0].related_indicators)
+    print(f'{indicators} indicators converted in {duration:.2f}s ({duration / indicators * 1000000:.1f}µs per indicator)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import time
+from misp_stix_converter import ExternalSTIX2toMISPParser
+from stix2.parsing import parse as stix2_parser
+from uuid import uuid4
+
+_TIMESTAMP = '2020-10-25T16:22:00.000Z'
+
+
+def _create_bundle(observables: int, indicators: int, reports: int) -> dict:
+    identity_id = f'identity--{uuid4()}'
+    objects = [
+        {
+            'type': 'identity',
+            'spec_version': '2.1',
+            'id': identity_id,
+            'created': _TIMESTAMP,
+            'modified': _TIMESTAMP,
+            'name': 'MISP-Project',
+            'identity_class': 'organization'
+        }
+    ]
+    object_refs = []
+    for index in range(observables):
+        file_id = f'file--{uuid4()}'
+        observed_data_id = f'observed-data--{uuid4()}'
+        objects.extend(
+            (
+                {
+                    'type': 'observed-data',
+                    'spec_version': '2.1',
+                    'id': observed_data_id,
+                    'created_by_ref': identity_id,
+                    'created': _TIMESTAMP,
+                    'modified': _TIMESTAMP,
+                    'first_observed': _TIMESTAMP,
+                    'last_observed': _TIMESTAMP,
+                    'number_observed': 1,
+                    'object_refs': [file_id]
+                },
+                {
+                    'type': 'file',
+                    'spec_version': '2.1',
+                    'id': file_id,
+                    'name': f'file_{index}.exe',
+                    'size': 1024 + index,
+                    'hashes': {'MD5': f'{index:032x}', 'SHA-1': f'{index:040x}'}
+                }
+            )
+        )
+        object_refs.append(observed_data_id)
+    for index in range(indicators):
+        indicator_id = f'indicator--{uuid4()}'
+        objects.append(
+            {
+                'type': 'indicator',
+                'spec_version': '2.1',
+                'id': indicator_id,
+                'created_by_ref': identity_id,
+                'created': _TIMESTAMP,
+                'modified': _TIMESTAMP,
+                'valid_from': _TIMESTAMP,
+                'pattern_type': 'stix',
+                'pattern': f"[domain-name:value = 'domain{index}.example.com']",
+                'labels': ['malicious-activity']
+            }
+        )
+        object_refs.append(indicator_id)
+    for index in range(reports):
+        objects.append(
+            {
+                'type': 'report',
+                'spec_version': '2.1',
+                'id': f'report--{uuid4()}',
+                'created_by_ref': identity_id,
+                'created': _TIMESTAMP,
+                'modified': _TIMESTAMP,
+                'published': _TIMESTAMP,
+                'name': f'STIX 2 import benchmark - report {index}',
+                'object_refs': object_refs[index::reports]
+            }
+        )
+    return {'type': 'bundle', 'id': f'bundle--{uuid4()}', 'objects': objects}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the import of STIX 2.1 observables and indicators as MISP objects and attributes.'
+    )
+    parser.add_argument('-o', '--observables', type=int, default=100000, help='Number of file observables in the imported bundle.')
+    parser.add_argument('-i', '--indicators', type=int, default=0, help='Number of domain indicators in the imported bundle.')
+    parser.add_argument('-r', '--reports', type=int, default=1, help='Number of reports the observables are split between, each of them converted in a MISP event.')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='Number of processes used to build the MISP events of the different reports.')
+    parser.add_argument('-s', '--stix-objects', action='store_true', help='Parse the bundle with the stix2 library before the measurement, to only measure the conversion.')
+    parser.add_argument('-f', '--fast-mode', action='store_true', help='Build the MISP attributes and objects as plain dictionaries.')
+    args = parser.parse_args()
+
+    bundle = _create_bundle(args.observables, args.indicators, args.reports)
+    if args.stix_objects:
+        bundle = stix2_parser(bundle, allow_custom=True, interoperability=True)
+    stix_parser = ExternalSTIX2toMISPParser(fast_mode=args.fast_mode)
+    start = time.perf_counter()
+    stix_parser.load_stix_bundle(bundle)
+    stix_parser.parse_stix_bundle(processes=args.processes)
+    duration = time.perf_counter() - start
+    misp_events = stix_parser.misp_events
+    if not isinstance(misp_events, list):
+        misp_events = [misp_events]
+    misp_objects = sum(len(misp_event.objects) for misp_event in misp_events)
+    misp_attributes = sum(len(misp_event.attributes) for misp_event in misp_events)
+    features = misp_objects + misp_attributes
+    print(f'{misp_objects} MISP objects and {misp_attributes} MISP attributes imported in {duration:.2f}s ({duration / features * 1000000:.1f}µs per object or attribute)')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,8 @@ from .misp_stix_mapping import Mapping
 from .misp2stix import *
 from .misp_stix_converter import (
     misp_attribute_collection_to_stix1, misp_collection_to_stix2_0, misp_collection_to_stix2_1,
-    misp_event_collection_to_stix1, misp_to_stix1, misp_to_stix2_0, misp_to_stix2_1,
-    stix_1_to_misp, stix_2_to_misp)
+    misp_event_collection_to_stix1, misp_to_stix, misp_to_stix1, misp_to_stix2_0,
+    misp_to_stix2_1, stix_1_to_misp, stix_2_to_misp)
 from .misp_stix_converter import (
     _get_campaigns, _get_courses_of_action, _get_events, _get_indicators,
     _get_observables, _get_threat_actors, _get_ttps)
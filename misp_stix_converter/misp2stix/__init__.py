@@ -1,7 +1,12 @@
-from .framing import stix1_attributes_framing, stix1_framing, stix20_framing, stix21_framing
+from .event_representation import MISPEventRepresentation
+from .framing import (
+    stix1_attributes_framing, stix1_framing, stix1_id_namespace, stix20_framing,
+    stix21_framing)
 from .misp_to_stix1 import MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser
 from .misp_to_stix20 import MISPtoSTIX20Parser
 from .misp_to_stix21 import MISPtoSTIX21Parser
 from .stix1_mapping import MISPtoSTIX1Mapping
 from .stix20_mapping import MISPtoSTIX20Mapping
 from .stix21_mapping import MISPtoSTIX21Mapping
+from .stix2_cache import STIX2ExportCache
+from .stix2_registry import STIX2ObjectsRegistry
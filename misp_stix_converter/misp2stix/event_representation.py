@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from pymisp import MISPEvent
+from typing import Union
+
+
+class MISPEventRepresentation:
+    """
+    Normalised representation of a MISP event, built once and shared between
+    the STIX 1 and STIX 2 export parsers.
+    What does not depend on the STIX target (the tags and galaxies of the MISP
+    objects) is computed at most once, so converting the same event in
+    multiple STIX versions costs one load plus one emit per version.
+    """
+    def __init__(self, misp_event: Union[MISPEvent, dict]):
+        if 'Event' in misp_event:
+            misp_event = misp_event['Event']
+        self.__event = misp_event
+        self.__object_tags_and_galaxies: dict = {}
+
+    @property
+    def event(self) -> Union[MISPEvent, dict]:
+        return self.__event
+
+    def object_tags_and_galaxies(self, misp_object: dict) -> tuple:
+        key = id(misp_object)
+        if key not in self.__object_tags_and_galaxies:
+            self.__object_tags_and_galaxies[key] = self.extract_object_tags_and_galaxies(
+                misp_object
+            )
+        return self.__object_tags_and_galaxies[key]
+
+    @classmethod
+    def extract_object_tags_and_galaxies(cls, misp_object: dict) -> tuple:
+        tags: set = set()
+        galaxies: dict = {}
+        for attribute in misp_object['Attribute']:
+            if attribute.get('Galaxy'):
+                for galaxy in attribute['Galaxy']:
+                    galaxy_type = galaxy['type']
+                    if galaxy_type in galaxies:
+                        cls.merge_galaxy_clusters(galaxies[galaxy_type], galaxy)
+                    else:
+                        galaxies[galaxy_type] = galaxy
+            if attribute.get('Tag'):
+                tags.update(tag['name'] for tag in attribute['Tag'])
+        return tags, galaxies
+
+    @staticmethod
+    def merge_galaxy_clusters(galaxies: dict, galaxy: dict):
+        for cluster in galaxy['GalaxyCluster']:
+            for galaxy_cluster in galaxies['GalaxyCluster']:
+                if cluster['uuid'] == galaxy_cluster['uuid']:
+                    break
+            else:
+                galaxies['GalaxyCluster'].append(cluster)
@@ -2,6 +2,7 @@
 #!/usr/bin/env python3
 
 import traceback
+from .event_representation import MISPEventRepresentation
 from .stix1_mapping import MISPtoSTIX1Mapping
 from .stix20_mapping import MISPtoSTIX20Mapping
 from .stix21_mapping import MISPtoSTIX21Mapping
@@ -25,6 +26,7 @@ class MISPtoSTIXParser:
             MISPtoSTIX1Mapping, MISPtoSTIX20Mapping, MISPtoSTIX21Mapping
         ]
         self._misp_event: dict
+        self._event_representation: Optional[MISPEventRepresentation] = None
 
     @property
     def composite_separators(cls) -> tuple:
@@ -104,19 +106,9 @@ class MISPtoSTIXParser:
         return {attribute['object_relation']: (attribute['value'], attribute['uuid']) for attribute in attributes}
 
     def _extract_object_attribute_tags_and_galaxies(self, misp_object: dict) -> tuple:
-        tags: set = set()
-        galaxies: dict = {}
-        for attribute in misp_object['Attribute']:
-            if attribute.get('Galaxy'):
-                for galaxy in attribute['Galaxy']:
-                    galaxy_type = galaxy['type']
-                    if galaxy_type in galaxies:
-                        self._merge_galaxy_clusters(galaxies[galaxy_type], galaxy)
-                    else:
-                        galaxies[galaxy_type] = galaxy
-            if attribute.get('Tag'):
-                tags.update(tag['name'] for tag in attribute['Tag'])
-        return tags, galaxies
+        if self._event_representation is not None:
+            return self._event_representation.object_tags_and_galaxies(misp_object)
+        return MISPEventRepresentation.extract_object_tags_and_galaxies(misp_object)
 
     def _handle_event_tags_and_galaxies(self) -> tuple:
         if self._misp_event.get('Galaxy'):
@@ -172,20 +164,17 @@ class MISPtoSTIXParser:
     def _is_published(self) -> bool:
         return all(self._misp_event.get(feature) for feature in self.__published_fields)
 
+    def _handle_event_representation(self, misp_event: Union[MISPEventRepresentation, dict]):
+        if not isinstance(misp_event, MISPEventRepresentation):
+            misp_event = MISPEventRepresentation(misp_event)
+        self._event_representation = misp_event
+        self._misp_event = misp_event.event
+
     def _is_reference_included(self, reference: dict, name: str) -> bool:
         if reference['relationship_type'] not in self.__PE_RELATIONSHIP_TYPES:
             return False
         return 'Object' in reference and reference['Object'].get('name') == name
 
-    @staticmethod
-    def _merge_galaxy_clusters(galaxies: dict, galaxy: dict):
-        for cluster in galaxy['GalaxyCluster']:
-            for galaxy_cluster in galaxies['GalaxyCluster']:
-                if cluster['uuid'] == galaxy_cluster['uuid']:
-                    break
-            else:
-                galaxies['GalaxyCluster'].append(cluster)
-
     @staticmethod
     def _quick_fetch_tag_names(galaxy: dict) -> tuple:
         return tuple(f'misp-galaxy:{galaxy["type"]}="{cluster["value"]}"' for cluster in galaxy["GalaxyCluster"])
@@ -203,6 +192,12 @@ class MISPtoSTIXParser:
     #                     ERRORS & WARNINGS HANDLING FUNCTIONS                     #
     ################################################################################
 
+    def _count_errors_and_warnings(self) -> tuple:
+        return (
+            len(self.__errors.get(self._identifier, ())),
+            len(self.__warnings.get(self._identifier, ()))
+        )
+
     def _attribute_error(self, attribute: Union[MISPAttribute, dict], exception: Exception):
         features = f"{attribute['type']} attribute: {attribute['value']} (uuid: {attribute['uuid']})"
         tb = self._parse_traceback(exception)
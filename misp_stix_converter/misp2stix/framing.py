@@ -2,32 +2,109 @@
 #!/usr/bin/env python3
 
 import datetime
-import json
 import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from mixbox import idgen
 from mixbox.namespaces import Namespace
 from stix.core import STIXHeader, STIXPackage
 from typing import Optional
 from uuid import uuid4
 from .stix1_mapping import NS_DICT, SCHEMALOC_DICT
+from ..misp_stix_json import json_dumps
 
 json_footer = ']}\n'
+_framing_uuid = '00000000-0000-0000-0000-000000000000'
+_framing_timestamp = datetime.datetime(1970, 1, 1, microsecond=1)
+_id_namespace: ContextVar = ContextVar('stix1_id_namespace', default=None)
+_id_generator_lock = threading.Lock()
+
+
+class _ContextIDGenerator(idgen.IDGenerator):
+    """
+    mixbox id generator whose namespace can be set for the current context
+    (thread or asyncio task) by `stix1_id_namespace`. Outside of such a
+    context, the namespace set for the whole process, which new threads and
+    worker processes get, is used.
+    """
+    @property
+    def namespace(self) -> Namespace:
+        namespace = _id_namespace.get()
+        return self._namespace if namespace is None else namespace
+
+    @namespace.setter
+    def namespace(self, value: Namespace):
+        if not isinstance(value, Namespace):
+            raise ValueError('Must be a Namespace object')
+        self._namespace = value
+        self.reset()
+
+
+def set_stix1_id_namespace(namespace: str, prefix: str):
+    """
+    Sets the namespace of the generated STIX 1 ids for the whole process,
+    i.e. outside of the `stix1_id_namespace` blocks.
+    """
+    _install_id_generator().namespace = _namespace(namespace, prefix)
+
+
+@contextmanager
+def stix1_id_namespace(namespace: str, prefix: str):
+    """
+    Context manager setting the namespace of the generated STIX 1 ids for
+    the conversion run in its block, in the current thread or task only, so
+    the conversions for different organisations can run concurrently.
+
+    with stix1_id_namespace('https://misp-project.org', 'MISP'):
+        parser.parse_misp_event(misp_event)
+        content = parser.stix_package.to_xml()
+    """
+    _install_id_generator()
+    token = _id_namespace.set(_namespace(namespace, prefix))
+    try:
+        yield
+    finally:
+        _id_namespace.reset(token)
+
+
+def _install_id_generator() -> _ContextIDGenerator:
+    """
+    Replaces the module-level id generator of mixbox, the one used by
+    python-stix and python-cybox, with a `_ContextIDGenerator` keeping its
+    namespace and method, the first time a STIX 1 id namespace is set.
+    """
+    generator = idgen._get_generator()
+    if isinstance(generator, _ContextIDGenerator):
+        return generator
+    with _id_generator_lock:
+        generator = idgen._get_generator()
+        if not isinstance(generator, _ContextIDGenerator):
+            generator = _ContextIDGenerator(generator.namespace, generator.method)
+            idgen.__generator = generator
+    return generator
+
+
+@lru_cache(maxsize=None)
+def stix1_namespaces(namespace: str, prefix: str) -> dict:
+    """
+    Namespaces dictionary used to export STIX 1 packages in XML format.
+    The dictionary is cached and shared, it must not be modified.
+    """
+    namespaces = {namespace: prefix}
+    namespaces.update(NS_DICT)
+    return namespaces
 
 
 def stix1_attributes_framing(namespace: str, orgname: str, return_format: str, version: str) -> tuple:
-    stix_package = _stix_package(orgname, version)
-    if return_format == 'xml':
-        namespaces = _handle_namespaces(namespace, orgname)
-        return _stix_xml_attributes_framing(stix_package, namespaces)
-    return _stix_json_attributes_framing(stix_package)
+    framing = _stix1_attributes_framing(namespace, orgname, return_format, version)
+    return _fill_stix1_framing(framing)
 
 
 def stix1_framing(namespace: str, orgname: str, return_format: str, version: str) -> tuple:
-    stix_package = _stix_package(orgname, version)
-    if return_format == 'xml':
-        namespaces = _handle_namespaces(namespace, orgname)
-        return _stix_xml_framing(stix_package, namespaces)
-    return _stix_json_framing(stix_package)
+    framing = _stix1_framing(namespace, orgname, return_format, version)
+    return _fill_stix1_framing(framing)
 
 
 def stix_xml_separator():
@@ -49,20 +126,59 @@ def stix21_framing(uuid: Optional[str] = None) -> tuple:
     return f'{header} "bundle--{uuid}", "objects": [', ', ', json_footer
 
 
-def _handle_namespaces(namespace: str, orgname: str) -> tuple:
-    parsed_orgname = re.sub('[\W]+', '', orgname.replace(' ', '_'))
-    namespaces = {namespace: parsed_orgname}
-    namespaces.update(NS_DICT)
+def _fill_stix1_framing(framing: tuple) -> tuple:
+    """
+    Gives its own id and timestamp to the package of a cached framing.
+    """
+    header, separator, footer = framing
+    header = header.replace(_framing_uuid, str(uuid4()), 1).replace(
+        _framing_timestamp.isoformat(), datetime.datetime.now().isoformat(), 1
+    )
+    return header, separator, footer
+
+
+def _namespace(namespace: str, prefix: str) -> Namespace:
     try:
-        idgen.set_id_namespace(Namespace(namespace, parsed_orgname))
+        return Namespace(namespace, prefix)
     except TypeError:
-        idgen.set_id_namespace(Namespace(namespace, parsed_orgname, 'MISP'))
-    return namespaces
+        return Namespace(namespace, prefix, 'MISP')
+
+
+def _parse_orgname(orgname: str) -> str:
+    return re.sub('[\W]+', '', orgname.replace(' ', '_'))
+
+
+@lru_cache(maxsize=None)
+def _stix1_attributes_framing(namespace: str, orgname: str, return_format: str, version: str) -> tuple:
+    stix_package = _stix_package(
+        orgname, version, uuid=_framing_uuid, timestamp=_framing_timestamp
+    )
+    if return_format == 'xml':
+        prefix = _parse_orgname(orgname)
+        # rendered with the id namespace of the framing, whatever the
+        # current one is, since the result is cached
+        with stix1_id_namespace(namespace, prefix):
+            return _stix_xml_attributes_framing(stix_package, stix1_namespaces(namespace, prefix))
+    return _stix_json_attributes_framing(stix_package)
+
+
+@lru_cache(maxsize=None)
+def _stix1_framing(namespace: str, orgname: str, return_format: str, version: str) -> tuple:
+    stix_package = _stix_package(
+        orgname, version, uuid=_framing_uuid, timestamp=_framing_timestamp
+    )
+    if return_format == 'xml':
+        prefix = _parse_orgname(orgname)
+        # rendered with the id namespace of the framing, whatever the
+        # current one is, since the result is cached
+        with stix1_id_namespace(namespace, prefix):
+            return _stix_xml_framing(stix_package, stix1_namespaces(namespace, prefix))
+    return _stix_json_framing(stix_package)
 
 
 def _stix_json_attributes_framing(stix_package: STIXPackage) -> tuple:
     header = {key: value for key, value in stix_package.to_dict().items() if key != 'observables'}
-    return f'{json.dumps(header)[:-1]}, ', ', ', '}'
+    return f'{json_dumps(header, compact=True)[:-1]}, ', ', ', '}'
 
 
 def _stix_json_framing(stix_package: STIXPackage) -> tuple:
@@ -72,13 +188,13 @@ def _stix_json_framing(stix_package: STIXPackage) -> tuple:
     return header, ', ', ']}}'
 
 
-def _stix_package(orgname: str, version: str, uuid: Optional[str] = None) -> STIXPackage:
-    parsed_orgname = re.sub('[\W]+', '', orgname.replace(' ', '_'))
+def _stix_package(orgname: str, version: str, uuid: Optional[str] = None,
+                  timestamp: Optional[datetime.datetime] = None) -> STIXPackage:
     if uuid is None:
         uuid = uuid4()
     stix_package = STIXPackage(
-        id_=f'{parsed_orgname}:STIXPackage-{uuid}',
-        timestamp=datetime.datetime.now()
+        id_=f'{_parse_orgname(orgname)}:STIXPackage-{uuid}',
+        timestamp=datetime.datetime.now() if timestamp is None else timestamp
     )
     stix_package.version = version
     stix_header = STIXHeader()
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import re
 import socket
+from .event_representation import MISPEventRepresentation
+from .stix1_dicts import STIX1IndicatorDict, STIX1ObservableDict
 from .stix1_mapping import MISPtoSTIX1Mapping
 from .exportparser import MISPtoSTIXParser
+from ..misp_stix_json import json_load
 from base64 import b64encode
 from collections import defaultdict
 from cybox.core import Observable, ObservableComposition, RelatedObject
@@ -50,7 +52,7 @@ from stix.coa import CourseOfAction
 from stix.common import InformationSource, Identity, ToolInformation
 from stix.common.confidence import Confidence
 from stix.common.related import RelatedCOA, RelatedIndicator, RelatedObservable, RelatedThreatActor, RelatedTTP
-from stix.common.vocabs import IncidentStatus
+from stix.common.vocabs import IncidentStatus, IndicatorType
 from stix.core import STIXPackage, STIXHeader
 from stix.data_marking import Marking, MarkingSpecification
 from stix.exploit_target import ExploitTarget, Vulnerability, Weakness
@@ -71,7 +73,7 @@ from stix.ttp.attack_pattern import AttackPattern
 from stix.ttp.malware_instance import MalwareInstance
 from stix.ttp.resource import Resource, Tools
 from stix.ttp.victim_targeting import VictimTargeting
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 from uuid import uuid5, UUID
 
 _FILE_SINGLE_ATTRIBUTES = (
@@ -88,12 +90,17 @@ _OBSERVABLE_OBJECT_TYPES = Union[
 
 
 class MISPtoSTIX1Parser(MISPtoSTIXParser):
-    def __init__(self, orgname: str, version: str):
+    def __init__(self, orgname: str, version: str, return_format: str = 'xml'):
         super().__init__()
         self._orgname = orgname
         self._orgname_id = re.sub('[\W]+', '', orgname.replace(" ", "_"))
         self._version = version
+        self._return_format = return_format
         self._mapping = MISPtoSTIX1Mapping()
+        self._indicator_templates: dict = {}
+        self._indicator_template_dicts: dict = {}
+        self._indicator_confidences: dict = {}
+        self._indicator_confidence_dicts: dict = {}
 
     @property
     def stix_package(self) -> STIXPackage:
@@ -106,7 +113,9 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
     def _resolve_attribute(self, attribute: dict):
         attribute_type = attribute['type']
         try:
-            if attribute_type in self._mapping.attribute_types_mapping:
+            if self._is_json_attribute(attribute):
+                self._parse_attribute_as_dict(attribute)
+            elif attribute_type in self._mapping.attribute_types_mapping:
                 getattr(self, self._mapping.attribute_types_mapping[attribute_type])(attribute)
             else:
                 self._parse_custom_attribute(attribute)
@@ -115,25 +124,19 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
             self._attribute_error(attribute, exception)
 
     def _handle_attribute_indicator(self, attribute: dict, observable: Observable) -> Indicator:
+        if isinstance(observable, STIX1ObservableDict):
+            return self._create_indicator_dict_from_attribute(attribute, observable)
         indicator = self._create_indicator_from_attribute(attribute)
         indicator.add_observable(observable)
         return indicator
 
     def _handle_attribute_indicator_tags(self, attribute: dict, indicator: Indicator, timestamp: datetime) -> Confidence:
         tags = self._handle_attribute_tags_and_galaxies(attribute, indicator)
-        if tags:
-            sorted_tags, confidence_tags = self._sort_tags(tags)
-            indicator.handling = self._create_handling(sorted_tags)
-            if confidence_tags:
-                return Confidence(
-                    value = confidence_tags[min(confidence_tags)],
-                    timestamp = timestamp
-                )
-        return Confidence(
-            value = self._mapping.confidence_value,
-            description = self._mapping.confidence_description,
-            timestamp = timestamp
-        )
+        indicator_type, handling, confidence = self._fetch_indicator_template(attribute['type'], tags)
+        indicator.add_indicator_type(indicator_type)
+        if handling is not None:
+            indicator.handling = handling
+        return self._fetch_indicator_confidence(confidence, timestamp)
 
     def _handle_attribute_tags_and_galaxies(self, attribute: dict, indicator: Indicator) -> tuple:
         if attribute.get('Galaxy'):
@@ -183,6 +186,19 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
             return tuple(tag['name'] for tag in attribute.get('Tag', []) if tag['name'] not in tag_names)
         return tuple(tag['name'] for tag in attribute.get('Tag', []))
 
+    def _is_json_attribute(self, attribute: dict) -> bool:
+        """
+        For the JSON exports, attributes of the most common types are converted
+        directly as the dicts python-stix would return, as long as there is no
+        galaxy to convert and their value needs no specific handling.
+        """
+        if self._return_format != 'json' or attribute.get('Galaxy'):
+            return False
+        if attribute['type'] not in self._mapping.json_attribute_types_mapping:
+            return False
+        value = attribute['value']
+        return isinstance(value, str) and '##comma##' not in value
+
     def _parse_attachment(self, attribute: dict):
         if attribute.get('data'):
             observable = self._create_attachment_observable(
@@ -194,6 +210,20 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         else:
             self._parse_file_attribute(attribute)
 
+    def _parse_attribute_as_dict(self, attribute: dict):
+        to_call = self._mapping.json_attribute_types_mapping[attribute['type']]
+        feature, properties = getattr(self, to_call)(attribute)
+        observable = STIX1ObservableDict(
+            {
+                'id': f"{self._orgname_id}:Observable-{attribute['uuid']}",
+                'object': {
+                    'id': f"{self._orgname_id}:{feature}-{attribute['uuid']}",
+                    'properties': properties
+                }
+            }
+        )
+        self._handle_attribute(attribute, observable)
+
     def _parse_autonomous_system_attribute(self, attribute: dict):
         autonomous_system = self._create_autonomous_system_object(attribute['value'])
         observable = self._create_observable(autonomous_system, attribute['uuid'], 'AS')
@@ -758,19 +788,9 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
             self._incident.history = History()
             self._incident.history.append(history_item)
 
-    @staticmethod
-    def _create_address_object(attribute_type: str, attribute_value: str) -> Address:
+    def _create_address_object(self, attribute_type: str, attribute_value: str) -> Address:
         address_object = Address()
-        if '/' in attribute_value:
-            address_object.category = "cidr"
-            condition = "Contains"
-        else:
-            try:
-                socket.inet_aton(attribute_value)
-                address_object.category = "ipv4-addr"
-            except socket.error:
-                address_object.category = "ipv6-addr"
-            condition = "Equals"
+        address_object.category, condition = self._fetch_address_category(attribute_value)
         if 'src' in attribute_type:
             address_object.is_source = True
             address_object.is_destination = False
@@ -786,6 +806,18 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         observable = self._create_observable(address_object, uuid, 'Address', alternative_uuid)
         return observable
 
+    def _create_address_properties(self, attribute: dict) -> tuple:
+        category, condition = self._fetch_address_category(attribute['value'])
+        is_source = 'src' in attribute['type']
+        properties = {
+            'address_value': {'value': attribute['value'], 'condition': condition},
+            'category': category,
+            'is_source': is_source,
+            'is_destination': not is_source,
+            'xsi:type': 'AddressObjectType'
+        }
+        return 'Address', properties
+
     def _create_artifact_object(self, data: Union[str, BytesIO]) -> Artifact:
         if not isinstance(data, str):
             data = b64encode(data.getvalue()).decode()
@@ -835,6 +867,14 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         observable = self._create_observable(domain_object, uuid, 'DomainName', alternative_uuid)
         return observable
 
+    @staticmethod
+    def _create_domain_properties(attribute: dict) -> tuple:
+        properties = {
+            'value': {'value': attribute['value'], 'condition': 'Equals'},
+            'xsi:type': 'DomainNameObjectType'
+        }
+        return 'DomainName', properties
+
     @staticmethod
     def _create_file_object(filename: str) -> File:
         file_object = File()
@@ -842,6 +882,35 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         file_object.file_name.condition = "Equals"
         return file_object
 
+    @staticmethod
+    def _create_file_properties(attribute: dict) -> tuple:
+        properties = {
+            'file_name': {'value': attribute['value'], 'condition': 'Equals'},
+            'xsi:type': 'FileObjectType'
+        }
+        return 'File', properties
+
+    @staticmethod
+    def _create_hash_properties(attribute: dict) -> tuple:
+        hash_type = getattr(Hash, f"TYPE_{attribute['type'].upper()}")
+        properties = {
+            'hashes': [
+                {
+                    'type': {
+                        'value': hash_type,
+                        'xsi:type': 'cyboxVocabs:HashNameVocab-1.0',
+                        'condition': 'Equals'
+                    },
+                    'simple_hash_value': {
+                        'value': attribute['value'],
+                        'condition': 'Equals'
+                    }
+                }
+            ],
+            'xsi:type': 'FileObjectType'
+        }
+        return 'File', properties
+
     @staticmethod
     def _create_hostname_object(hostname: str) -> Hostname:
         hostname_object = Hostname()
@@ -854,18 +923,57 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         observable = self._create_observable(hostname_object, uuid, 'Hostname')
         return observable
 
+    @staticmethod
+    def _create_hostname_properties(attribute: dict) -> tuple:
+        properties = {
+            'hostname_value': {'value': attribute['value'], 'condition': 'Equals'},
+            'xsi:type': 'HostnameObjectType'
+        }
+        return 'Hostname', properties
+
     def _create_indicator_from_attribute(self, attribute: dict) -> Indicator:
         timestamp = self._datetime_from_timestamp(attribute['timestamp'])
-        indicator = Indicator(timestamp=timestamp)
-        indicator.id_ = f"{self._orgname_id}:Indicator-{attribute['uuid']}"
+        indicator = Indicator(
+            id_=f"{self._orgname_id}:Indicator-{attribute['uuid']}",
+            timestamp=timestamp
+        )
         indicator.producer = self._producer
         indicator.title = f"{attribute['category']}: {attribute['value']} (MISP Attribute)"
         indicator.description = attribute['comment'] if attribute.get('comment') else indicator.title
-        indicator.add_indicator_type(self._set_indicator_type(attribute['type']))
         indicator.add_valid_time_position(ValidTime())
         indicator.confidence = self._handle_attribute_indicator_tags(attribute, indicator, timestamp)
         return indicator
 
+    def _create_indicator_dict_from_attribute(self, attribute: dict, observable: STIX1ObservableDict) -> STIX1IndicatorDict:
+        """
+        Same Indicator as `_create_indicator_from_attribute` builds, directly
+        as the dict python-stix would return with `to_dict`.
+        """
+        timestamp = self._datetime_from_timestamp(attribute['timestamp'])
+        tags = tuple(tag['name'] for tag in attribute.get('Tag', []))
+        indicator_type, handling, confidence = self._fetch_indicator_template_dict(attribute['type'], tags)
+        title = f"{attribute['category']}: {attribute['value']} (MISP Attribute)"
+        indicator = {
+            'id': f"{self._orgname_id}:Indicator-{attribute['uuid']}",
+            'title': title,
+            'description': attribute['comment'] if attribute.get('comment') else title,
+            'timestamp': timestamp.isoformat(),
+            'observable': observable.to_dict(),
+            'indicator_types': [indicator_type],
+            'suggested_coas': {},
+            'sightings': {},
+            'kill_chain_phases': {},
+            'related_indicators': {},
+            'related_campaigns': {},
+            'related_packages': {},
+            'producer': self._producer_dict,
+            'valid_time_positions': [{}]
+        }
+        if handling is not None:
+            indicator['handling'] = handling
+        indicator['confidence'] = self._fetch_indicator_confidence_dict(confidence, timestamp)
+        return STIX1IndicatorDict(indicator)
+
     @staticmethod
     def _create_information_source(name: str) -> InformationSource:
         identity = Identity(name=name)
@@ -892,6 +1000,14 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         mutex_object.name.condition = "Equals"
         return mutex_object
 
+    @staticmethod
+    def _create_mutex_properties(attribute: dict) -> tuple:
+        properties = {
+            'name': {'value': attribute['value'], 'condition': 'Equals'},
+            'xsi:type': 'MutexObjectType'
+        }
+        return 'Mutex', properties
+
     def _create_observable(self, stix_object: _OBSERVABLE_OBJECT_TYPES, attribute_uuid: str, feature: str, alternative_uuid: Optional[str] = None) -> Observable:
         stix_object.parent.id_ = f"{self._orgname_id}:{feature}-{attribute_uuid}"
         observable = Observable(stix_object)
@@ -1005,6 +1121,25 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
         observable = self._create_observable(uri_object, uuid, 'URI')
         return observable
 
+    @staticmethod
+    def _create_uri_properties(attribute: dict) -> tuple:
+        properties = {
+            'value': {'value': attribute['value'], 'condition': 'Equals'},
+            'type': 'URL',
+            'xsi:type': 'URIObjectType'
+        }
+        return 'URI', properties
+
+    @staticmethod
+    def _fetch_address_category(attribute_value: str) -> tuple:
+        if '/' in attribute_value:
+            return 'cidr', 'Contains'
+        try:
+            socket.inet_aton(attribute_value)
+            return 'ipv4-addr', 'Equals'
+        except socket.error:
+            return 'ipv6-addr', 'Equals'
+
     @staticmethod
     def _fetch_colors(tags: list) -> tuple:
         return (':'.join(tag.split(':')[1:]) for tag in tags)
@@ -1081,6 +1216,65 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
     def _datetime_to_str(timestamp):
         return datetime.strftime(timestamp, "%Y-%m-%dT%H:%M:%S")
 
+    def _fetch_indicator_confidence(self, confidence: dict, timestamp: datetime) -> Confidence:
+        """
+        Confidence instances are shared by the indicators of the same event
+        with the same confidence arguments and timestamp.
+        """
+        key = (confidence['value'], confidence.get('description'), timestamp)
+        if key not in self._indicator_confidences:
+            self._indicator_confidences[key] = Confidence(timestamp=timestamp, **confidence)
+        return self._indicator_confidences[key]
+
+    def _fetch_indicator_confidence_dict(self, confidence: dict, timestamp: datetime) -> dict:
+        key = (confidence['value'], confidence.get('description'), timestamp)
+        if key not in self._indicator_confidence_dicts:
+            self._indicator_confidence_dicts[key] = self._fetch_indicator_confidence(confidence, timestamp).to_dict()
+        return self._indicator_confidence_dicts[key]
+
+    def _fetch_indicator_template(self, attribute_type: Union[str, None], tags: tuple) -> tuple:
+        """
+        Returns the parts of an Indicator that only depend on the attribute
+        type and the tags: the indicator type, the handling and the confidence
+        arguments. They are built once per (attribute type, tags) combination
+        within a package and the IndicatorType and Marking instances are then
+        shared by every indicator of the package using them, so they must not
+        be modified.
+        """
+        key = (attribute_type, tags)
+        if key not in self._indicator_templates:
+            indicator_type = None
+            if attribute_type is not None:
+                indicator_type = IndicatorType(self._set_indicator_type(attribute_type))
+            handling = None
+            confidence = {
+                'value': self._mapping.confidence_value,
+                'description': self._mapping.confidence_description
+            }
+            if tags:
+                sorted_tags, confidence_tags = self._sort_tags(tags)
+                handling = self._create_handling(sorted_tags)
+                if confidence_tags:
+                    confidence = {'value': confidence_tags[min(confidence_tags)]}
+            self._indicator_templates[key] = (indicator_type, handling, confidence)
+        return self._indicator_templates[key]
+
+    def _fetch_indicator_template_dict(self, attribute_type: str, tags: tuple) -> tuple:
+        """
+        Dict version of the parts returned by `_fetch_indicator_template`, for
+        the indicators converted directly as dicts. The indicator type and
+        handling dicts are shared by those indicators as well.
+        """
+        key = (attribute_type, tags)
+        if key not in self._indicator_template_dicts:
+            indicator_type, handling, confidence = self._fetch_indicator_template(attribute_type, tags)
+            self._indicator_template_dicts[key] = (
+                indicator_type.to_dict(),
+                None if handling is None else handling.to_dict(),
+                confidence
+            )
+        return self._indicator_template_dicts[key]
+
     def _sort_tags(self, tags: list) -> Tuple[dict, dict]:
         sorted_tags = defaultdict(list)
         confidence_tags = {}
@@ -1096,18 +1290,22 @@ class MISPtoSTIX1Parser(MISPtoSTIXParser):
 
 
 class MISPtoSTIX1AttributesParser(MISPtoSTIX1Parser):
-    def __init__(self, orgname: str, version: str):
-        super().__init__(orgname, version)
+    def __init__(self, orgname: str, version: str, return_format: str = 'xml'):
+        super().__init__(orgname, version, return_format)
         self._producer = self._create_information_source(orgname)
+        self._producer_dict = self._producer.to_dict()
         self._identifier = 'attributes collection'
         self._ids = set()
 
     def parse_json_content(self, filename):
-        with open(filename, 'rt', encoding='utf-8') as f:
-            attributes = json.loads(f.read())
-            if attributes.get('response') is not None:
-                attributes = attributes['response']
+        attributes = json_load(filename)
+        if attributes.get('response') is not None:
+            attributes = attributes['response']
         self._stix_package = STIXPackage()
+        self._indicator_templates = {}
+        self._indicator_template_dicts = {}
+        self._indicator_confidences = {}
+        self._indicator_confidence_dicts = {}
         if 'Attribute' in attributes:
             attributes = attributes['Attribute']
         for attribute in attributes:
@@ -1149,51 +1347,44 @@ class MISPtoSTIX1AttributesParser(MISPtoSTIX1Parser):
 
 
 class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
-    def __init__(self, orgname: str, version: str):
-        super().__init__(orgname, version)
+    def __init__(self, orgname: str, version: str, return_format: str = 'xml'):
+        super().__init__(orgname, version, return_format)
         self._mapping.declare_objects_mapping()
 
     def parse_json_content(self, filename):
-        with open(filename, 'rt', encoding='utf-8') as f:
-            json_content = json.loads(f.read())
+        json_content = json_load(filename)
         if json_content.get('response'):
-            package = STIXPackage()
-            for event in json_content['response']:
-                self.parse_misp_event(event)
-                package.add_related_package(self._stix_package)
-            self._stix_package = package
+            self.parse_misp_events(json_content['response'])
         else:
             self.parse_misp_event(json_content)
 
-    def parse_misp_event(self, misp_event: dict):
+    def parse_misp_events(self, misp_events: List[Union[MISPEventRepresentation, dict]]):
+        package = STIXPackage()
+        for misp_event in misp_events:
+            self.parse_misp_event(misp_event)
+            package.add_related_package(self._stix_package)
+        self._stix_package = package
+
+    def parse_misp_event(self, misp_event: Union[MISPEventRepresentation, dict]):
         self._header_comment = []
         self._objects_to_parse = defaultdict(dict)
         self._contextualised_data = set()
         self._ids = set()
         self._ttp_references = {}
-        if 'Event' in misp_event:
-            misp_event = misp_event['Event']
-        self._misp_event = misp_event
+        self._indicator_templates = {}
+        self._indicator_template_dicts = {}
+        self._indicator_confidences = {}
+        self._indicator_confidence_dicts = {}
+        self._handle_event_representation(misp_event)
         self._identifier = self._misp_event['uuid']
         producer = self._set_producer()
         self._producer = self._create_information_source(producer)
+        self._producer_dict = self._producer.to_dict()
         self._stix_package = self._create_stix_package()
         self._incident = self._create_incident()
         self._generate_stix_objects()
-        if self._stix_package.ttps is not None:
-            for ttp in self._stix_package.ttps.ttp:
-                uuid = '-'.join(ttp.id_.split('-')[-5:])
-                if uuid in self._ttp_references:
-                    for referenced_uuid, relationship in self._ttp_references[uuid]:
-                        if referenced_uuid in self._contextualised_data:
-                            referenced_id = f'{self._orgname_id}:TTP-{referenced_uuid}'
-                            timestamp = self._quick_fetch_ttp_timestamp(referenced_id)
-                            related_ttp = self._create_related_ttp(
-                                f'{self._orgname_id}:TTP-{referenced_uuid}',
-                                relationship,
-                                timestamp=timestamp
-                            )
-                            ttp.add_related_ttp(related_ttp)
+        if self._stix_package.ttps is not None and self._ttp_references:
+            self._handle_ttp_references()
         self._stix_package.add_incident(self._incident)
         stix_header = STIXHeader()
         stix_header.title = f"Export from {producer}'s MISP"
@@ -1233,6 +1424,27 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
         incident.reporter = self._producer
         return incident
 
+    def _handle_ttp_references(self):
+        ttps = self._stix_package.ttps.ttp
+        # TTPs indexed by id in one pass, to avoid scanning them for every reference
+        ttps_index = {}
+        for ttp in ttps:
+            ttps_index.setdefault(ttp.id_, ttp)
+        for ttp in ttps:
+            uuid = '-'.join(ttp.id_.split('-')[-5:])
+            if uuid not in self._ttp_references:
+                continue
+            for referenced_uuid, relationship in self._ttp_references[uuid]:
+                if referenced_uuid in self._contextualised_data:
+                    referenced_id = f'{self._orgname_id}:TTP-{referenced_uuid}'
+                    referenced_ttp = ttps_index.get(referenced_id)
+                    related_ttp = self._create_related_ttp(
+                        referenced_id,
+                        relationship,
+                        timestamp=None if referenced_ttp is None else referenced_ttp.timestamp
+                    )
+                    ttp.add_related_ttp(related_ttp)
+
     def _generate_stix_objects(self):
         tags = self._handle_event_tags_and_galaxies()
         if tags:
@@ -1427,19 +1639,10 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
 
     def _handle_object_indicator_tags(self, misp_object: dict, indicator: Indicator, timestamp: datetime) -> Confidence:
         tags = self._handle_object_tags_and_galaxies(misp_object, indicator)
-        if tags:
-            sorted_tags, confidence_tags = self._sort_tags(tags)
-            indicator.handling = self._create_handling(sorted_tags)
-            if confidence_tags:
-                return Confidence(
-                    value = confidence_tags[min(confidence_tags)],
-                    timestamp = timestamp
-                )
-        return Confidence(
-            value=self._mapping.confidence_value,
-            description=self._mapping.confidence_description,
-            timestamp=timestamp
-        )
+        _, handling, confidence = self._fetch_indicator_template(None, tags)
+        if handling is not None:
+            indicator.handling = handling
+        return self._fetch_indicator_confidence(confidence, timestamp)
 
     def _handle_object_tags_and_galaxies(self, misp_object: dict, indicator: Indicator) -> tuple:
         tags, galaxies = self._extract_object_attribute_tags_and_galaxies(misp_object)
@@ -1455,8 +1658,8 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
                         galaxy_type,
                         misp_object['name']
                     )
-            return tuple(tag for tag in tags if tag not in tag_names)
-        return tuple(tags)
+            return tuple(sorted(tag for tag in tags if tag not in tag_names))
+        return tuple(sorted(tags))
 
     def _handle_ttp_from_object(self, misp_object: dict, ttp: TTP):
         tags = self._handle_non_indicator_object_tags_and_galaxies(misp_object, ttp, 'ttp_names')
@@ -2358,8 +2561,3 @@ class MISPtoSTIX1EventsParser(MISPtoSTIX1Parser):
         if not tag.startswith('tlp:'):
             return False
         return tag.startswith('tlp:') and ':'.join(tag.split(':')[1:]) in self._mapping.TLP_order
-
-    def _quick_fetch_ttp_timestamp(self, object_id: str) -> datetime:
-        for ttp in self._stix_package.ttps.ttp:
-            if ttp.id_ == object_id:
-                return ttp.timestamp
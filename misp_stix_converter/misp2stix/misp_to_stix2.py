@@ -2,12 +2,16 @@
 # -*- coding: utf-8 -*-
 
 import io
-import json
 import os
 import re
+from .event_representation import MISPEventRepresentation
 from .exportparser import MISPtoSTIXParser
+from .stix2_cache import STIX2ExportCache
+from .stix2_registry import STIX2ObjectsRegistry
+from ..misp_stix_json import json_load
 from base64 import b64encode
 from collections import defaultdict
+from copy import deepcopy
 from datetime import datetime
 from pathlib import Path
 from pymisp import MISPAttribute, MISPEvent, MISPGalaxy, MISPGalaxyCluster, MISPObject
@@ -15,7 +19,7 @@ from stix2.hashes import check_hash, Hash
 from stix2.properties import ListProperty, StringProperty
 from stix2.v20.bundle import Bundle as Bundle_v20
 from stix2.v21.bundle import Bundle as Bundle_v21
-from typing import Generator, Optional, Tuple, Union
+from typing import Generator, List, Optional, Tuple, Union
 
 _label_fields = ('type', 'category', 'to_ids')
 _misp_time_fields = ('first_seen', 'last_seen')
@@ -32,12 +36,19 @@ class InvalidHashValueError(Exception):
 
 
 class MISPtoSTIX2Parser(MISPtoSTIXParser):
-    def __init__(self, interoperability: bool):
+    def __init__(self, interoperability: bool,
+                 registry: Optional[STIX2ObjectsRegistry] = None,
+                 cache: Optional[STIX2ExportCache] = None):
         super().__init__()
         self.__ids: dict = {}
         self.__index = 0
         self.__initiated = False
         self.__interoperability = interoperability
+        self.__registry = registry
+        self.__emitted: dict = {}
+        self.__cache = cache
+        self.__capture = None
+        self.__cached_uuids: set = set()
         self._id_parsing_function = {
             'attribute': '_define_stix_object_id',
             'object': '_define_stix_object_id'
@@ -46,16 +57,11 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
 
     def parse_json_content(self, filename: Union[Path, str]):
         self._results_handling_function = '_append_SDO'
-        with open(filename, 'rt', encoding='utf-8') as f:
-            json_content = json.loads(f.read())
+        json_content = json_load(filename)
         if json_content.get('response'):
             json_content = json_content['response']
             if isinstance(json_content, list):
-                if not self.__initiated:
-                    self._initiate_events_parsing()
-                for event in json_content:
-                    self._parse_misp_event(event)
-                    self.__index = len(self.__objects)
+                self.parse_misp_events(json_content)
             else:
                 self.parse_misp_attributes(json_content)
         else:
@@ -93,24 +99,31 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         if self._markings:
             for marking in self._markings.values():
                 if not marking['used']:
-                    self._append_SDO_without_refs(marking['marking'])
+                    self._append_shared_SDO(marking['marking'])
                     marking['used'] = True
         if self.__relationships:
             self._handle_relationships()
 
-    def parse_misp_event(self, misp_event: Union[MISPEvent, dict]):
+    def parse_misp_event(self, misp_event: Union[MISPEvent, MISPEventRepresentation, dict]):
         self._results_handling_function = '_append_SDO'
         if not self.__initiated:
             self._initiate_events_parsing()
         self._parse_misp_event(misp_event)
 
-    def _parse_misp_event(self, misp_event: Union[MISPEvent, dict]):
-        if 'Event' in misp_event:
-            misp_event = misp_event['Event']
-        self._misp_event = misp_event
+    def parse_misp_events(self, misp_events: List[Union[MISPEvent, MISPEventRepresentation, dict]]):
+        self._results_handling_function = '_append_SDO'
+        if not self.__initiated:
+            self._initiate_events_parsing()
+        for misp_event in misp_events:
+            self._parse_misp_event(misp_event)
+            self.__index = len(self.__objects)
+
+    def _parse_misp_event(self, misp_event: Union[MISPEvent, MISPEventRepresentation, dict]):
+        self._handle_event_representation(misp_event)
         self._identifier = self._misp_event['uuid']
         self.__object_refs = []
         self.__relationships = []
+        self.__cached_uuids = set()
         self._set_identity()
         self._parse_event_data()
         report = self._generate_event_report()
@@ -123,7 +136,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         identity_id = self._mapping.misp_identity_args['id']
         if identity_id not in self.unique_ids:
             identity = self._create_identity(self._mapping.misp_identity_args)
-            self._append_SDO_without_refs(identity)
+            self._append_shared_SDO(identity)
             self.__ids[identity_id] = identity_id
         return identity_id
 
@@ -138,7 +151,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     'identity_class': 'organization'
                 }
                 identity = self._create_identity(identity_args)
-                self._append_SDO_without_refs(identity)
+                self._append_shared_SDO(identity)
                 self.__ids[identity_id] = identity_id
             return identity_id
         return self._handle_default_identity()
@@ -175,8 +188,13 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         self.__initiated = False
         self._markings = {}
         self.__index = 0
+        self.__emitted = {}
         return self._create_bundle()
 
+    @property
+    def cache(self) -> Union[STIX2ExportCache, None]:
+        return self.__cache
+
     @property
     def fetch_stix_objects(self) -> list:
         """
@@ -196,6 +214,10 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
     def interoperability(self) -> bool:
         return self.__interoperability
 
+    @property
+    def registry(self) -> Union[STIX2ObjectsRegistry, None]:
+        return self.__registry
+
     @property
     def object_refs(self) -> list:
         return self.__object_refs
@@ -227,6 +249,19 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
     def _append_SDO_without_refs(self, stix_object):
         self.__objects.append(stix_object)
 
+    def _append_shared_SDO(self, stix_object, index: Optional[int] = None) -> bool:
+        if self.__registry is not None:
+            # Shared objects are emitted once per bundle, unless their content changed
+            content_hash = self.__registry.register(stix_object)
+            if self.__emitted.get(stix_object.id) == content_hash:
+                return False
+            self.__emitted[stix_object.id] = content_hash
+        if index is None:
+            self.__objects.append(stix_object)
+        else:
+            self.__objects.insert(index, stix_object)
+        return True
+
     def _generate_event_report(self):
         timestamp = self._datetime_from_timestamp(self._misp_event['timestamp'])
         report_args = {
@@ -248,7 +283,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         if self._markings:
             for marking in self._markings.values():
                 if not marking['used']:
-                    self._append_SDO_without_refs(marking['marking'])
+                    self._append_shared_SDO(marking['marking'])
                     marking['used'] = True
         if self._is_published():
             report_id = f"report--{self._misp_event['uuid']}"
@@ -273,8 +308,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         self._galaxies_catalog = defaultdict(lambda: defaultdict(list))
         self._identities = {}
         for filename in cti_path.glob('*/*.json'):
-            with open(filename, 'rt', encoding='utf-8') as f:
-                bundle = json.loads(f.read())
+            bundle = json_load(filename)
             for stix_object in bundle['objects']:
                 if stix_object['type'] == 'identity':
                     object_id = stix_object['id']
@@ -300,9 +334,10 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         return (stix_object['id'] for stix_object in self._galaxies_catalog[name][object_type])
 
     def _handle_relationships(self):
+        target_refs = self._index_target_refs()
         for relationship in self.__relationships:
             if relationship.get('undefined_target_ref'):
-                target_ref = self._find_target_uuid(relationship.pop('undefined_target_ref'))
+                target_ref = target_refs.get(relationship.pop('undefined_target_ref'))
                 if target_ref is None:
                     continue
                 relationship['target_ref'] = target_ref
@@ -344,11 +379,104 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
             self._handle_identity(identity_id, name)
         return identity_id
 
+    ################################################################################
+    #                     INCREMENTAL EXPORT HANDLING FUNCTIONS                    #
+    ################################################################################
+
+    def _is_cacheable(self, misp_content: Union[MISPAttribute, MISPObject, dict]) -> bool:
+        """
+        Attributes and objects with galaxies or sightings are always parsed,
+        because they create or reference shared STIX objects (galaxy objects,
+        identities) and sightings are not reflected by the MISP timestamps.
+        Events with event reports are always parsed as well since the matching
+        between the MISP UUIDs and the STIX ids is done during the parsing.
+        """
+        if self.__cache is None or self.__capture is not None:
+            return False
+        if self._id_parsing_function['attribute'] != '_define_stix_object_id':
+            return False
+        uuid = misp_content.get('uuid')
+        if uuid is None or misp_content.get('timestamp') is None:
+            return False
+        # The same UUID used more than once within an event would collide
+        if uuid in self.__cached_uuids:
+            return False
+        attributes = misp_content.get('Attribute', [misp_content])
+        return not any(
+            attribute.get('Galaxy') or attribute.get('Sighting')
+            for attribute in attributes
+        )
+
+    def _handle_cached_markings(self, stix_object):
+        for marking_id in stix_object.get('object_marking_refs', []):
+            tag = self._tlp_marking_tags.get(marking_id)
+            if tag is None or tag in self._markings:
+                continue
+            if marking_id not in self.unique_ids:
+                self._markings[tag] = {
+                    'marking': deepcopy(self._mapping.tlp_markings[tag]),
+                    'used': False
+                }
+                self.unique_ids[marking_id] = marking_id
+
+    def _record_cached_uuid(self, misp_content: Union[MISPAttribute, MISPObject, dict]):
+        if self.__cache is not None and misp_content.get('uuid') is not None:
+            self.__cached_uuids.add(misp_content['uuid'])
+
+    def _resolve_cached_content(self, misp_content: Union[MISPAttribute, MISPObject, dict],
+                                resolve_function: str):
+        timestamp = misp_content['timestamp']
+        if isinstance(timestamp, datetime):
+            timestamp = int(timestamp.timestamp())
+        timestamp = str(timestamp)
+        key = self.__cache.cache_key(self._version, misp_content['uuid'])
+        cached = self.__cache.get(key, timestamp, self.__identity_id)
+        if cached is not None:
+            for stix_object in cached['objects']:
+                self._handle_cached_markings(stix_object)
+                self.__objects.append(stix_object)
+            self.__object_refs.extend(cached['object_refs'])
+            for source_id, relationship_timestamp in cached['relationships']:
+                self._parse_object_relationships(
+                    misp_content.get('ObjectReference', []), source_id,
+                    relationship_timestamp
+                )
+            return
+        objects_length = len(self.__objects)
+        refs_length = len(self.__object_refs)
+        index = self.__index
+        errors_and_warnings = self._count_errors_and_warnings()
+        self.__capture = {'relationships': []}
+        try:
+            getattr(self, resolve_function)(misp_content)
+        finally:
+            relationships = self.__capture['relationships']
+            self.__capture = None
+        objects = self.__objects[objects_length:]
+        # Nothing is cached when the parsing is deferred (file & pe objects),
+        # when objects are inserted before the report, or on errors & warnings
+        if not objects or index != self.__index:
+            return
+        if errors_and_warnings != self._count_errors_and_warnings():
+            return
+        self.__cache.set(
+            key, timestamp, self.__identity_id, objects,
+            self.__object_refs[refs_length:], relationships
+        )
+
     ################################################################################
     #                         ATTRIBUTES PARSING FUNCTIONS                         #
     ################################################################################
 
     def _resolve_attribute(self, attribute: Union[MISPAttribute, dict]):
+        cacheable = self._is_cacheable(attribute)
+        self._record_cached_uuid(attribute)
+        if cacheable:
+            self._resolve_cached_content(attribute, '_resolve_attribute_content')
+        else:
+            self._resolve_attribute_content(attribute)
+
+    def _resolve_attribute_content(self, attribute: Union[MISPAttribute, dict]):
         attribute_type = attribute['type']
         try:
             if attribute_type in self._mapping.attribute_types_mapping:
@@ -846,15 +974,23 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
 
     def _resolve_objects(self):
         for misp_object in self._misp_event['Object']:
-            try:
-                object_name = misp_object['name']
-                if object_name in self._mapping.objects_mapping:
-                    getattr(self, self._mapping.objects_mapping[object_name])(misp_object)
-                else:
-                    self._parse_custom_object(misp_object)
-                    self._object_not_mapped_warning(object_name)
-            except Exception as exception:
-                self._object_error(misp_object, exception)
+            cacheable = self._is_cacheable(misp_object)
+            self._record_cached_uuid(misp_object)
+            if cacheable:
+                self._resolve_cached_content(misp_object, '_resolve_object')
+            else:
+                self._resolve_object(misp_object)
+
+    def _resolve_object(self, misp_object: Union[MISPObject, dict]):
+        try:
+            object_name = misp_object['name']
+            if object_name in self._mapping.objects_mapping:
+                getattr(self, self._mapping.objects_mapping[object_name])(misp_object)
+            else:
+                self._parse_custom_object(misp_object)
+                self._object_not_mapped_warning(object_name)
+        except Exception as exception:
+            self._object_error(misp_object, exception)
 
     def _extract_multiple_object_attributes_escaped(self, attributes: list, force_single: Optional[tuple] = None) -> dict:
         attributes_dict = defaultdict(list)
@@ -2290,11 +2426,11 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         identity_id = stix_object['created_by_ref']
         if identity_id not in self.unique_ids:
             identity = self._create_identity(self._identities[identity_id])
-            self.__objects.insert(0, identity)
-            self.__index += 1
+            if self._append_shared_SDO(identity, 0):
+                self.__index += 1
             self.__ids[identity_id] = identity_id
         stix_object['allow_custom'] = True
-        self._append_SDO_without_refs(
+        self._append_shared_SDO(
             getattr(self, f"_create_{object_type.replace('-', '_')}")(
                 stix_object
             )
@@ -2382,7 +2518,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                 attack_pattern_args.update(
                     self._parse_meta_fields(cluster['meta'], 'attack_pattern')
                 )
-            self._append_SDO_without_refs(
+            self._append_shared_SDO(
                 self._create_attack_pattern(attack_pattern_args)
             )
             object_refs.append(attack_pattern_id)
@@ -2423,7 +2559,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     self._parse_meta_fields(cluster['meta'], 'course_of_action')
                 )
             course_of_action = self._create_course_of_action(course_of_action_args)
-            self._append_SDO_without_refs(course_of_action)
+            self._append_shared_SDO(course_of_action)
             object_refs.append(course_of_action_id)
             self.__ids[cluster['uuid']] = course_of_action_id
         return object_refs
@@ -2483,7 +2619,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     self._parse_meta_fields(cluster['meta'], 'intrusion_set')
                 )
             intrusion_set = self._create_intrusion_set(intrusion_set_args)
-            self._append_SDO_without_refs(intrusion_set)
+            self._append_shared_SDO(intrusion_set)
             object_refs.append(intrusion_set_id)
             self.__ids[cluster['uuid']] = intrusion_set_id
         return object_refs
@@ -2531,7 +2667,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     malware_args['labels'].extend(meta_args.pop('labels'))
                 malware_args.update(meta_args)
             malware = self._create_malware(malware_args)
-            self._append_SDO_without_refs(malware)
+            self._append_shared_SDO(malware)
             object_refs.append(malware_id)
             self.__ids[cluster['uuid']] = malware_id
         return object_refs
@@ -2603,7 +2739,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     threat_actor_args['labels'].extend(meta_args.pop('labels'))
                 threat_actor_args.update(meta_args)
             threat_actor = self._create_threat_actor(threat_actor_args)
-            self._append_SDO_without_refs(threat_actor)
+            self._append_shared_SDO(threat_actor)
             object_refs.append(threat_actor_id)
             self.__ids[cluster['uuid']] = threat_actor_id
         return object_refs
@@ -2643,7 +2779,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     tool_args['labels'].extend(meta_args.pop('labels'))
                 tool_args.update(meta_args)
             tool = self._create_tool(tool_args)
-            self._append_SDO_without_refs(tool)
+            self._append_shared_SDO(tool)
             object_refs.append(tool_id)
             self.__ids[cluster['uuid']] = tool_id
         return object_refs
@@ -2667,7 +2803,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                 cluster, galaxy['name'], galaxy['description'], custom_id, timestamp
             )
             custom_galaxy = self._create_custom_galaxy(custom_args)
-            self._append_SDO_without_refs(custom_galaxy)
+            self._append_shared_SDO(custom_galaxy)
             object_refs.append(custom_id)
             self.__ids[cluster['uuid']] = custom_id
         return object_refs
@@ -2702,7 +2838,7 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                     self._parse_meta_fields(cluster['meta'], 'vulnerability')
                 )
             vulnerability = self._create_vulnerability(vulnerability_args)
-            self._append_SDO_without_refs(vulnerability)
+            self._append_shared_SDO(vulnerability)
             object_refs.append(vulnerability_id)
             self.__ids[cluster['uuid']] = vulnerability_id
         return object_refs
@@ -2815,8 +2951,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
             'identity_class': 'organization'
         }
         identity = self._create_identity(identity_args)
-        self.__objects.insert(self.__index, identity)
-        self.__index += 1
+        if self._append_shared_SDO(identity, self.__index):
+            self.__index += 1
         self.unique_ids[identity_id] = identity_id
 
     def _parse_contact_information(self, attributes: dict, name: str) -> list:
@@ -2857,8 +2993,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         if self.__identity_id not in self.unique_ids:
             self.__ids[self.__identity_id] = self.__identity_id
             identity = self._create_identity_object(orgc['name'])
-            self._append_SDO_without_refs(identity)
-            self.__index += 1
+            if self._append_shared_SDO(identity):
+                self.__index += 1
 
     ################################################################################
     #                     OBSERVABLE OBJECT PARSING FUNCTIONS.                     #
@@ -3395,11 +3531,6 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
                 uuids.append(referenced_uuid)
         return uuids
 
-    def _find_target_uuid(self, reference: str) -> Union[str, None]:
-        for object_ref in self.__object_refs:
-            if reference in object_ref:
-                return object_ref
-
     @staticmethod
     def _get_matching_email_display_name(display_names: list, address: str) -> Optional[int]:
         # Trying first to get a perfect match in case of a very standard first name last name case
@@ -3475,6 +3606,18 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         sanitized = self._sanitize_registry_key_value(attribute_value)
         return sanitized.replace("'", "\\'").replace('"', '\\\\"')
 
+    def _index_target_refs(self) -> dict:
+        """
+        Maps the MISP UUIDs to the ids of the STIX objects referenced in the
+        report, so the targets of the object relationships are resolved in
+        constant time. The first STIX object converted from a given MISP UUID
+        remains the target of the relationships.
+        """
+        target_refs = {}
+        for object_ref in self.__object_refs:
+            target_refs.setdefault(object_ref.split('--')[-1], object_ref)
+        return target_refs
+
     def _is_tlp_tag(self, tag: str) -> bool:
         if not tag.startswith('tlp:'):
             return False
@@ -3518,6 +3661,8 @@ class MISPtoSTIX2Parser(MISPtoSTIXParser):
         )
 
     def _parse_object_relationships(self, references: list, source_id: str, timestamp: datetime):
+        if self.__capture is not None:
+            self.__capture['relationships'].append((source_id, timestamp))
         for reference in references:
             referenced_uuid = reference['referenced_uuid']
             if any(referenced_uuid in objects for objects in self._objects_to_parse.values()):
@@ -3,6 +3,8 @@
 
 from .misp_to_stix2 import InvalidHashValueError, MISPtoSTIX2Parser
 from .stix20_mapping import MISPtoSTIX20Mapping
+from .stix2_cache import STIX2ExportCache
+from .stix2_registry import STIX2ObjectsRegistry
 from base64 import b64encode
 from collections import defaultdict
 from copy import deepcopy
@@ -116,10 +118,15 @@ class CustomOpinion:
 
 
 class MISPtoSTIX20Parser(MISPtoSTIX2Parser):
-    def __init__(self, interoperability=False):
-        super().__init__(interoperability)
+    def __init__(self, interoperability=False,
+                 registry: Optional[STIX2ObjectsRegistry] = None,
+                 cache: Optional[STIX2ExportCache] = None):
+        super().__init__(interoperability, registry=registry, cache=cache)
         self._version = '2.0'
         self._mapping = MISPtoSTIX20Mapping()
+        self._tlp_marking_tags = {
+            marking.id: tag for tag, marking in self._mapping.tlp_markings.items()
+        }
 
     def _parse_event_data(self):
         if self._misp_event.get('Attribute'):
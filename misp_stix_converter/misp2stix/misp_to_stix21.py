@@ -4,6 +4,8 @@
 import re
 from .misp_to_stix2 import InvalidHashValueError, MISPtoSTIX2Parser
 from .stix21_mapping import MISPtoSTIX21Mapping
+from .stix2_cache import STIX2ExportCache
+from .stix2_registry import STIX2ObjectsRegistry
 from base64 import b64encode
 from collections import defaultdict
 from copy import deepcopy
@@ -84,10 +86,15 @@ class CustomGalaxyCluster:
 
 
 class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
-    def __init__(self, interoperability=False):
-        super().__init__(interoperability)
+    def __init__(self, interoperability=False,
+                 registry: Optional[STIX2ObjectsRegistry] = None,
+                 cache: Optional[STIX2ExportCache] = None):
+        super().__init__(interoperability, registry=registry, cache=cache)
         self._version = '2.1'
         self._mapping = MISPtoSTIX21Mapping()
+        self._tlp_marking_tags = {
+            marking.id: tag for tag, marking in self._mapping.tlp_markings.items()
+        }
 
     def _parse_event_data(self):
         if self._misp_event.get('EventReport'):
@@ -1509,7 +1516,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                 self._parse_meta_fields(cluster['meta'], 'location')
             )
             location = self._create_location(location_args)
-            self._append_SDO_without_refs(location)
+            self._append_shared_SDO(location)
             object_refs.append(location_id)
             ids[cluster['uuid']] = location_id
         self.populate_unique_ids(ids)
@@ -1550,7 +1557,7 @@ class MISPtoSTIX21Parser(MISPtoSTIX2Parser):
                 self._parse_meta_fields(cluster['meta'], 'location')
             )
             location = self._create_location(location_args)
-            self._append_SDO_without_refs(location)
+            self._append_shared_SDO(location)
             object_refs.append(location.id)
             ids[cluster['uuid']] = location.id
         self.populate_unique_ids(ids)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from cybox.core import Observable
+from stix.indicator import Indicator
+
+
+class _STIX1Dict:
+    """
+    Holds the dict representation of a STIX 1 object, as python-stix would
+    return it with `to_dict`, without building the python-stix object itself.
+    Instances can be added to the python-stix containers (packages, related
+    indicators and observables) but can only be exported as JSON.
+    """
+    def __init__(self, content: dict):
+        self._content = content
+
+    def to_dict(self) -> dict:
+        return self._content
+
+    def to_obj(self, *args, **kwargs):
+        raise TypeError(
+            f'{self.__class__.__name__} instances can only be exported as JSON.'
+        )
+
+
+class STIX1IndicatorDict(_STIX1Dict, Indicator):
+    pass
+
+
+class STIX1ObservableDict(_STIX1Dict, Observable):
+    pass
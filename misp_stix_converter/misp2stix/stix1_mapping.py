@@ -398,6 +398,46 @@ class MISPtoSTIX1Mapping:
             )
         )
         self.__attribute_types_mapping = Mapping(**_attribute_types_mapping)
+        # ATTRIBUTES CONVERTED DIRECTLY AS DICTS FOR THE JSON EXPORTS
+        _json_attribute_types_mapping = {
+            'domain': '_create_domain_properties',
+            'filename': '_create_file_properties',
+            'hostname': '_create_hostname_properties',
+            'mutex': '_create_mutex_properties'
+        }
+        _json_attribute_types_mapping.update(
+            dict.fromkeys(
+                [
+                    "md5",
+                    "sha1",
+                    "sha224",
+                    "sha256",
+                    "sha384",
+                    "sha512"
+                ],
+                '_create_hash_properties'
+            )
+        )
+        _json_attribute_types_mapping.update(
+            dict.fromkeys(
+                [
+                    "ip-src",
+                    "ip-dst"
+                ],
+                '_create_address_properties'
+            )
+        )
+        _json_attribute_types_mapping.update(
+            dict.fromkeys(
+                [
+                    "uri",
+                    "url",
+                    "link"
+                ],
+                '_create_uri_properties'
+            )
+        )
+        self.__json_attribute_types_mapping = Mapping(**_json_attribute_types_mapping)
         self.__email_attribute_mapping = Mapping(
             **{
                 'email-src': 'from_',
@@ -827,6 +867,10 @@ class MISPtoSTIX1Mapping:
     def hash_type_attributes(self) -> dict:
         return self.__hash_type_attributes
 
+    @property
+    def json_attribute_types_mapping(self) -> dict:
+        return self.__json_attribute_types_mapping
+
     @property
     def misp_indicator_type(self) -> dict:
         return self.__misp_indicator_type
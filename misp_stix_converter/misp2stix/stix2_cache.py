@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from ..misp_stix_json import json_dumps, json_load
+from datetime import datetime
+from pathlib import Path
+from stix2.parsing import parse as stix2_parser
+from typing import Optional, Union
+
+
+class STIX2ExportCache:
+    """
+    Cache of the STIX objects converted from MISP attributes and objects,
+    keyed by the MISP UUID and timestamp of the converted attribute or object.
+    Used by the STIX 2 export parsers to only convert again the attributes and
+    objects whose timestamp changed since the previous export.
+    The cache can be persisted in a local store to be reused between runs.
+    """
+    def __init__(self, store: Optional[Union[Path, str]] = None):
+        self.__store = None if store is None else Path(store)
+        self.__cache: dict = {}
+        if self.__store is not None and self.__store.exists():
+            self.__cache.update(json_load(self.__store))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__cache
+
+    def __len__(self) -> int:
+        return len(self.__cache)
+
+    @property
+    def store(self) -> Union[Path, None]:
+        return self.__store
+
+    @staticmethod
+    def cache_key(version: str, uuid: str) -> str:
+        return f'{version}:{uuid}'
+
+    def get(self, key: str, timestamp: str, identity_id: str) -> Union[dict, None]:
+        """
+        Returns the cached content for a MISP attribute or object, unless it
+        has been modified since it was cached.
+        """
+        cached = self.__cache.get(key)
+        if cached is None:
+            return None
+        if cached['timestamp'] != timestamp or cached['identity'] != identity_id:
+            return None
+        if not cached.get('loaded', False):
+            # Content loaded from the store is only parsed when it is reused
+            version = key.split(':')[0]
+            cached['objects'] = [
+                stix2_parser(
+                    stix_object, allow_custom=True, interoperability=True,
+                    version=version
+                ) for stix_object in cached['objects']
+            ]
+            cached['relationships'] = [
+                (source_id, datetime.fromisoformat(timestamp))
+                for source_id, timestamp in cached['relationships']
+            ]
+            cached['loaded'] = True
+        return cached
+
+    def reset(self):
+        self.__cache = {}
+
+    def save(self):
+        if self.__store is None:
+            return
+        content = {}
+        for key, cached in self.__cache.items():
+            content[key] = {
+                'timestamp': cached['timestamp'],
+                'identity': cached['identity'],
+                'objects': cached['objects'],
+                'object_refs': cached['object_refs'],
+                'relationships': [
+                    (source_id, timestamp.isoformat()) if isinstance(timestamp, datetime)
+                    else (source_id, timestamp)
+                    for source_id, timestamp in cached['relationships']
+                ]
+            }
+        with open(self.__store, 'wt', encoding='utf-8') as f:
+            f.write(json_dumps(content, compact=True))
+
+    def set(self, key: str, timestamp: str, identity_id: str, objects: list,
+            object_refs: list, relationships: list):
+        self.__cache[key] = {
+            'timestamp': timestamp,
+            'identity': identity_id,
+            'objects': objects,
+            'object_refs': object_refs,
+            'relationships': relationships,
+            'loaded': True
+        }
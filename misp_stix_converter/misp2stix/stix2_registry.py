@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from ..misp_stix_json import json_dumps, json_load
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional, Union
+
+
+class STIX2ObjectsRegistry:
+    """
+    Content-addressed registry of the STIX objects shared between MISP events,
+    like the organisation identities, the TLP marking definitions or the STIX
+    objects converted from galaxy clusters.
+    Objects are keyed by their STIX id and the hash of their content. The
+    parsers use the hashes to emit a shared object only once per output, or
+    again if its content changed, and the registry can be shared between
+    parsers and persisted in a local store to keep the hashes of the objects
+    converted in previous runs.
+    """
+    def __init__(self, store: Optional[Union[Path, str]] = None):
+        self.__store = None if store is None else Path(store)
+        self.__registry: dict = {}
+        if self.__store is not None and self.__store.exists():
+            self.__registry.update(json_load(self.__store))
+
+    def __contains__(self, stix_id: str) -> bool:
+        return stix_id in self.__registry
+
+    def __len__(self) -> int:
+        return len(self.__registry)
+
+    @property
+    def store(self) -> Union[Path, None]:
+        return self.__store
+
+    @staticmethod
+    def content_hash(stix_object) -> str:
+        content = json_dumps(stix_object, compact=True, sort_keys=True)
+        return sha256(content.encode()).hexdigest()
+
+    def get(self, stix_id: str) -> Union[str, None]:
+        return self.__registry.get(stix_id)
+
+    def register(self, stix_object) -> str:
+        """
+        Registers a STIX object and returns the hash of its content.
+        """
+        content_hash = self.content_hash(stix_object)
+        self.__registry[stix_object['id']] = content_hash
+        return content_hash
+
+    def reset(self):
+        self.__registry = {}
+
+    def save(self):
+        if self.__store is None:
+            return
+        with open(self.__store, 'wt', encoding='utf-8') as f:
+            f.write(json_dumps(self.__registry, compact=True))
@@ -1,31 +1,37 @@
 # -*- coding: utf-8 -*-
 #!/usr/bin/env python3
 
-import json
 import os
 import re
 import sys
-from .misp2stix.framing import stix1_attributes_framing, stix1_framing
+from .misp2stix.event_representation import MISPEventRepresentation
+from .misp2stix.framing import (
+    stix1_attributes_framing, stix1_framing, stix1_id_namespace,
+    stix1_namespaces, stix20_framing, stix21_framing, stix_xml_separator)
 from .misp2stix.misp_to_stix1 import MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser
 from .misp2stix.misp_to_stix20 import MISPtoSTIX20Parser
 from .misp2stix.misp_to_stix21 import MISPtoSTIX21Parser
-from .misp2stix.stix1_mapping import NS_DICT, SCHEMALOC_DICT
+from .misp2stix.stix1_mapping import SCHEMALOC_DICT
+from .misp2stix.stix2_cache import STIX2ExportCache
+from .misp2stix.stix2_registry import STIX2ObjectsRegistry
+from .misp_stix_json import json_dumps, json_load, load_stix2_bundle, misp_json_default
 from .stix2misp.external_stix1_to_misp import ExternalSTIX1toMISPParser
 from .stix2misp.external_stix2_to_misp import ExternalSTIX2toMISPParser
 from .stix2misp.internal_stix1_to_misp import InternalSTIX1toMISPParser
 from .stix2misp.internal_stix2_to_misp import InternalSTIX2toMISPParser
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from cybox.core.observable import Observables
-from mixbox import idgen
+from io import StringIO
+from mixbox.entities import NamespaceCollector
 from mixbox.namespaces import Namespace, NamespaceNotFoundError, register_namespace
 from pathlib import Path
 from stix.core import Campaigns, CoursesOfAction, Indicators, ThreatActors, STIXHeader, STIXPackage
 from stix.core.ttps import TTPs
-from stix2.base import STIXJSONEncoder
-from stix2.parsing import parse as stix2_parser
 from stix2.v20 import Bundle as Bundle_v20
 from stix2.v21 import Bundle as Bundle_v21
-from typing import List, Union
+from typing import Callable, Iterable, List, Optional, Union
 from uuid import uuid4
 
 _default_namespace = 'https://misp-project.org'
@@ -37,6 +43,9 @@ _STIX1_default_version = '1.1.1'
 _STIX1_valid_formats = ('json', 'xml')
 _STIX1_valid_versions = ('1.1.1', '1.2')
 _STIX2_event_types = ('grouping', 'report')
+_STIX2_valid_versions = ('2.0', '2.1')
+_stix1_worker_namespace: tuple
+_stix1_worker_parser: MISPtoSTIX1EventsParser
 
 
 ################################################################################
@@ -252,178 +261,251 @@ def misp_attribute_collection_to_stix1(
         version = _STIX1_default_version
     if org != _default_org:
         org = re.sub('[\W]+', '', org.replace(" ", "_"))
-    parser = MISPtoSTIX1AttributesParser(org, version)
-    if len(input_files) == 1:
-        parser.parse_json_content(input_files[0])
-        return _write_raw_stix(parser.stix_package, output_filename, namespace, org, return_format)
-    if in_memory:
-        package = _create_stix_package(org, version)
-        for filename in input_files:
-            parser.parse_json_content(filename)
+    with stix1_id_namespace(namespace, org):
+        parser = MISPtoSTIX1AttributesParser(org, version, return_format)
+        if len(input_files) == 1:
+            parser.parse_json_content(input_files[0])
+            return _write_raw_stix(parser.stix_package, output_filename, namespace, org, return_format)
+        if in_memory:
+            package = _create_stix_package(org, version)
+            for filename in input_files:
+                parser.parse_json_content(filename)
+                current = parser.stix_package
+                for campaign in current.campaigns:
+                    package.add_campaign(campaign)
+                for course_of_action in current.courses_of_action:
+                    package.add_course_of_action(course_of_action)
+                for exploit_target in current.exploit_targets:
+                    package.add_exploit_target(exploit_target)
+                for indicator in current.indicators:
+                    package.add_indicator(indicator)
+                for observable in current.observables:
+                    package.add_observable(observable)
+                for threat_actor in current.threat_actors:
+                    package.add_threat_actor(threat_actor)
+                if current.ttps is not None:
+                    for ttp in current.ttps:
+                        package.add_ttp(ttp)
+            return _write_raw_stix(package, output_filename, namespace, org, return_format)
+        current_path = Path(output_filename).parent.resolve()
+        handler = AttributeCollectionHandler(return_format)
+        header, separator, footer = stix1_attributes_framing(namespace, org, return_format, version)
+        for input_file in input_files:
+            parser.parse_json_content(input_file)
             current = parser.stix_package
-            for campaign in current.campaigns:
-                package.add_campaign(campaign)
-            for course_of_action in current.courses_of_action:
-                package.add_course_of_action(course_of_action)
-            for exploit_target in current.exploit_targets:
-                package.add_exploit_target(exploit_target)
-            for indicator in current.indicators:
-                package.add_indicator(indicator)
-            for observable in current.observables:
-                package.add_observable(observable)
-            for threat_actor in current.threat_actors:
-                package.add_threat_actor(threat_actor)
-            if current.ttps is not None:
-                for ttp in current.ttps:
-                    package.add_ttp(ttp)
-        return _write_raw_stix(package, output_filename, namespace, org, return_format)
-    current_path = Path(output_filename).parent.resolve()
-    handler = AttributeCollectionHandler(return_format)
-    header, separator, footer = stix1_attributes_framing(namespace, org, return_format, version)
-    for input_file in input_files:
-        parser.parse_json_content(input_file)
-        current = parser.stix_package
-        for feature in handler.features:
-            values = getattr(current, feature)
-            if values is not None and values:
-                content = globals()[f'_get_{feature}'](values, return_format)
-                if not content:
-                    continue
-                filename = getattr(handler, feature)
-                if filename is None:
-                    setattr(handler, feature, uuid4())
+            for feature in handler.features:
+                values = getattr(current, feature)
+                if values is not None and values:
+                    content = globals()[f'_get_{feature}'](values, return_format)
+                    if not content:
+                        continue
+                    if return_format == 'json':
+                        content = f'{content}, '
                     filename = getattr(handler, feature)
-                    with open(current_path / filename, 'wt', encoding='utf-8') as f:
-                        current_header = getattr(handler, f'{feature}_header')
-                        f.write(f'{current_header}{content}')
-                    continue
-                with open(current_path / filename, 'at', encoding='utf-8') as f:
-                    f.write(content)
-    with open(output_filename, 'wt', encoding='utf-8') as result:
-        result.write(header)
-        actual_features = handler.actual_features
-        for feature in actual_features:
-            filename = getattr(handler, feature)
-            if filename is not None:
-                with open(current_path / filename, 'rt', encoding='utf-8') as current:
-                    content = current.read() if return_format == 'xml' else current.read()[:-2]
-                current_footer = getattr(handler, f'{feature}_footer')
-                if return_format == 'json' and feature == actual_features[-1]:
-                    current_footer = current_footer[:-2]
-                result.write(f'{content}{current_footer}')
-                os.remove(current_path / filename)
-        result.write(footer)
-    return 1
+                    if filename is None:
+                        setattr(handler, feature, uuid4())
+                        filename = getattr(handler, feature)
+                        with open(current_path / filename, 'wt', encoding='utf-8') as f:
+                            current_header = getattr(handler, f'{feature}_header')
+                            f.write(f'{current_header}{content}')
+                        continue
+                    with open(current_path / filename, 'at', encoding='utf-8') as f:
+                        f.write(content)
+        with open(output_filename, 'wt', encoding='utf-8') as result:
+            result.write(header)
+            actual_features = handler.actual_features
+            for feature in actual_features:
+                filename = getattr(handler, feature)
+                if filename is not None:
+                    with open(current_path / filename, 'rt', encoding='utf-8') as current:
+                        content = current.read() if return_format == 'xml' else current.read()[:-2]
+                    current_footer = getattr(handler, f'{feature}_footer')
+                    if return_format == 'json' and feature == actual_features[-1]:
+                        current_footer = current_footer[:-2]
+                    result.write(f'{content}{current_footer}')
+                    os.remove(current_path / filename)
+            result.write(footer)
+        return 1
 
 
 def misp_event_collection_to_stix1(
     output_filename: _files_type, *input_files: List[_files_type],
     return_format: str=_STIX1_default_format, version: str=_STIX1_default_version,
-    in_memory: bool=False, namespace: str=_default_namespace, org: str=_default_org
+    in_memory: bool=False, namespace: str=_default_namespace, org: str=_default_org,
+    processes: int=1, max_size: Optional[int]=None, max_events: Optional[int]=None,
+    max_indicators: Optional[int]=None
 ):
+    """
+    Converts the MISP events of the input files into a STIX 1 package.
+    With `processes` > 1, the input files are converted in a pool of
+    processes. With one of the `max_size`, `max_events` or `max_indicators`
+    thresholds, the events are written in numbered packages listed in an
+    index file, and `in_memory` converts all the input files before the
+    first package is written.
+    """
     if return_format not in _STIX1_valid_formats:
         return_format = _STIX1_default_format
     if version not in _STIX1_valid_versions:
         version = _STIX1_default_version
     if org != _default_org:
         org = re.sub('[\W]+', '', org.replace(" ", "_"))
-    parser = MISPtoSTIX1EventsParser(org, version)
-    if in_memory or len(input_files) == 1:
-        package = _create_stix_package(org, version)
-        for filename in input_files:
-            parser.parse_json_content(filename)
-            if parser.stix_package.related_packages is not None:
-                for related_package in parser.stix_package.related_packages:
-                    package.add_related_package(related_package)
-            else:
-                package.add_related_package(parser.stix_package)
-        return _write_raw_stix(package, output_filename, namespace, org, return_format)
-    header, separator, footer = stix1_framing(namespace, org, return_format, version)
-    parser.parse_json_content(input_files[0])
-    content = _get_events(parser.stix_package, return_format)
-    with open(output_filename, 'wt', encoding='utf-8') as f:
-        f.write(f'{header}{content}')
-    for filename in input_files[1:]:
-        parser.parse_json_content(filename)
-        content = _get_events(parser.stix_package, return_format)
-        with open(output_filename, 'at', encoding='utf-8') as f:
-            f.write(f'{separator}{content}')
-    with open(output_filename, 'at', encoding='utf-8') as f:
-        f.write(footer)
-    return 1
+    with stix1_id_namespace(namespace, org):
+        parser = MISPtoSTIX1EventsParser(org, version, return_format)
+        thresholds = {
+            'size': max_size, 'events': max_events, 'indicators': max_indicators
+        }
+        if any(threshold is not None for threshold in thresholds.values()):
+            if processes > 1:
+                with _stix1_workers_pool(processes, namespace, org, version, return_format) as executor:
+                    contents = executor.map(
+                        _list_stix1_events, input_files,
+                        [return_format] * len(input_files)
+                    )
+                    events = chain.from_iterable(contents)
+                    return _write_stix1_collection_in_parts(
+                        list(events) if in_memory else events, output_filename,
+                        return_format, version, namespace, org, thresholds
+                    )
+            events = _convert_stix1_collection_events(parser, input_files, return_format)
+            return _write_stix1_collection_in_parts(
+                list(events) if in_memory else events, output_filename,
+                return_format, version, namespace, org, thresholds
+            )
+        if in_memory or len(input_files) == 1:
+            package = _create_stix_package(org, version)
+            for filename in input_files:
+                parser.parse_json_content(filename)
+                if parser.stix_package.related_packages is not None:
+                    for related_package in parser.stix_package.related_packages:
+                        package.add_related_package(related_package)
+                else:
+                    package.add_related_package(parser.stix_package)
+            return _write_raw_stix(package, output_filename, namespace, org, return_format)
+        header, separator, footer = stix1_framing(namespace, org, return_format, version)
+        if processes > 1:
+            return _write_stix1_collection_in_parallel(
+                output_filename, input_files, (header, separator, footer),
+                return_format, version, namespace, org, processes
+            )
+        with open(output_filename, 'wt', encoding='utf-8') as f:
+            f.write(header)
+            current_separator = ''
+            events = _convert_stix1_collection_events(parser, input_files, return_format)
+            for content, _ in events:
+                f.write(f'{current_separator}{content}')
+                current_separator = separator
+            f.write(footer)
+        return 1
 
 
-def misp_collection_to_stix2_0(output_filename: _files_type, *input_files: List[_files_type], in_memory: bool=False):
-    parser = MISPtoSTIX20Parser()
+def misp_collection_to_stix2_0(
+    output_filename: _files_type, *input_files: List[_files_type],
+    in_memory: bool=False, compact: bool=False,
+    registry: Optional[STIX2ObjectsRegistry]=None,
+    cache: Optional[STIX2ExportCache]=None
+):
+    parser = MISPtoSTIX20Parser(registry=registry, cache=cache)
     if in_memory or len(input_files) == 1:
         for filename in input_files:
             parser.parse_json_content(filename)
         objects = parser.stix_objects
         with open(output_filename, 'wt', encoding='utf-8') as f:
-            f.write(json.dumps(Bundle_v20(objects), cls=STIXJSONEncoder, indent=4))
+            f.write(json_dumps(Bundle_v20(objects), compact=compact))
+        _save_stores(parser)
         return 1
-    with open(output_filename, 'wt', encoding='utf-8') as f:
-        f.write(f'{json.dumps(Bundle_v20(), cls=STIXJSONEncoder, indent=4)[:-2]},\n    "objects": [\n')
-    for filename in input_files[:-1]:
-        parser.parse_json_content(filename)
-        with open(output_filename, 'at', encoding='utf-8') as f:
-            f.write(f'{json.dumps([parser.fetch_stix_objects], cls=STIXJSONEncoder, indent=4)[8:-8]},\n')
-    parser.parse_json_content(input_files[-1])
-    with open(output_filename, 'at', encoding='utf-8') as f:
-        footer = '    ]\n}'
-        f.write(f'{json.dumps([parser.stix_objects], cls=STIXJSONEncoder, indent=4)[8:-8]}\n{footer}')
-    return 1
+    return _write_stix2_collection(
+        parser, output_filename, input_files, stix20_framing(), compact
+    )
 
 
-def misp_collection_to_stix2_1(output_filename: _files_type, *input_files: List[_files_type], in_memory: bool=False):
-    parser = MISPtoSTIX21Parser()
+def misp_collection_to_stix2_1(
+    output_filename: _files_type, *input_files: List[_files_type],
+    in_memory: bool=False, compact: bool=False,
+    registry: Optional[STIX2ObjectsRegistry]=None,
+    cache: Optional[STIX2ExportCache]=None
+):
+    parser = MISPtoSTIX21Parser(registry=registry, cache=cache)
     if in_memory or len(input_files) == 1:
         for filename in input_files:
             parser.parse_json_content(filename)
         objects = parser.stix_objects
         with open(output_filename, 'wt', encoding='utf-8') as f:
-            f.write(json.dumps(Bundle_v21(objects), cls=STIXJSONEncoder, indent=4))
+            f.write(json_dumps(Bundle_v21(objects), compact=compact))
+        _save_stores(parser)
         return 1
-    with open(output_filename, 'wt', encoding='utf-8') as f:
-        f.write(f'{json.dumps(Bundle_v21(), cls=STIXJSONEncoder, indent=4)[:-2]},\n    "objects": [\n')
-    for filename in input_files[:-1]:
-        parser.parse_json_content(filename)
-        with open(output_filename, 'at', encoding='utf-8') as f:
-            f.write(f'{json.dumps([parser.fetch_stix_objects], cls=STIXJSONEncoder, indent=4)[8:-8]},\n')
-    parser.parse_json_content(input_files[-1])
-    with open(output_filename, 'at', encoding='utf-8') as f:
-        footer = '    ]\n}'
-        f.write(f'{json.dumps([parser.stix_objects], cls=STIXJSONEncoder, indent=4)[8:-8]}\n{footer}')
-    return 1
+    return _write_stix2_collection(
+        parser, output_filename, input_files, stix21_framing(), compact
+    )
 
 
 def misp_to_stix1(filename: _files_type, return_format: str, version: str, namespace=_default_namespace, org=_default_org):
     if org != _default_org:
         org = re.sub('[\W]+', '', org.replace(" ", "_"))
-    package = _create_stix_package(org, version)
-    parser = MISPtoSTIX1EventsParser(org, version)
+    with stix1_id_namespace(namespace, org):
+        package = _create_stix_package(org, version)
+        parser = MISPtoSTIX1EventsParser(org, version, return_format)
+        parser.parse_json_content(filename)
+        if parser.stix_package.related_packages is not None:
+            for related_package in parser.stix_package.related_packages:
+                package.add_related_package(related_package)
+        else:
+            package.add_related_package(parser.stix_package)
+        return _write_raw_stix(package, f'{filename}.out', namespace, org, return_format)
+
+
+def misp_to_stix2_0(filename: _files_type, compact: bool=False,
+                    registry: Optional[STIX2ObjectsRegistry]=None,
+                    cache: Optional[STIX2ExportCache]=None):
+    parser = MISPtoSTIX20Parser(registry=registry, cache=cache)
     parser.parse_json_content(filename)
-    if parser.stix_package.related_packages is not None:
-        for related_package in parser.stix_package.related_packages:
-            package.add_related_package(related_package)
-    else:
-        package.add_related_package(parser.stix_package)
-    return _write_raw_stix(package, f'{filename}.out', namespace, org, return_format)
+    with open(f'{filename}.out', 'wt', encoding='utf-8') as f:
+        f.write(json_dumps(parser.bundle, compact=compact))
+    _save_stores(parser)
+    return 1
 
 
-def misp_to_stix2_0(filename: _files_type):
-    parser = MISPtoSTIX20Parser()
+def misp_to_stix2_1(filename: _files_type, compact: bool=False,
+                    registry: Optional[STIX2ObjectsRegistry]=None,
+                    cache: Optional[STIX2ExportCache]=None):
+    parser = MISPtoSTIX21Parser(registry=registry, cache=cache)
     parser.parse_json_content(filename)
     with open(f'{filename}.out', 'wt', encoding='utf-8') as f:
-        f.write(json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4))
+        f.write(json_dumps(parser.bundle, compact=compact))
+    _save_stores(parser)
     return 1
 
 
-def misp_to_stix2_1(filename: _files_type):
-    parser = MISPtoSTIX21Parser()
-    parser.parse_json_content(filename)
-    with open(f'{filename}.out', 'wt', encoding='utf-8') as f:
-        f.write(json.dumps(parser.bundle, cls=STIXJSONEncoder, indent=4))
+def misp_to_stix(filename: _files_type, *versions: str,
+                 return_format: str=_STIX1_default_format,
+                 namespace: str=_default_namespace, org: str=_default_org,
+                 compact: bool=False):
+    json_content = json_load(filename)
+    if json_content.get('response'):
+        json_content = json_content['response']
+    if not isinstance(json_content, list):
+        json_content = [json_content]
+    # The MISP events are loaded and normalised once for all the STIX versions
+    misp_events = [MISPEventRepresentation(misp_event) for misp_event in json_content]
+    if return_format not in _STIX1_valid_formats:
+        return_format = _STIX1_default_format
+    if org != _default_org:
+        org = re.sub('[\W]+', '', org.replace(" ", "_"))
+    for version in versions or (*_STIX1_valid_versions, *_STIX2_valid_versions):
+        output_filename = f"{filename}.stix{version.replace('.', '')}.out"
+        if version in _STIX1_valid_versions:
+            with stix1_id_namespace(namespace, org):
+                package = _create_stix_package(org, version)
+                parser = MISPtoSTIX1EventsParser(org, version, return_format)
+                parser.parse_misp_events(misp_events)
+                for related_package in parser.stix_package.related_packages:
+                    package.add_related_package(related_package)
+                _write_raw_stix(package, output_filename, namespace, org, return_format)
+            continue
+        if version in _STIX2_valid_versions:
+            parser = MISPtoSTIX20Parser() if version == '2.0' else MISPtoSTIX21Parser()
+            parser.parse_misp_events(misp_events)
+            with open(output_filename, 'wt', encoding='utf-8') as f:
+                f.write(json_dumps(parser.bundle, compact=compact))
     return 1
 
 
@@ -431,7 +513,7 @@ def misp_to_stix2_1(filename: _files_type):
 #                         STIX to MISP MAIN FUNCTIONS.                         #
 ################################################################################
 
-def stix_1_to_misp(filename):
+def stix_1_to_misp(filename: _files_type, compact: bool=False):
     event = _load_stix_event(filename)
     if isinstance(event, str):
         return event
@@ -441,18 +523,24 @@ def stix_1_to_misp(filename):
     stix_parser.load_event()
     stix_parser.build_misp_event(event)
     with open(f'{filename}.out', 'wt', encoding='utf-8') as f:
-        f.write(stix_parser.misp_event.to_json(indent=4))
+        f.write(json_dumps(stix_parser.misp_event, compact=compact, default=misp_json_default))
     return 1
 
 
-def stix_2_to_misp(filename: _files_type):
-    with open(filename, 'rt', encoding='utf-8') as f:
-        bundle = stix2_parser(f.read(), allow_custom=True, interoperability=True)
-    stix_parser = InternalSTIX2toMISPParser() if _from_misp(bundle.objects) else ExternalSTIX2toMISPParser()
+def stix_2_to_misp(filename: _files_type, compact: bool=False,
+                   fast_mode: bool=False):
+    bundle = load_stix2_bundle(filename)
+    stix_objects = bundle.get('objects', [])
+    if not isinstance(stix_objects, list):
+        # the objects streamed from the file can only be iterated once
+        stix_objects = load_stix2_bundle(filename)['objects']
+    stix_parser = InternalSTIX2toMISPParser(fast_mode=fast_mode) if _from_misp(stix_objects) else ExternalSTIX2toMISPParser(fast_mode=fast_mode)
+    del stix_objects
     stix_parser.load_stix_bundle(bundle)
+    del bundle
     stix_parser.parse_stix_bundle()
     with open(f'{filename}.out', 'wt', encoding='utf-8') as f:
-        f.write(stix_parser.misp_event.to_json(indent=4))
+        f.write(json_dumps(stix_parser.misp_event, compact=compact, default=misp_json_default))
     return 1
 
 
@@ -460,6 +548,23 @@ def stix_2_to_misp(filename: _files_type):
 #                        STIX PACKAGE CREATION HELPERS.                        #
 ################################################################################
 
+def _convert_stix1_collection_events(
+        parser: MISPtoSTIX1EventsParser, input_files: tuple, return_format: str):
+    """
+    Converts the input files one after the other and yields the content of
+    every converted MISP event with its number of indicators.
+    """
+    for filename in input_files:
+        parser.parse_json_content(filename)
+        yield from _iterate_stix1_events(parser.stix_package, return_format)
+
+
+def _convert_stix1_events(filename: _files_type, return_format: str) -> str:
+    with stix1_id_namespace(*_stix1_worker_namespace):
+        _stix1_worker_parser.parse_json_content(filename)
+        return _get_events(_stix1_worker_parser.stix_package, return_format)
+
+
 def _create_stix_package(orgname: str, version: str) -> STIXPackage:
     package = STIXPackage()
     package.version = version
@@ -482,6 +587,18 @@ def _from_misp(stix_objects):
     return False
 
 
+def _initiate_stix1_worker(namespace: str, org: str, version: str, return_format: str):
+    global _stix1_worker_namespace, _stix1_worker_parser
+    _stix1_worker_namespace = (namespace, org)
+    _stix1_worker_parser = MISPtoSTIX1EventsParser(org, version, return_format)
+
+
+def _list_stix1_events(filename: _files_type, return_format: str) -> list:
+    with stix1_id_namespace(*_stix1_worker_namespace):
+        _stix1_worker_parser.parse_json_content(filename)
+        return list(_iterate_stix1_events(_stix1_worker_parser.stix_package, return_format))
+
+
 def _load_stix_event(filename, tries=0):
     try:
         return STIXPackage.from_xml(filename)
@@ -520,17 +637,25 @@ def _update_namespaces():
 #                        STIX CONTENT WRITING FUNCTIONS                        #
 ################################################################################
 
-def _format_xml_objects(objects: str, header_length=0, footer_length=0, to_replace='\n', replacement='\n    ') -> str:
-    if footer_length == 0:
-        return f'    {objects[header_length:].replace(to_replace, replacement)}\n'
-    return f'    {objects[header_length:-footer_length].replace(to_replace, replacement)}\n'
+def _format_json_objects(stix_objects) -> str:
+    """
+    Serialises a list of python-stix objects with a single call to the JSON
+    backend, instead of one standard library `json.dumps` call per object, and
+    strips the brackets so the result can be framed like the XML content.
+    """
+    return json_dumps([stix_object.to_dict() for stix_object in stix_objects], compact=True)[1:-1]
+
+
+def _format_xml_objects(stix_objects, level: int = 2) -> str:
+    content = StringIO()
+    _write_xml_objects(stix_objects, content.write, level=level)
+    return content.getvalue()
 
 
 def _get_campaigns(campaigns: Campaigns, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        campaigns = campaigns.to_xml(include_namespaces=True).decode()
-        return _format_xml_objects(campaigns, header_length=21, footer_length=23)
-    return ', '.join(campaign.to_json() for campaign in campaigns.campaign)
+        return _format_xml_objects(campaigns)
+    return _format_json_objects(campaigns.campaign)
 
 
 def _get_campaigns_footer(return_format: str = 'xml') -> str:
@@ -547,9 +672,8 @@ def _get_campaigns_header(return_format: str = 'xml') -> str:
 
 def _get_courses_of_action(courses_of_action: CoursesOfAction, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        courses_of_action = courses_of_action.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(courses_of_action, header_length=27, footer_length=29)
-    return ', '.join(course_of_action.to_json() for course_of_action in courses_of_action.course_of_action)
+        return _format_xml_objects(courses_of_action)
+    return _format_json_objects(courses_of_action.course_of_action)
 
 
 def _get_courses_of_action_footer(return_format: str = 'xml') -> str:
@@ -565,22 +689,16 @@ def _get_courses_of_action_header(return_format: str = 'xml') -> str:
 
 
 def _get_events(package: STIXPackage, return_format: str = 'xml') -> str:
-    if return_format == 'xml':
-        if package.related_packages is not None:
-            length = 96 + len(package.id_) + len(package.version)
-            return package.to_xml(include_namespaces=False).decode()[length:-82]
-        content = '\n            '.join(package.to_xml(include_namespaces=False).decode().split('\n'))
-        return f'            {content}\n'
-    if package.related_packages is not None:
-        return ', '.join(related_package.to_json() for related_package in package.related_packages)
-    return json.dumps({'package': package.to_dict()})
+    separator = stix_xml_separator() if return_format == 'xml' else ','
+    return separator.join(
+        content for content, _ in _iterate_stix1_events(package, return_format)
+    )
 
 
 def _get_indicators(indicators: Indicators, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        indicators = indicators.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(indicators, header_length=22, footer_length=24)
-    return f"{', '.join(indicator.to_json() for indicator in indicators.indicator)}"
+        return _format_xml_objects(indicators)
+    return _format_json_objects(indicators.indicator)
 
 
 def _get_indicators_footer(return_format: str = 'xml') -> str:
@@ -597,13 +715,8 @@ def _get_indicators_header(return_format: str = 'xml') -> str:
 
 def _get_observables(observables: Observables, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        header_length = 20
-        for field in ('cybox_major_version', 'cybox_minor_version', 'cybox_update_version'):
-            if hasattr(observables, field) and getattr(observables, field) is not None:
-                header_length += len(field) + len(getattr(observables, field)) + 4
-        observables = observables.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(observables, header_length=header_length, footer_length=22)
-    return f"{', '.join(observable.to_json() for observable in observables.observables)}"
+        return _format_xml_objects(observables)
+    return _format_json_objects(observables.observables)
 
 
 def _get_observables_footer(return_format: str = 'xml') -> str:
@@ -623,9 +736,8 @@ def _get_observables_header(return_format: str = 'xml') -> str:
 
 def _get_threat_actors(threat_actors: ThreatActors, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        threat_actors = threat_actors.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(threat_actors, header_length=24, footer_length=26)
-    return ', '.join(threat_actor.to_json() for threat_actor in threat_actors.threat_actor)
+        return _format_xml_objects(threat_actors)
+    return _format_json_objects(threat_actors.threat_actor)
 
 
 def _get_threat_actors_footer(return_format: str = 'xml') -> str:
@@ -642,9 +754,8 @@ def _get_threat_actors_header(return_format: str = 'xml') -> str:
 
 def _get_ttps(ttps: TTPs, return_format: str = 'xml') -> str:
     if return_format == 'xml':
-        ttps = ttps.to_xml(include_namespaces=False).decode()
-        return _format_xml_objects(ttps, header_length=16, footer_length=18)
-    return ', '.join(ttp.to_json() for ttp in ttps.ttp)
+        return _format_xml_objects(ttps)
+    return _format_json_objects(ttps.ttp)
 
 
 def _get_ttps_footer(return_format: str = 'xml') -> str:
@@ -659,35 +770,179 @@ def _get_ttps_header(return_format: str = 'xml') -> str:
     return '"ttps": {"ttps": ['
 
 
+def _save_stores(parser: Union[MISPtoSTIX20Parser, MISPtoSTIX21Parser]):
+    for store in (parser.registry, parser.cache):
+        if store is not None:
+            store.save()
+
+
+def _stix1_workers_pool(processes: int, namespace: str, org: str, version: str,
+                        return_format: str) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=processes, initializer=_initiate_stix1_worker,
+        initargs=(namespace, org, version, return_format)
+    )
+
+
 def _write_header(package: STIXPackage, filename: str, namespace: str, org: str, return_format: str) -> str:
-    namespaces = namespaces = {namespace: org}
-    namespaces.update(NS_DICT)
-    try:
-        idgen.set_id_namespace(Namespace(namespace, org))
-    except TypeError:
-        idgen.set_id_namespace(Namespace(namespace, org, "MISP"))
     if return_format == 'xml':
-        xml_package = package.to_xml(auto_namespace=False, ns_dict=namespaces, schemaloc_dict=SCHEMALOC_DICT).decode()
+        with stix1_id_namespace(namespace, org):
+            xml_package = package.to_xml(auto_namespace=False, ns_dict=stix1_namespaces(namespace, org), schemaloc_dict=SCHEMALOC_DICT).decode()
         with open(filename, 'wt', encoding='utf-8') as f:
             f.write(xml_package[:-21])
         return xml_package[-21:]
     json_package = package.to_json()
     with open(filename, 'wt', encoding='utf-8') as f:
-        f.wrtie(f'{json_package[:-1]}, "related_packages": {json.dumps({"related_packages": []})[:-2]}')
+        f.write(f'{json_package[:-1]}, "related_packages": {json_dumps({"related_packages": []}, compact=True)[:-2]}')
     return ']}}'
 
 
 def _write_raw_stix(package: STIXPackage, filename: _files_type, namespace: str, org: str, return_format: str) -> bool:
     if return_format == 'xml':
-        namespaces = namespaces = {namespace: org}
-        namespaces.update(NS_DICT)
-        try:
-            idgen.set_id_namespace(Namespace(namespace, org))
-        except TypeError:
-            idgen.set_id_namespace(Namespace(namespace, org, "MISP"))
         with open(filename, 'wb') as f:
-            f.write(package.to_xml(auto_namespace=False, ns_dict=namespaces, schemaloc_dict=SCHEMALOC_DICT))
+            f.write(package.to_xml(auto_namespace=False, ns_dict=stix1_namespaces(namespace, org), schemaloc_dict=SCHEMALOC_DICT))
     else:
         with open(filename, 'wt', encoding='utf-8') as f:
-            f.write(json.dumps(package.to_dict(), indent=4))
+            f.write(json_dumps(package.to_dict()))
     return 1
+
+
+def _write_stix1_collection_in_parallel(
+        output_filename: _files_type, input_files: tuple, framing: tuple,
+        return_format: str, version: str, namespace: str, org: str,
+        processes: int) -> int:
+    """
+    Converts the input files in a pool of processes, each of them returning
+    the STIX 1 content of a file, which is written in the input files order.
+    """
+    header, separator, footer = framing
+    with _stix1_workers_pool(processes, namespace, org, version, return_format) as executor:
+        contents = executor.map(
+            _convert_stix1_events, input_files,
+            [return_format] * len(input_files)
+        )
+        with open(output_filename, 'wt', encoding='utf-8') as f:
+            f.write(header)
+            for index, content in enumerate(contents):
+                if index:
+                    f.write(separator)
+                f.write(content)
+            f.write(footer)
+    return 1
+
+
+def _write_stix1_collection_in_parts(
+        events: Iterable, output_filename: _files_type, return_format: str,
+        version: str, namespace: str, org: str, thresholds: dict) -> int:
+    """
+    Writes the converted events in numbered STIX 1 packages, each of them
+    with its own framing. A new package is started as soon as the current one
+    reaches one of the size (in bytes), events or indicators thresholds.
+    The list of the packages is written in an index file.
+    """
+    output_path = Path(output_filename)
+    events = iter(events)
+    event = next(events, None)
+    parts = []
+    while True:
+        header, separator, footer = stix1_framing(namespace, org, return_format, version)
+        part = {
+            'filename': f'{output_path.stem}_{len(parts) + 1}{output_path.suffix}',
+            'events': 0, 'indicators': 0, 'size': len(header.encode())
+        }
+        parts.append(part)
+        with open(output_path.with_name(part['filename']), 'wt', encoding='utf-8') as f:
+            f.write(header)
+            current_separator = ''
+            while event is not None:
+                content, indicators = event
+                content = f'{current_separator}{content}'
+                f.write(content)
+                part['events'] += 1
+                part['indicators'] += indicators
+                part['size'] += len(content.encode())
+                event = next(events, None)
+                if any(part[feature] >= threshold for feature, threshold
+                       in thresholds.items() if threshold is not None):
+                    break
+                current_separator = separator
+            f.write(footer)
+            part['size'] += len(footer.encode())
+        if event is None:
+            break
+    with open(output_path.with_name(f'{output_path.stem}_index.json'), 'wt', encoding='utf-8') as f:
+        f.write(json_dumps({'parts': parts}))
+    return 1
+
+
+def _write_stix2_collection(parser: Union[MISPtoSTIX20Parser, MISPtoSTIX21Parser],
+                            output_filename: _files_type, input_files: tuple,
+                            framing: tuple, compact: bool) -> int:
+    header, separator, footer = framing
+    with open(output_filename, 'wt', encoding='utf-8') as f:
+        f.write(header)
+        current_separator = ''
+        for filename in input_files:
+            parser.parse_json_content(filename)
+            stix_objects = parser.fetch_stix_objects
+            if not stix_objects:
+                continue
+            # Dumping the list and stripping the brackets keeps a single call
+            # to the JSON backend for all the objects of the current file
+            f.write(f'{current_separator}{json_dumps(stix_objects, compact=compact)[1:-1]}')
+            current_separator = separator
+        f.write(footer)
+    _save_stores(parser)
+    return 1
+
+
+def _iterate_stix1_events(package: STIXPackage, return_format: str):
+    """
+    Yields the content of every STIX 1 package converted from a MISP event,
+    as contained in the Related_Package elements of the STIX 1 framing, with
+    its number of indicators.
+    """
+    if package.related_packages is None:
+        events = ((package, None),)
+    else:
+        events = (
+            (related_package.item, related_package)
+            for related_package in package.related_packages
+        )
+    for stix_package, related_package in events:
+        indicators = len(stix_package.indicators) if stix_package.indicators else 0
+        if return_format == 'xml':
+            content = StringIO()
+            if related_package is None:
+                _write_xml_object(stix_package, content.write, 3)
+            else:
+                _write_xml_object(stix_package, content.write, 3, name_='Package')
+            yield content.getvalue(), indicators
+            continue
+        if related_package is None:
+            yield json_dumps({'package': stix_package.to_dict()}, compact=True), indicators
+            continue
+        yield json_dumps(related_package.to_dict(), compact=True), indicators
+
+
+def _write_xml_object(stix_object, write: Callable, level: int, **kwargs):
+    ns_info = NamespaceCollector()
+    binding = stix_object.to_obj(ns_info=ns_info)
+    ns_info.finalize()
+    binding.export(
+        write, level, ns_info.binding_namespaces, pretty_print=True, **kwargs
+    )
+
+
+def _write_xml_objects(stix_objects, write: Callable, level: int = 2):
+    """
+    Writes the XML elements contained in a python-stix container (Indicators,
+    Observables, TTPs, etc.) directly from their bindings at the given nesting
+    level, without the container element itself.
+    """
+    ns_info = NamespaceCollector()
+    binding = stix_objects.to_obj(ns_info=ns_info)
+    ns_info.finalize()
+    binding.exportChildren(
+        write, level, ns_info.binding_namespaces, pretty_print=True
+    )
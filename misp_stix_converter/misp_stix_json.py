@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python3
+
+import json
+from datetime import date, datetime
+from pathlib import Path
+from pymisp.abstract import pymisp_json_default
+from stix2.base import _STIXBase
+from stix2.utils import format_datetime
+from typing import Callable, Union
+from uuid import UUID
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import simdjson
+    HAS_SIMDJSON = True
+except ImportError:
+    HAS_SIMDJSON = False
+
+if HAS_ORJSON:
+    JSON_BACKEND = 'orjson'
+elif HAS_SIMDJSON:
+    JSON_BACKEND = 'simdjson'
+else:
+    JSON_BACKEND = 'json'
+
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if HAS_ORJSON else 0
+
+
+def stix_json_default(obj):
+    """
+    Default serialisation hook for stix2 objects and datetimes, equivalent to
+    what `stix2.base.STIXJSONEncoder` does with the standard library encoder.
+    """
+    if isinstance(obj, (date, datetime)):
+        return format_datetime(obj)
+    if isinstance(obj, _STIXBase):
+        tmp_obj = dict(obj)
+        for prop_name in obj._defaulted_optional_properties:
+            del tmp_obj[prop_name]
+        return tmp_obj
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
+def misp_json_default(obj):
+    """
+    Default serialisation hook for pymisp objects (MISPEvent, MISPObject, ...).
+    """
+    value = pymisp_json_default(obj)
+    if value is None:
+        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+    return value
+
+
+def json_dumps(content, compact: bool = False, default: Callable = stix_json_default,
+               sort_keys: bool = False) -> str:
+    """
+    Serialises `content` to a JSON string.
+    Compact outputs are serialised with the fastest available backend, using
+    the same separators and non-ASCII handling with every backend. Indented
+    outputs are always serialised with the standard library, so they keep the
+    same 4 spaces indentation whatever the installed packages.
+    """
+    if compact and HAS_ORJSON:
+        options = _ORJSON_OPTIONS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(content, default=default, option=options).decode()
+        except orjson.JSONEncodeError:
+            # orjson is stricter than the standard library (integers bigger
+            # than 64 bits, non string keys, etc.), so we simply fall back
+            pass
+    if compact:
+        return json.dumps(
+            content, default=default, ensure_ascii=False,
+            separators=(',', ':'), sort_keys=sort_keys
+        )
+    return json.dumps(content, default=default, indent=4, sort_keys=sort_keys)
+
+
+def json_load(filename: Union[Path, str]):
+    with open(filename, 'rb') as f:
+        return json_loads(f.read())
+
+
+def load_stix2_bundle(filename: Union[Path, str]) -> dict:
+    """
+    Loads a STIX 2 bundle as a dictionary, its objects being left as raw
+    dictionaries.
+    When ijson is installed, only the top level fields of the bundle are read
+    beforehand and its objects are an iterator streaming them one by one from
+    the file, which is then never held in memory as a whole. They can only be
+    iterated once.
+    """
+    if HAS_IJSON:
+        with open(filename, 'rb') as f:
+            bundle = _load_stix2_bundle_header(f)
+        bundle['objects'] = _stream_stix2_objects(filename)
+        return bundle
+    return json_load(filename)
+
+
+def _load_stix2_bundle_header(f) -> dict:
+    """
+    Reads the top level fields of a STIX 2 bundle, stopping at its list of
+    objects unless the bundle id comes after them.
+    """
+    header = {}
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if prefix == '' and event == 'map_key' and value == 'objects':
+            if 'id' in header:
+                break
+        elif prefix in ('id', 'spec_version', 'type') and event == 'string':
+            header[prefix] = value
+    return header
+
+
+def _stream_stix2_objects(filename: Union[Path, str]):
+    with open(filename, 'rb') as f:
+        yield from ijson.items(f, 'objects.item', use_float=True)
+
+
+def json_loads(content: Union[bytes, str]):
+    if HAS_ORJSON:
+        return orjson.loads(content)
+    if HAS_SIMDJSON:
+        return simdjson.loads(content)
+    return json.loads(content)
@@ -115,8 +115,9 @@ _X509_TYPING = Union[
 
 
 class ExternalSTIX2toMISPParser(STIX2toMISPParser):
-    def __init__(self, galaxies_as_tags: Optional[bool] = False):
-        super().__init__(galaxies_as_tags)
+    def __init__(self, galaxies_as_tags: Optional[bool] = False,
+                 fast_mode: Optional[bool] = False):
+        super().__init__(galaxies_as_tags, fast_mode)
         self._mapping = ExternalSTIX2toMISPMapping()
 
     ################################################################################
@@ -2046,11 +2047,13 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
 
     def _add_misp_attribute(
             self, attribute: dict, confidence: Optional[int] = None) -> MISPAttribute:
-        misp_attribute = MISPAttribute()
-        misp_attribute.from_dict(**attribute)
+        misp_attribute = self._create_misp_attribute(attribute)
         if confidence is not None:
             misp_attribute.add_tag(self._parse_confidence_level(confidence))
-        return self.misp_event.add_attribute(**misp_attribute)
+        self.misp_event.attributes.append(misp_attribute)
+        self.misp_event.edited = True
+        self._event_attributes[str(misp_attribute.uuid)] = misp_attribute
+        return misp_attribute
 
     def _add_misp_object(self, misp_object: MISPObject,
                          confidence: Optional[int] = None) -> MISPObject:
@@ -2058,7 +2061,8 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
             confidence_tag = self._parse_confidence_level(confidence)
             for attribute in misp_object.attributes:
                 attribute.add_tag(confidence_tag)
-        return self.misp_event.add_object(misp_object)
+        self._append_misp_object(misp_object)
+        return misp_object
 
     def _create_attribute_dict(self, stix_object: _SDO_TYPING) -> dict:
         return super()._create_attribute_dict(stix_object)
@@ -2109,9 +2113,9 @@ class ExternalSTIX2toMISPParser(STIX2toMISPParser):
     def _check_existing_galaxy_name(self, stix_object_name: str) -> Union[list, None]:
         if stix_object_name in self.synonyms_mapping:
             return self.synonyms_mapping[stix_object_name]
-        for name, tag_names in self.synonyms_mapping.items():
-            if stix_object_name in name:
-                return tag_names
+        synonym = self.synonyms_index.search(stix_object_name)
+        if synonym is not None:
+            return self.synonyms_mapping[synonym]
 
     @staticmethod
     def _extract_types_from_observables(observed_data: _OBSERVED_DATA_TYPING) -> tuple:
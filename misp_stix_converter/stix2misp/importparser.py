@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 #!/usr/bin/env python3
 
-import json
-import subprocess
+import gc
+import hashlib
+import marshal
+import os
+import re
+import threading
 import traceback
 from .exceptions import UnavailableGalaxyResourcesError
+from ..misp_stix_json import json_dumps, json_load
 from collections import defaultdict
 from pathlib import Path
 from pymisp import MISPEvent, MISPObject
@@ -19,20 +24,168 @@ _INDICATOR_TYPING = Union[
 ]
 _ROOT_PATH = Path(__file__).parents[1].resolve()
 
+_GALAXY_CLUSTERS_PATH = _ROOT_PATH / 'data' / 'misp-galaxy' / 'clusters'
+_SYNONYMS_CACHE_PATH = _ROOT_PATH / 'data' / 'synonymsToTagNames.cache'
+_SYNONYMS_CACHE_VERSION = 1
+_SYNONYMS_PATH = _ROOT_PATH / 'data' / 'synonymsToTagNames.json'
+
 _RFC_VERSIONS = (1, 3, 4, 5)
+_RFC_4122_UUID = re.compile(
+    r'[0-9a-f]{8}-[0-9a-f]{4}-([0-9a-f])[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}\Z'
+)
 _UUIDv4 = UUID('76beed5f-7251-457e-8c2a-b45f7b589d3d')
 
 
+class SynonymsIndex:
+    """
+    Trigram inverted index of the synonyms to galaxy tag names mapping, used
+    to find the first synonym (in the mapping order) containing a given name
+    without scanning the whole mapping.
+    """
+    def __init__(self, synonyms_mapping: dict):
+        self.__synonyms = list(synonyms_mapping)
+        index = defaultdict(list)
+        for position, synonym in enumerate(self.__synonyms):
+            for trigram in set(synonym[i:i + 3] for i in range(len(synonym) - 2)):
+                index[trigram].append(position)
+        self.__index = dict(index)
+
+    def search(self, name: str) -> Optional[str]:
+        if len(name) < 3:
+            for synonym in self.__synonyms:
+                if name in synonym:
+                    return synonym
+            return None
+        candidates = None
+        for i in range(len(name) - 2):
+            positions = self.__index.get(name[i:i + 3])
+            if positions is None:
+                return None
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+        for position in candidates:
+            if name in self.__synonyms[position]:
+                return self.__synonyms[position]
+
+
+################################################################################
+#           SYNONYMS TO GALAXY TAG NAMES MAPPING HANDLING FUNCTIONS.           #
+################################################################################
+
+# The synonyms mapping and its index are loaded once and shared by all the
+# parsers of the process
+_synonyms: dict = {}
+_synonyms_lock = threading.Lock()
+
+
+def _generate_synonyms_mapping(clusters_path: Path) -> dict:
+    synonyms_mapping = defaultdict(list)
+    for filename in clusters_path.glob('*.json'):
+        cluster_definition = json_load(filename)
+        cluster_type = f"misp-galaxy:{cluster_definition['type']}"
+        for cluster in cluster_definition['values']:
+            value = cluster['value']
+            tag_name = f'{cluster_type}="{value}"'
+            synonyms_mapping[value].append(tag_name)
+            if cluster.get('meta') is not None and cluster['meta'].get('synonyms') is not None:
+                for synonym in cluster['meta']['synonyms']:
+                    synonyms_mapping[synonym].append(tag_name)
+    return dict(synonyms_mapping)
+
+
+def _get_galaxy_clusters_fingerprint(clusters_path: Path) -> Optional[str]:
+    """
+    Fingerprint of the MISP galaxy clusters, based on the names, sizes and
+    modification times of the cluster files.
+    """
+    if not clusters_path.exists():
+        return None
+    fingerprint = hashlib.sha256()
+    for filename in sorted(clusters_path.glob('*.json')):
+        stat = filename.stat()
+        fingerprint.update(
+            f'{filename.name}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode()
+        )
+    return fingerprint.hexdigest()
+
+
+def _load_synonyms_mapping(clusters_path: Path = _GALAXY_CLUSTERS_PATH,
+                           cache_path: Path = _SYNONYMS_CACHE_PATH,
+                           synonyms_path: Path = _SYNONYMS_PATH) -> dict:
+    """
+    Loads the synonyms to galaxy tag names mapping from its binary cache,
+    which is generated again from the MISP galaxy clusters when they changed.
+    Without the clusters, the cache (or the JSON mapping written by previous
+    versions) is used as is.
+    """
+    fingerprint = _get_galaxy_clusters_fingerprint(clusters_path)
+    synonyms_mapping = _read_synonyms_cache(cache_path, fingerprint)
+    if synonyms_mapping is not None:
+        return synonyms_mapping
+    if fingerprint is None:
+        if synonyms_path.exists():
+            return json_load(synonyms_path)
+        raise UnavailableGalaxyResourcesError(clusters_path)
+    synonyms_mapping = _generate_synonyms_mapping(clusters_path)
+    _write_synonyms_cache(cache_path, fingerprint, synonyms_mapping)
+    with open(synonyms_path, 'wt', encoding='utf-8') as f:
+        f.write(json_dumps(synonyms_mapping, compact=True))
+    return synonyms_mapping
+
+
+def _read_synonyms_cache(cache_path: Path, fingerprint: Optional[str]) -> Optional[dict]:
+    if not cache_path.exists():
+        return None
+    content = cache_path.read_bytes()
+    # the collector would otherwise run multiple times while the tens of
+    # thousands of lists of the mapping are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        version, cache_fingerprint, synonyms_mapping = marshal.loads(content)
+    except (EOFError, TypeError, ValueError):
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if version != _SYNONYMS_CACHE_VERSION:
+        return None
+    if fingerprint is not None and cache_fingerprint != fingerprint:
+        return None
+    return synonyms_mapping
+
+
+def _write_synonyms_cache(cache_path: Path, fingerprint: str, synonyms_mapping: dict):
+    content = marshal.dumps(
+        (_SYNONYMS_CACHE_VERSION, fingerprint, synonyms_mapping)
+    )
+    tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}')
+    tmp_path.write_bytes(content)
+    tmp_path.replace(cache_path)
+
+
+def _get_uuid_version(value: str) -> Optional[int]:
+    """
+    Reads the version nibble of a canonical RFC 4122 UUID string directly,
+    and only falls back to `uuid.UUID` for the other representations.
+    """
+    canonical_uuid = _RFC_4122_UUID.match(value)
+    if canonical_uuid is not None:
+        return int(canonical_uuid.group(1), 16)
+    return UUID(value).version
+
+
 class STIXtoMISPParser:
     def __init__(self, galaxies_as_tags: bool):
         self._identifier: str
         self._clusters: dict = {}
         if galaxies_as_tags:
-            self.__synonyms_path = _ROOT_PATH / 'data' / 'synonymsToTagNames.json'
+            self.__synonyms_path = _SYNONYMS_PATH
         else:
             self._galaxies: dict = {}
         self.__galaxies_as_tags = galaxies_as_tags
         self.__replacement_uuids: dict = {}
+        self.__sanitised_uuids: dict = {}
         self.__errors: defaultdict = defaultdict(set)
         self.__warnings: defaultdict = defaultdict(set)
 
@@ -55,10 +208,23 @@ class STIXtoMISPParser:
     @property
     def synonyms_mapping(self) -> dict:
         try:
-            return self.__synonyms_mapping
-        except AttributeError:
-            self.__get_synonyms_mapping()
-            return self.__synonyms_mapping
+            return _synonyms['mapping']
+        except KeyError:
+            with _synonyms_lock:
+                if 'mapping' not in _synonyms:
+                    _synonyms['mapping'] = _load_synonyms_mapping()
+            return _synonyms['mapping']
+
+    @property
+    def synonyms_index(self) -> SynonymsIndex:
+        try:
+            return _synonyms['index']
+        except KeyError:
+            synonyms_mapping = self.synonyms_mapping
+            with _synonyms_lock:
+                if 'index' not in _synonyms:
+                    _synonyms['index'] = SynonymsIndex(synonyms_mapping)
+            return _synonyms['index']
 
     @property
     def synonyms_path(self) -> Path:
@@ -202,77 +368,12 @@ class STIXtoMISPParser:
         message = f"Error with the Vulnerability object with id {vulnerability_id}: {tb}"
         self.__errors[self._identifier].add(message)
 
-    ################################################################################
-    #           SYNONYMS TO GALAXY TAG NAMES MAPPING HANDLING FUNCTIONS.           #
-    ################################################################################
-
-    def __galaxies_up_to_date(self) -> bool:
-        fingerprint_path = _ROOT_PATH / 'data' / 'synonymsToTagNames.fingerprint'
-        if not fingerprint_path.exists():
-            return False
-        latest_fingerprint = self.__get_misp_galaxy_fingerprint()
-        if latest_fingerprint is None:
-            return False
-        with open(fingerprint_path, 'rt', encoding='utf-8') as f:
-            fingerprint = f.read()
-        return fingerprint == latest_fingerprint
-
-    def __generate_synonyms_mapping(self):
-        data_path = _ROOT_PATH / 'data' / 'misp-galaxy' / 'clusters'
-        if not data_path.exists():
-            raise UnavailableGalaxyResourcesError(data_path)
-        synonyms_mapping = defaultdict(list)
-        for filename in data_path.glob('*.json'):
-            with open(filename, 'rt', encoding='utf-8') as f:
-                cluster_definition = json.loads(f.read())
-            cluster_type = f"misp-galaxy:{cluster_definition['type']}"
-            for cluster in cluster_definition['values']:
-                value = cluster['value']
-                tag_name = f'{cluster_type}="{value}"'
-                synonyms_mapping[value].append(tag_name)
-                if cluster.get('meta') is not None and cluster['meta'].get('synonyms') is not None:
-                    for synonym in cluster['meta']['synonyms']:
-                        synonyms_mapping[synonym].append(tag_name)
-        with open(self.synonyms_path, 'wt', encoding='utf-8') as f:
-            f.write(json.dumps(synonyms_mapping))
-        latest_fingerprint = self.__get_misp_galaxy_fingerprint()
-        if latest_fingerprint is not None:
-            fingerprint_path = _ROOT_PATH / 'data' / 'synonymsToTagNames.fingerprint'
-            with open(fingerprint_path, 'wt', encoding='utf-8') as f:
-                f.write(latest_fingerprint)
-
-    @staticmethod
-    def __get_misp_galaxy_fingerprint():
-        galaxy_path = _ROOT_PATH / 'data' / 'misp-galaxy'
-        status = subprocess.Popen(
-            [
-                'git',
-                'submodule',
-                'status',
-                galaxy_path
-            ],
-            stdout=subprocess.PIPE
-        )
-        stdout = status.communicate()[0]
-        try:
-            return stdout.decode().split(' ')[1]
-        except IndexError:
-            return None
-
-    def __get_synonyms_mapping(self):
-        if not self.synonyms_path.exists() or not self.__galaxies_up_to_date():
-            self.__generate_synonyms_mapping()
-        with open(self.synonyms_path, 'rt', encoding='utf-8') as f:
-            self.__synonyms_mapping = json.loads(f.read())
-
     ################################################################################
     #                      UUID SANITATION HANDLING FUNCTIONS                      #
     ################################################################################
 
     def _check_uuid(self, object_id: str):
-        object_uuid = self._extract_uuid(object_id)
-        if UUID(object_uuid).version not in _RFC_VERSIONS and object_uuid not in self.replacement_uuids:
-            self.replacement_uuids[object_uuid] = self._create_v5_uuid(object_uuid)
+        self._sanitise_uuid(object_id)
 
     @staticmethod
     def _create_v5_uuid(value: str) -> UUID:
@@ -280,20 +381,14 @@ class STIXtoMISPParser:
 
     def _sanitise_attribute_uuid(self, object_id: str, comment: Optional[str] = None) -> dict:
         attribute_uuid = self._extract_uuid(object_id)
+        sanitised_uuid = self._sanitise_uuid(object_id)
+        if sanitised_uuid == attribute_uuid:
+            return {'uuid': attribute_uuid}
         attribute_comment = f'Original UUID was: {attribute_uuid}'
-        if attribute_uuid in self.replacement_uuids:
-            return {
-                'uuid': self.replacement_uuids[attribute_uuid],
-                'comment': f'{comment} - {attribute_comment}' if comment else attribute_comment
-            }
-        if UUID(attribute_uuid).version not in _RFC_VERSIONS:
-            sanitised_uuid = self._create_v5_uuid(attribute_uuid)
-            self.replacement_uuids[attribute_uuid] = sanitised_uuid
-            return {
-                'uuid': sanitised_uuid,
-                'comment': f'{comment} - {attribute_comment}' if comment else attribute_comment
-            }
-        return {'uuid': attribute_uuid}
+        return {
+            'uuid': sanitised_uuid,
+            'comment': f'{comment} - {attribute_comment}' if comment else attribute_comment
+        }
 
     def _sanitise_object_uuid(self, misp_object: Union[MISPEvent, MISPObject],
                               object_id: str):
@@ -305,11 +400,15 @@ class STIXtoMISPParser:
         misp_object.uuid = object_uuid
 
     def _sanitise_uuid(self, object_id: str) -> str:
-        object_uuid = self._extract_uuid(object_id)
-        if UUID(object_uuid).version not in _RFC_VERSIONS:
-            if object_uuid in self.replacement_uuids:
-                return self.replacement_uuids[object_uuid]
-            sanitised_uuid = self._create_v5_uuid(object_uuid)
-            self.replacement_uuids[object_uuid] = sanitised_uuid
-            return sanitised_uuid
-        return object_uuid
\ No newline at end of file
+        try:
+            return self.__sanitised_uuids[object_id]
+        except KeyError:
+            object_uuid = self._extract_uuid(object_id)
+            if object_uuid not in self.replacement_uuids:
+                if _get_uuid_version(object_uuid) in _RFC_VERSIONS:
+                    self.__sanitised_uuids[object_id] = object_uuid
+                    return object_uuid
+                self.replacement_uuids[object_uuid] = self._create_v5_uuid(object_uuid)
+            sanitised_uuid = self.replacement_uuids[object_uuid]
+            self.__sanitised_uuids[object_id] = sanitised_uuid
+            return sanitised_uuid
\ No newline at end of file
@@ -11,10 +11,11 @@ from .stix2_to_misp import (
     STIX2toMISPParser, _ATTACK_PATTERN_TYPING, _COURSE_OF_ACTION_TYPING,
     _GALAXY_OBJECTS_TYPING, _IDENTITY_TYPING, _OBSERVED_DATA_TYPING, _SDO_TYPING,
     _VULNERABILITY_TYPING)
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from copy import deepcopy
 from datetime import datetime
-from pymisp import MISPAttribute, MISPGalaxy, MISPGalaxyCluster, MISPObject, MISPSighting
+from functools import lru_cache
+from pymisp import MISPGalaxy, MISPGalaxyCluster, MISPObject, MISPSighting
 from stix2.v20.common import ExternalReference as ExternalReference_v20
 from stix2.v20.observables import (
     Process as Process_v20, WindowsPEBinaryExt as WindowsExtension_v20)
@@ -27,6 +28,7 @@ from stix2.v21.observables import (
 from stix2.v21.sdo import (
     CustomObject as CustomObject_v21, Indicator as Indicator_v21, Location,
     Malware as Malware_v21, ObservedData as ObservedData_v21, Tool as Tool_v21)
+from types import MappingProxyType
 from typing import Optional, Union
 
 _attribute_additional_fields = (
@@ -53,10 +55,41 @@ _PROCESS_TYPING = Union[
     Process_v21
 ]
 
+_LABELS_CACHE_SIZE = 4096
+
+_MISPLabels = namedtuple('MISPLabels', ['features', 'attribute', 'tags'])
+
+
+@lru_cache(maxsize=_LABELS_CACHE_SIZE)
+def _parse_misp_labels(labels: tuple) -> _MISPLabels:
+    """
+    Splits once the labels of the STIX objects generated by MISP, which
+    reuse a limited set of label combinations: the full `misp:*` keys select
+    the parsing function, while the attribute fields (type, category, to_ids)
+    and the tags are ready to be used to create the MISP attributes.
+    The results are cached and shared, so they are returned as read-only
+    mappings and tuples.
+    """
+    features = {}
+    tags = []
+    for label in labels:
+        if label.startswith('misp:'):
+            feature, value = label.split('=')
+            features[feature] = value.strip('"')
+        else:
+            tags.append(label)
+    attribute = {
+        feature.split(':')[-1]: value for feature, value in features.items()
+    }
+    return _MISPLabels(
+        MappingProxyType(features), MappingProxyType(attribute), tuple(tags)
+    )
+
 
 class InternalSTIX2toMISPParser(STIX2toMISPParser):
-    def __init__(self, galaxies_as_tags: Optional[bool] = False):
-        super().__init__(galaxies_as_tags)
+    def __init__(self, galaxies_as_tags: Optional[bool] = False,
+                 fast_mode: Optional[bool] = False):
+        super().__init__(galaxies_as_tags, fast_mode)
         self._mapping = InternalSTIX2toMISPMapping()
 
     ################################################################################
@@ -64,25 +97,13 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
     ################################################################################
 
     def _load_custom_attribute(self, custom_attribute: _CUSTOM_TYPING):
-        self._check_uuid(custom_attribute.id)
-        try:
-            self._custom_attribute[custom_attribute.id] = custom_attribute
-        except AttributeError:
-            self._custom_attribute = {custom_attribute.id: custom_attribute}
+        self._load_stix_object('_custom_attribute', custom_attribute)
 
     def _load_custom_galaxy_cluster(self, custom_galaxy: _CUSTOM_TYPING):
-        self._check_uuid(custom_galaxy.id)
-        try:
-            self._custom_galaxy_cluster[custom_galaxy.id] = custom_galaxy
-        except AttributeError:
-            self._custom_galaxy_cluster = {custom_galaxy.id: custom_galaxy}
+        self._load_stix_object('_custom_galaxy_cluster', custom_galaxy)
 
     def _load_custom_object(self, custom_object: _CUSTOM_TYPING):
-        self._check_uuid(custom_object.id)
-        try:
-            self._custom_object[custom_object.id] = custom_object
-        except AttributeError:
-            self._custom_object = {custom_object.id: custom_object}
+        self._load_stix_object('_custom_object', custom_object)
 
     def _load_custom_opinion(self, custom_object: CustomObject_v20):
         sighting = MISPSighting()
@@ -98,7 +119,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
                 'name': custom_object.x_misp_author
             }
         sighting.from_dict(**sighting_args)
-        object_ref = self._sanitise_uuid(custom_object.object_ref)
+        object_ref = str(self._sanitise_uuid(custom_object.object_ref))
         try:
             self._sighting[object_ref].append(sighting)
         except AttributeError:
@@ -110,7 +131,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
     ################################################################################
 
     def _handle_indicator_object_mapping(self, labels: list, object_id: str) -> str:
-        parsed_labels = {key: value.strip('"') for key, value in (label.split('=') for label in labels)}
+        parsed_labels = _parse_misp_labels(tuple(labels)).features
         if 'misp:name' in parsed_labels:
             return self._mapping.objects_mapping[parsed_labels['misp:name']]
         elif 'misp:type' in parsed_labels:
@@ -118,7 +139,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         raise UndefinedIndicatorError(object_id)
 
     def _handle_object_mapping(self, labels: list, object_id: str) -> str:
-        parsed_labels = {key: value.strip('"') for key, value in (label.split('=') for label in labels)}
+        parsed_labels = _parse_misp_labels(tuple(labels)).features
         if 'misp:galaxy-type' in parsed_labels:
             return '_parse_galaxy'
         if 'misp:name' in parsed_labels:
@@ -128,7 +149,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         raise UndefinedSTIXObjectError(object_id)
 
     def _handle_observable_object_mapping(self, labels: list, object_id: str) -> str:
-        parsed_labels = {key: value.strip('"') for key, value in (label.split('=') for label in labels)}
+        parsed_labels = _parse_misp_labels(tuple(labels)).features
         if 'misp:name' in parsed_labels:
             return self._mapping.objects_mapping[parsed_labels['misp:name']]
         elif 'misp:type' in parsed_labels:
@@ -434,7 +455,7 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         if stix_object.id in self._clusters:
             self._clusters[stix_object.id]['used'][self.misp_event.uuid] = False
         elif self.galaxies_as_tags:
-                galaxy_type = stix_object.labels[1].split('=')[1].strip('"')
+                galaxy_type = self._extract_galaxy_type(stix_object.labels)
                 self._clusters[stix_object.id] = {
                     'tag_names': [
                         f'misp-galaxy:{galaxy_type}="{stix_object.name}"'
@@ -2434,12 +2455,13 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
     ################################################################################
 
     def _add_misp_attribute(self, attribute: dict):
-        misp_attribute = MISPAttribute()
-        misp_attribute.from_dict(**attribute)
-        self.misp_event.add_attribute(**misp_attribute)
+        misp_attribute = self._create_misp_attribute(attribute)
+        self.misp_event.attributes.append(misp_attribute)
+        self.misp_event.edited = True
+        self._event_attributes[str(misp_attribute.uuid)] = misp_attribute
 
     def _add_misp_object(self, misp_object: MISPObject):
-        self.misp_event.add_object(misp_object)
+        self._append_misp_object(misp_object)
 
     def _create_attribute_dict(self, stix_object: _SDO_TYPING) -> dict:
         attribute = self._attribute_from_labels(stix_object.labels)
@@ -2473,16 +2495,10 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
 
     @staticmethod
     def _attribute_from_labels(labels: list) -> dict:
-        attribute = {}
-        tags = []
-        for label in labels:
-            if label.startswith('misp:'):
-                feature, value = label.split('=')
-                attribute[feature.split(':')[-1]] = value.strip('"')
-            else:
-                tags.append({'name': label})
-        if tags:
-            attribute['Tag'] = tags
+        misp_labels = _parse_misp_labels(tuple(labels))
+        attribute = dict(misp_labels.attribute)
+        if misp_labels.tags:
+            attribute['Tag'] = [{'name': tag} for tag in misp_labels.tags]
         return attribute
 
     @staticmethod
@@ -2495,13 +2511,13 @@ class InternalSTIX2toMISPParser(STIX2toMISPParser):
         return identifier.split(':')[1], value.strip("'")
 
     @staticmethod
-    def _extract_galaxy_labels(labels: list) -> dict:
-        for label in labels[:2]:
-            if 'galaxy-type' in label:
-                galaxy_type = label.split('=')[1].strip('"')
-            elif 'galaxy-name' in label:
-                galaxy_name = label.split('=')[1].strip('"')
-        return galaxy_type, galaxy_name
+    def _extract_galaxy_labels(labels: list) -> tuple:
+        parsed_labels = _parse_misp_labels(tuple(labels)).features
+        return parsed_labels['misp:galaxy-type'], parsed_labels['misp:galaxy-name']
+
+    @staticmethod
+    def _extract_galaxy_type(labels: list) -> str:
+        return _parse_misp_labels(tuple(labels)).features['misp:galaxy-type']
 
     @staticmethod
     def _fetch_main_process(observables: dict) -> _PROCESS_TYPING:
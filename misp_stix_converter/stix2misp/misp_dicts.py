@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime
+from dateutil.parser import parse as parse_date
+from functools import lru_cache
+from pymisp import (
+    AbstractMISP, MISPAttribute, MISPObjectAttribute, MISPSighting, MISPTag)
+from pymisp.exceptions import NewAttributeError, PyMISPError
+from pymisp.mispevent import make_bool
+from typing import Optional, Union
+from uuid import UUID, uuid4
+
+_DESCRIBE_TYPES = MISPAttribute().describe_types
+_CATEGORIES = frozenset(_DESCRIBE_TYPES['categories'])
+_CATEGORY_TYPE_MAPPINGS = {
+    category: frozenset(types) for category, types
+    in _DESCRIBE_TYPES['category_type_mappings'].items()
+}
+_SANE_DEFAULTS = _DESCRIBE_TYPES['sane_defaults']
+
+_DATETIME_FIELDS = ('first_seen', 'last_seen')
+_INTEGER_FIELDS = ('distribution', 'event_id', 'id', 'sharing_group_id')
+_PYMISP_FIELDS = ('data', 'ShadowAttribute', 'SharingGroup')
+
+_template_defaults: dict = {}
+
+
+def _get_template_defaults(template: dict) -> dict:
+    """
+    Default type, category, to_ids and disable_correlation values of the
+    attributes of a MISP object template, computed once per template the
+    same way as `pymisp.MISPObjectAttribute` does.
+    """
+    try:
+        return _template_defaults[template['uuid']]
+    except KeyError:
+        defaults = {}
+        for object_relation, definition in template['attributes'].items():
+            relation_defaults = {
+                'type': definition.get('misp-attribute'),
+                'disable_correlation': definition.get('disable_correlation'),
+                'to_ids': definition.get('to_ids')
+            }
+            if 'categories' in definition:
+                relation_defaults['category'] = definition['categories'][0]
+            defaults[object_relation] = relation_defaults
+        _template_defaults[template['uuid']] = defaults
+        return defaults
+
+
+@lru_cache(maxsize=None)
+def _check_type_and_category(attribute_type: str, category: Optional[str]) -> str:
+    if attribute_type not in _SANE_DEFAULTS:
+        raise NewAttributeError(
+            f"{attribute_type} is invalid, type has to be in "
+            f"{', '.join(_DESCRIBE_TYPES['types'])}"
+        )
+    if category is None:
+        category = _SANE_DEFAULTS[attribute_type]['default_category']
+    if category not in _CATEGORIES:
+        raise NewAttributeError(
+            f"{category} is invalid, category has to be in "
+            f"{', '.join(_DESCRIBE_TYPES['categories'])}"
+        )
+    return category
+
+
+def _make_datetime(value: Union[date, datetime, float, int, str]) -> datetime:
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    elif isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = parse_date(value)
+    elif not isinstance(value, datetime):
+        if not isinstance(value, date):
+            raise PyMISPError(f'Invalid format for {value}: {type(value)}.')
+        value = datetime.combine(value, datetime.min.time())
+    if not value.tzinfo:
+        value = value.astimezone()
+    return value
+
+
+def _json_value(field: str, value):
+    """
+    Converts a field value to what its pymisp counterpart would produce
+    once serialised.
+    """
+    if field == 'timestamp':
+        if isinstance(value, (int, float, str)):
+            return str(int(value))
+        return str(int(value.timestamp()))
+    if field in _DATETIME_FIELDS:
+        return _make_datetime(value).isoformat()
+    if field in _INTEGER_FIELDS:
+        return str(int(value))
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (date, UUID)):
+        return value.isoformat() if isinstance(value, date) else str(value)
+    return value
+
+
+def _json_tag(tag: Union[dict, MISPTag, str]) -> dict:
+    if isinstance(tag, str):
+        return {'name': tag.strip()}
+    if isinstance(tag, MISPTag):
+        return tag.to_dict()
+    if isinstance(tag, dict):
+        return {
+            key: _json_value(key, value) for key, value in tag.items()
+            if value is not None and value != []
+        }
+    raise PyMISPError(
+        'The tag is in an invalid format (can be either string, MISPTag, '
+        f'or an expanded dict): {tag}'
+    )
+
+
+class _MISPFeatureDict(dict):
+    """
+    MISP feature held as the plain dictionary pymisp would serialise it to,
+    with attribute access to its fields.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name: str, value):
+        if value is None:
+            self.pop(name, None)
+        else:
+            self[name] = _json_value(name, value)
+
+    def update(self, *args, **kwargs):
+        for field, value in dict(*args, **kwargs).items():
+            setattr(self, field, value)
+
+
+class MISPAttributeDict(_MISPFeatureDict):
+    __slots__ = ()
+
+    def __init__(self, attribute: dict):
+        super().__init__()
+        attribute = dict(attribute)
+        if attribute.get('type') and attribute.get('category'):
+            if attribute['type'] not in _CATEGORY_TYPE_MAPPINGS[attribute['category']]:
+                attribute.pop('category')
+        attribute_type = attribute.pop('type', None)
+        if attribute_type is None:
+            raise NewAttributeError('The type of the attribute is required.')
+        category = _check_type_and_category(
+            attribute_type, attribute.pop('category', None)
+        )
+        value = attribute.pop('value', None)
+        if value is None:
+            raise NewAttributeError('The value of the attribute is required.')
+        if attribute_type == 'datetime' and isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                value = parse_date(value)
+        to_ids = attribute.pop('to_ids', None)
+        disable_correlation = attribute.pop('disable_correlation', None)
+        self.update(
+            uuid=attribute.pop('uuid', None) or str(uuid4()),
+            type=attribute_type,
+            value=value,
+            category=category,
+            to_ids=(
+                bool(int(_SANE_DEFAULTS[attribute_type]['to_ids']))
+                if to_ids is None else make_bool(to_ids)
+            ),
+            disable_correlation=(
+                False if disable_correlation is None else disable_correlation
+            )
+        )
+        for tag in attribute.pop('Tag', None) or ():
+            self._add_tag(tag)
+        for sighting in attribute.pop('Sighting', None) or ():
+            self._add_sighting(sighting)
+        for field, value in attribute.items():
+            if value is not None and value != []:
+                setattr(self, field, value)
+        if self.get('distribution') == '4' and self.get('sharing_group_id', '0') == '0':
+            raise NewAttributeError(
+                'If the distribution is set to sharing group, a sharing group ID is required.'
+            )
+
+    def add_galaxy(self, galaxy):
+        self.setdefault('Galaxy', []).append(galaxy)
+        self._set_edited()
+
+    def add_sighting(self, sighting: Optional[Union[dict, MISPSighting]] = None,
+                     **kwargs) -> MISPSighting:
+        misp_sighting = self._add_sighting(sighting or kwargs)
+        self._set_edited()
+        return misp_sighting
+
+    def add_tag(self, tag: Optional[Union[dict, MISPTag, str]] = None, **kwargs) -> dict:
+        misp_tag = _json_tag(tag or kwargs)
+        if self._add_tag(misp_tag):
+            self._set_edited()
+        return misp_tag
+
+    def _add_sighting(self, sighting: Union[dict, MISPSighting]) -> MISPSighting:
+        if not isinstance(sighting, MISPSighting):
+            misp_sighting = MISPSighting()
+            misp_sighting.from_dict(**sighting)
+            sighting = misp_sighting
+        self.setdefault('Sighting', []).append(sighting)
+        return sighting
+
+    def _add_tag(self, tag: Union[dict, MISPTag, str]) -> bool:
+        tag = _json_tag(tag)
+        tags = self.setdefault('Tag', [])
+        if tag in tags:
+            return False
+        tags.append(tag)
+        return True
+
+    def _set_edited(self):
+        # pymisp does not serialise the timestamp of edited attributes
+        self.pop('timestamp', None)
+
+
+class MISPObjectDict(_MISPFeatureDict):
+    __slots__ = ('_template',)
+
+    def __init__(self, name: str, template: Optional[dict] = None):
+        super().__init__()
+        object.__setattr__(self, '_template', template)
+        self.name = name
+        if template is not None:
+            self.update(
+                {
+                    'meta-category': template['meta-category'],
+                    'template_uuid': template['uuid'],
+                    'description': template['description'],
+                    'template_version': template['version']
+                }
+            )
+        self.update(uuid=str(uuid4()), distribution=5, sharing_group_id=0)
+
+    def __setattr__(self, name: str, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    @property
+    def attributes(self) -> list:
+        return self.get('Attribute', [])
+
+    @property
+    def references(self) -> list:
+        return self.get('ObjectReference', [])
+
+    def add_attribute(self, object_relation: str, simple_value=None,
+                      **value) -> Optional[Union[MISPAttributeDict, MISPObjectAttribute]]:
+        if simple_value is not None:
+            value['value'] = simple_value
+        if value.get('value') is None:
+            return None
+        if isinstance(value['value'], bytes):
+            try:
+                value['value'] = value['value'].decode()
+            except Exception:
+                return None
+        if isinstance(value['value'], str):
+            value['value'] = value['value'].strip().strip('\x00')
+            if value['value'] == '':
+                return None
+        if any(value.get(field) for field in _PYMISP_FIELDS):
+            attribute = self._create_pymisp_attribute(object_relation, value)
+        else:
+            attribute = MISPAttributeDict(
+                self._fill_attribute(object_relation, value)
+            )
+        self.setdefault('Attribute', []).append(attribute)
+        return attribute
+
+    def add_reference(self, referenced_uuid: Union[AbstractMISP, dict, str],
+                      relationship_type: str, comment: Optional[str] = None,
+                      **kwargs) -> dict:
+        if isinstance(referenced_uuid, (AbstractMISP, dict)):
+            referenced_uuid = referenced_uuid['uuid']
+        reference = _MISPFeatureDict()
+        reference.update(
+            uuid=str(uuid4()),
+            object_uuid=kwargs.pop('object_uuid', None) or self['uuid'],
+            referenced_uuid=referenced_uuid,
+            relationship_type=relationship_type,
+            comment=comment,
+            **kwargs
+        )
+        self.setdefault('ObjectReference', []).append(reference)
+        return reference
+
+    def _create_pymisp_attribute(self, object_relation: str,
+                                 value: dict) -> MISPObjectAttribute:
+        definition = {}
+        if self._template is not None:
+            definition = self._template['attributes'].get(object_relation, {})
+        attribute = MISPObjectAttribute(definition)
+        attribute.from_dict(object_relation=object_relation, **value)
+        return attribute
+
+    def _fill_attribute(self, object_relation: str, value: dict) -> dict:
+        attribute = {'object_relation': object_relation}
+        if self._template is not None:
+            defaults = _get_template_defaults(self._template).get(object_relation, {})
+            for field in ('type', 'disable_correlation', 'to_ids'):
+                if value.get(field) is None:
+                    value[field] = defaults.get(field)
+            if 'category' not in value and 'category' in defaults:
+                attribute['category'] = defaults['category']
+        if not value.get('type'):
+            raise NewAttributeError(
+                'The type of the attribute is required. Is the object template missing?'
+            )
+        attribute.update(value)
+        return attribute
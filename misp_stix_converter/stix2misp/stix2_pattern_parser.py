@@ -1,9 +1,14 @@
 import stix2patterns.v20.object_validator as validator_v20
 import stix2patterns.v21.object_validator as validator_v21
+import re
+import threading
 from antlr4 import CommonTokenStream, InputStream, ParseTreeWalker
+from collections import defaultdict
+from functools import lru_cache
 from stix2.v20.sdo import Indicator as Indicator_v20
 from stix2.v21.sdo import Indicator as Indicator_v21
 from stix2patterns.exceptions import STIXPatternErrorListener
+from stix2patterns.inspector import _PatternData as PatternData
 from stix2patterns.v20.grammars.STIXPatternLexer import STIXPatternLexer as lexer_v20
 from stix2patterns.v20.grammars.STIXPatternParser import STIXPatternParser as parser_v20
 from stix2patterns.v20.inspector import InspectionListener as inspector_v20
@@ -12,9 +17,140 @@ from stix2patterns.v21.grammars.STIXPatternParser import STIXPatternParser as pa
 from stix2patterns.v21.inspector import InspectionListener as inspector_v21
 from typing import Optional, Union
 
+_PATTERN_CACHE_SIZE = 8192
 _VALID_VERSIONS = ('2.0', '2.1')
 
 
+class _STIXPatternCompiler:
+    """
+    ANTLR lexer and parser of the STIX patterns of a given version, created
+    once and reset for every pattern to compile.
+    """
+    def __init__(self, lexer, parser, inspector):
+        self.__lexer = lexer(InputStream(''))
+        self.__lexer.removeErrorListeners()
+        self.__parser = parser(CommonTokenStream(self.__lexer))
+        self.__parser.removeErrorListeners()
+        self.__error_listener = STIXPatternErrorListener()
+        self.__parser.addErrorListener(self.__error_listener)
+        for i, lit_name in enumerate(self.__parser.literalNames):
+            if lit_name == u"<INVALID>":
+                self.__parser.literalNames[i] = self.__parser.symbolicNames[i]
+        self.__inspector = inspector
+
+    def parse(self, pattern_str: str) -> tuple:
+        self.__error_listener.err_strings = []
+        self.__lexer.inputStream = InputStream(pattern_str)
+        self.__parser.setTokenStream(CommonTokenStream(self.__lexer))
+        tree = self.__parser.pattern()
+        errors = self.__error_listener.err_strings
+        if errors:
+            return None, errors
+        inspection_listener = self.__inspector()
+        ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
+        return inspection_listener.pattern_data(), errors
+
+
+_COMPILER_FEATURES = {
+    '20': (lexer_v20, parser_v20, inspector_v20),
+    '21': (lexer_v21, parser_v21, inspector_v21)
+}
+_VALIDATORS = {'20': validator_v20, '21': validator_v21}
+_compilers = threading.local()
+
+# Simple patterns: one single observation expression without qualifier, made
+# of equality or IN comparisons with string literals, joined by AND or OR
+_KEYWORDS = (
+    'AND', 'OR', 'NOT', 'FOLLOWEDBY', 'LIKE', 'MATCHES', 'ISSUPERSET',
+    'ISSUBSET', 'EXISTS', 'LAST', 'IN', 'START', 'STOP', 'SECONDS', 'WITHIN',
+    'REPEATS', 'TIMES', 'true', 'false'
+)
+_WS = r'[ \t\r\n\x0b\x0c]*'
+_STRING = r"'(?:[^'\\]|\\['\\])*'"
+_IDENTIFIER = r'[a-zA-Z_][a-zA-Z0-9_]*(?![a-zA-Z0-9_-])'
+_PATH_COMPONENT = rf'(?:{_IDENTIFIER}|{_STRING})'
+_SIMPLE_COMPARISON = re.compile(
+    rf'{_WS}(?P<type>[a-zA-Z_][a-zA-Z0-9_-]*(?![a-zA-Z0-9_-])){_WS}:{_WS}'
+    rf'(?P<path>{_PATH_COMPONENT}(?:{_WS}\.{_WS}{_PATH_COMPONENT})*){_WS}'
+    rf'(?:=(?!=){_WS}(?P<value>{_STRING})'
+    rf'|IN{_WS}\({_WS}(?P<set>{_STRING}(?:{_WS},{_WS}{_STRING})*){_WS}\))'
+    rf'{_WS}(?P<next>(?:AND|OR)(?![a-zA-Z0-9_-])|\]{_WS}\Z)'
+)
+_SIMPLE_PATH_COMPONENT = re.compile(rf'{_WS}({_PATH_COMPONENT}){_WS}(?:\.|\Z)')
+_SIMPLE_PATTERN_START = re.compile(rf'{_WS}\[')
+_SIMPLE_STRING = re.compile(_STRING)
+
+
+def _parse_simple_pattern(pattern_str: str) -> Optional[PatternData]:
+    """
+    Recognises the simple patterns without going through the ANTLR grammar,
+    and returns the same pattern data as the inspection of the parse tree.
+    Returns None for any other pattern, which is then parsed with ANTLR.
+    """
+    start = _SIMPLE_PATTERN_START.match(pattern_str)
+    if start is None:
+        return None
+    comparisons = defaultdict(list)
+    position = start.end()
+    while True:
+        comparison = _SIMPLE_COMPARISON.match(pattern_str, position)
+        if comparison is None:
+            return None
+        object_type = comparison.group('type')
+        if object_type in _KEYWORDS:
+            return None
+        path = []
+        for component in _SIMPLE_PATH_COMPONENT.findall(comparison.group('path')):
+            if component.startswith("'"):
+                component = component[1:-1].replace("\\'", "'").replace('\\\\', '\\')
+            elif component in _KEYWORDS:
+                return None
+            path.append(component)
+        if comparison.group('value') is not None:
+            comparisons[object_type].append((path, '=', comparison.group('value')))
+        else:
+            values = _SIMPLE_STRING.findall(comparison.group('set'))
+            comparisons[object_type].append((path, 'IN', f"({','.join(values)})"))
+        if comparison.group('next').startswith(']'):
+            return PatternData(dict(comparisons), set(), set())
+        position = comparison.end()
+
+
+@lru_cache(maxsize=_PATTERN_CACHE_SIZE)
+def _compile_stix_pattern(version: str, pattern_str: str) -> tuple:
+    """
+    Compiles a STIX pattern and returns its pattern data (None if the pattern
+    is not valid) with the list of errors found.
+    The compiled patterns are cached and shared, they must not be modified.
+    """
+    pattern_data = _parse_simple_pattern(pattern_str)
+    if pattern_data is None:
+        try:
+            compiler = getattr(_compilers, version)
+        except AttributeError:
+            compiler = _STIXPatternCompiler(*_COMPILER_FEATURES[version])
+            setattr(_compilers, version, compiler)
+        pattern_data, errors = compiler.parse(pattern_str)
+        if errors:
+            return None, tuple(errors)
+    obj_validator_results = _VALIDATORS[version].verify_object(pattern_data)
+    if obj_validator_results:
+        return None, tuple(obj_validator_results)
+    for key, values in pattern_data.comparisons.items():
+        pattern_data.comparisons[key] = [
+            _handle_value(*value) for value in values
+        ]
+    return pattern_data, ()
+
+
+def _handle_value(features: list, assertion: str, value: str) -> list:
+    return [
+        [feature if isinstance(feature, str) else '[*]' for feature in features],
+        assertion,
+        value.strip("'")
+    ]
+
+
 class STIX2PatternParser:
     def __init__(self, version: Optional[str]='2.1'):
         self.__version = self.__set_version(version)
@@ -44,79 +180,16 @@ class STIX2PatternParser:
         self.load_stix_pattern(indicator['pattern'])
 
     def load_stix_pattern(self, pattern_str: str):
-        getattr(self, f'_load_stix_{self.version}_pattern')(pattern_str)
-
-    def _load_stix_20_pattern(self, pattern_str: str):
-        pattern = InputStream(pattern_str)
-        parseErrListener = STIXPatternErrorListener()
-        lexer = lexer_v20(pattern)
-        lexer.removeErrorListeners()
-        stream = CommonTokenStream(lexer)
-        parser = parser_v20(stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(parseErrListener)
-        for i, lit_name in enumerate(parser.literalNames):
-            if lit_name == u"<INVALID>":
-                parser.literalNames[i] = parser.symbolicNames[i]
-        tree = parser.pattern()
-        inspection_listener = inspector_v20()
-        if len(parseErrListener.err_strings) == 0:
-            ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
-            pattern_data = inspection_listener.pattern_data()
-            obj_validator_results = validator_v20.verify_object(pattern_data)
-            if obj_validator_results:
-                parseErrListener.err_strings.extend(obj_validator_results)
-            else:
-                self.__set_pattern_data(pattern_data)
-        self.__valid = self.__parse_err_listener(parseErrListener.err_strings)
-
-    def _load_stix_21_pattern(self, pattern_str: str):
-        pattern = InputStream(pattern_str)
-        parseErrListener = STIXPatternErrorListener()
-        lexer = lexer_v21(pattern)
-        lexer.removeErrorListeners()
-        stream = CommonTokenStream(lexer)
-        parser = parser_v21(stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(parseErrListener)
-        for i, lit_name in enumerate(parser.literalNames):
-            if lit_name == u"<INVALID>":
-                parser.literalNames[i] = parser.symbolicNames[i]
-        tree = parser.pattern()
-        inspection_listener = inspector_v21()
-        if len(parseErrListener.err_strings) == 0:
-            ParseTreeWalker.DEFAULT.walk(inspection_listener, tree)
-            pattern_data = inspection_listener.pattern_data()
-            obj_validator_results = validator_v21.verify_object(pattern_data)
-            if obj_validator_results:
-                parseErrListener.err_strings.extend(obj_validator_results)
-            else:
-                self.__set_pattern_data(pattern_data)
-        self.__valid = self.__parse_err_listener(parseErrListener.err_strings)
-
-    @staticmethod
-    def __handle_value(features: list, assertion: str, value: str) -> list:
-        return [
-            [feature if isinstance(feature, str) else '[*]' for feature in features],
-            assertion,
-            value.strip("'")
-        ]
-
-    def __parse_err_listener(self, err_listener):
-        if len(err_listener) == 0:
-            return True
-        self.__errors = err_listener
-        return False
-
-    def __set_pattern_data(self, pattern_data):
-        for key, values in pattern_data.comparisons.items():
-            pattern_data.comparisons[key] = [
-                self.__handle_value(*value) for value in values
-            ]
+        pattern_data, errors = _compile_stix_pattern(self.version, pattern_str)
+        if errors:
+            self.__errors = list(errors)
+            self.__valid = False
+            return
         self.__pattern_data = pattern_data
+        self.__valid = True
 
     @staticmethod
     def __set_version(version: str) -> str:
         if version in _VALID_VERSIONS:
             return version.replace('.', '')
-        return '21'
\ No newline at end of file
+        return '21'
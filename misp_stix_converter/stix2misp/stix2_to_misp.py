@@ -12,11 +12,18 @@ from .exceptions import (
 from .external_stix2_mapping import ExternalSTIX2toMISPMapping
 from .importparser import STIXtoMISPParser
 from .internal_stix2_mapping import InternalSTIX2toMISPMapping
-from collections import defaultdict
+from .misp_dicts import _PYMISP_FIELDS, MISPAttributeDict, MISPObjectDict
+from ..misp_stix_json import json_load, load_stix2_bundle
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from multiprocessing import get_all_start_methods, get_context
 from pymisp import (
     AbstractMISP, MISPEvent, MISPAttribute, MISPGalaxy, MISPGalaxyCluster,
     MISPObject, MISPSighting)
+from stix2.base import _STIXBase
+from stix2.exceptions import STIXError
 from stix2.parsing import parse as stix2_parser
 from stix2.v20.bundle import Bundle as Bundle_v20
 from stix2.v20.common import MarkingDefinition as MarkingDefinition_v20
@@ -45,6 +52,13 @@ from stix2.v21.sdo import (
 from stix2.v21.sro import Relationship as Relationship_v21, Sighting as Sighting_v21
 from typing import Optional, Union
 
+_EAGERLY_LOADED_FEATURES = (
+    '_load_custom_opinion',
+    '_load_marking_definition',
+    '_load_opinion',
+    '_load_relationship',
+    '_load_sighting'
+)
 _LOADED_FEATURES = (
     '_attack_pattern',
     '_course_of_action',
@@ -143,12 +157,98 @@ _VULNERABILITY_TYPING = Union[
     Vulnerability_v20,
     Vulnerability_v21
 ]
+_stix2_worker_parser: 'STIX2toMISPParser'
+
+
+@lru_cache(maxsize=None)
+def _load_misp_object_templates() -> dict:
+    """
+    Loads all the MISP object templates at once, so the MISP objects created
+    during the import get their definition without any file access.
+    Unknown object names are left to MISPObject.
+    """
+    return {
+        path.parent.name: json_load(path)
+        for path in _MISP_OBJECTS_PATH.glob('*/definition.json')
+    }
+
+
+def _build_misp_event_in_worker(feature: str, object_id: str) -> tuple:
+    """
+    Builds the MISP event of a report or grouping and returns it with the
+    errors and warnings added while building it only, which are then cleared
+    before the next report or grouping the worker builds.
+    """
+    misp_event = _stix2_worker_parser._build_misp_event(feature, object_id)
+    errors = dict(_stix2_worker_parser.errors)
+    warnings = dict(_stix2_worker_parser.warnings)
+    _stix2_worker_parser.errors.clear()
+    _stix2_worker_parser.warnings.clear()
+    return misp_event, errors, warnings
+
+
+def _initiate_stix2_worker(parser):
+    global _stix2_worker_parser
+    # the errors and warnings inherited from the parent process are already
+    # known by the parser merging the results of the workers
+    parser.errors.clear()
+    parser.warnings.clear()
+    _stix2_worker_parser = parser
+
+
+class LazyLoadedSTIX2Objects(dict):
+    """
+    STIX objects indexed by id, loaded from a bundle as raw dictionaries.
+    A raw dictionary is only converted into a stix2 object, which implies its
+    validation, when it is accessed. The most recently accessed objects are
+    kept in a bounded cache, so the objects used repeatedly during the parsing
+    are converted once, while keeping only the raw dictionaries of the other
+    objects saves a lot of memory.
+    """
+    cache_size = 1024
+
+    def __init__(self):
+        super().__init__()
+        self._cache: OrderedDict = OrderedDict()
+
+    def __getitem__(self, object_id: str):
+        try:
+            self._cache.move_to_end(object_id)
+            return self._cache[object_id]
+        except KeyError:
+            pass
+        stix_object = stix2_parser(
+            super().__getitem__(object_id), allow_custom=True,
+            interoperability=True
+        )
+        self._cache[object_id] = stix_object
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return stix_object
+
+    def __setitem__(self, object_id: str, stix_object: dict):
+        self._cache.pop(object_id, None)
+        super().__setitem__(object_id, stix_object)
+
+    def get(self, object_id: str, default=None):
+        return self[object_id] if object_id in self else default
+
+    def items(self):
+        for object_id in self.keys():
+            yield object_id, self[object_id]
+
+    def values(self):
+        for object_id in self.keys():
+            yield self[object_id]
 
 
 class STIX2toMISPParser(STIXtoMISPParser):
-    def __init__(self, galaxies_as_tags: bool):
+    def __init__(self, galaxies_as_tags: bool, fast_mode: Optional[bool] = False):
         super().__init__(galaxies_as_tags)
+        self.__fast_mode = fast_mode
         self._creators: set = set()
+        self._event_attributes: dict = {}
+        self._event_objects: dict = {}
         self._mapping: Union[
             ExternalSTIX2toMISPMapping, InternalSTIX2toMISPMapping
         ]
@@ -173,15 +273,25 @@ class STIX2toMISPParser(STIXtoMISPParser):
         self._tool: dict
         self._vulnerability: dict
 
-    def load_stix_bundle(self, bundle: Union[Bundle_v20, Bundle_v21]):
-        self._identifier = bundle.id
-        self.__stix_version = bundle.spec_version if hasattr(bundle, 'spec_version') else '2.1'
+    def load_stix_bundle(self, bundle: Union[Bundle_v20, Bundle_v21, dict]):
+        """
+        Loads the objects of a STIX 2 bundle, either as a stix2 Bundle or as a
+        dictionary whose objects are still raw dictionaries (possibly streamed
+        from the bundle file by `load_stix2_bundle`). Those raw dictionaries
+        are only converted into stix2 objects when they are used, except for
+        the objects indexed at load time.
+        """
+        if isinstance(bundle, dict):
+            self._identifier = bundle['id']
+            self.__stix_version = bundle.get('spec_version', '2.1')
+            stix_objects = bundle.get('objects', [])
+        else:
+            self._identifier = bundle.id
+            self.__stix_version = bundle.spec_version if hasattr(bundle, 'spec_version') else '2.1'
+            stix_objects = bundle.objects
         n_report = 0
-        for stix_object in bundle.objects:
-            try:
-                object_type = stix_object.type
-            except AttributeError:
-                object_type = stix_object['type']
+        for stix_object in stix_objects:
+            object_type = stix_object['type']
             if object_type in ('grouping', 'report'):
                 n_report += 1
             try:
@@ -189,16 +299,36 @@ class STIX2toMISPParser(STIXtoMISPParser):
             except KeyError:
                 self._unable_to_load_stix_object_type_error(object_type)
                 continue
-            if hasattr(stix_object, 'created_by_ref'):
-                self._creators.add(stix_object.created_by_ref)
+            if 'created_by_ref' in stix_object:
+                self._creators.add(stix_object['created_by_ref'])
+            if isinstance(stix_object, dict) and feature in _EAGERLY_LOADED_FEATURES:
+                try:
+                    stix_object = stix2_parser(
+                        stix_object, allow_custom=True, interoperability=True
+                    )
+                except STIXError as error:
+                    self._critical_error(error)
+                    continue
             try:
                 getattr(self, feature)(stix_object)
             except AttributeError as exception:
                 self._critical_error(exception)
         self.__n_report = 2 if n_report >= 2 else n_report
 
-    def parse_stix_bundle(self, single_event: Optional[bool] = False):
+    def parse_stix_bundle(self, single_event: Optional[bool] = False,
+                          processes: Optional[int] = 1):
+        """
+        Converts the loaded STIX content into MISP format.
+
+        :param single_event: Convert all the reports and groupings of the
+            bundle in one single MISP event
+        :param processes: Number of processes used to build the MISP events
+            of the different reports and groupings in parallel, when they are
+            not converted in a single MISP event (requires the fork start
+            method; the events are built sequentially otherwise)
+        """
         self.__single_event = single_event
+        self.__processes = processes
         try:
             feature = self._mapping.bundle_to_misp_mapping[str(self.__n_report)]
         except AttributeError:
@@ -206,6 +336,7 @@ class STIX2toMISPParser(STIXtoMISPParser):
         try:
             getattr(self, feature)()
         except (
+            STIXError,
             SynonymsResourceJSONError,
             UnavailableGalaxyResourcesError,
             UnavailableSynonymsResourceError
@@ -214,11 +345,11 @@ class STIX2toMISPParser(STIXtoMISPParser):
 
     def parse_stix_content(self, filename: str):
         try:
-            with open(filename, 'rt', encoding='utf-8') as f:
-                bundle = stix2_parser(f.read(), allow_custom=True, interoperability=True)
+            bundle = load_stix2_bundle(filename)
+            # the objects streamed from the file are only read while loaded
+            self.load_stix_bundle(bundle)
         except Exception as exception:
             sys.exit(exception)
-        self.load_stix_bundle(bundle)
         del bundle
         self.parse_stix_bundle()
 
@@ -230,6 +361,10 @@ class STIX2toMISPParser(STIXtoMISPParser):
     def generic_info_field(cls) -> str:
         return f'STIX {cls.stix_version} Bundle imported with the MISP-STIX import feature.'
 
+    @property
+    def fast_mode(self) -> bool:
+        return self.__fast_mode
+
     @property
     def misp_event(self) -> MISPEvent:
         return self.__misp_event
@@ -254,67 +389,31 @@ class STIX2toMISPParser(STIXtoMISPParser):
     ################################################################################
 
     def _load_attack_pattern(self, attack_pattern: Union[AttackPattern_v20, AttackPattern_v21]):
-        self._check_uuid(attack_pattern.id)
-        try:
-            self._attack_pattern[attack_pattern.id] = attack_pattern
-        except AttributeError:
-            self._attack_pattern = {attack_pattern.id: attack_pattern}
+        self._load_stix_object('_attack_pattern', attack_pattern)
 
     def _load_campaign(self, campaign: Union[Campaign_v20, Campaign_v21]):
-        self._check_uuid(campaign.id)
-        try:
-            self._campaign[campaign.id] = campaign
-        except AttributeError:
-            self._campaign = {campaign.id: campaign}
+        self._load_stix_object('_campaign', campaign)
 
     def _load_course_of_action(self, course_of_action: Union[CourseOfAction_v20, CourseOfAction_v21]):
-        self._check_uuid(course_of_action.id)
-        try:
-            self._course_of_action[course_of_action.id] = course_of_action
-        except AttributeError:
-            self._course_of_action = {course_of_action.id: course_of_action}
+        self._load_stix_object('_course_of_action', course_of_action)
 
     def _load_grouping(self, grouping: Grouping):
-        self._check_uuid(grouping.id)
-        try:
-            self._grouping[grouping.id] = grouping
-        except AttributeError:
-            self._grouping = {grouping.id: grouping}
+        self._load_stix_object('_grouping', grouping)
 
     def _load_identity(self, identity: Union[Identity_v20, Identity_v21]):
-        self._check_uuid(identity.id)
-        try:
-            self._identity[identity.id] = identity
-        except AttributeError:
-            self._identity = {identity.id: identity}
+        self._load_stix_object('_identity', identity)
 
     def _load_indicator(self, indicator: Union[Indicator_v20, Indicator_v21]):
-        self._check_uuid(indicator.id)
-        try:
-            self._indicator[indicator.id] = indicator
-        except AttributeError:
-            self._indicator = {indicator.id: indicator}
+        self._load_stix_object('_indicator', indicator)
 
     def _load_intrusion_set(self, intrusion_set: Union[IntrusionSet_v20, IntrusionSet_v21]):
-        self._check_uuid(intrusion_set.id)
-        try:
-            self._intrusion_set[intrusion_set.id] = intrusion_set
-        except AttributeError:
-            self._intrusion_set = {intrusion_set.id: intrusion_set}
+        self._load_stix_object('_intrusion_set', intrusion_set)
 
     def _load_location(self, location: Location):
-        self._check_uuid(location['id'])
-        try:
-            self._location[location['id']] = location
-        except AttributeError:
-            self._location = {location['id']: location}
+        self._load_stix_object('_location', location)
 
     def _load_malware(self, malware: Union[Malware_v20, Malware_v21]):
-        self._check_uuid(malware.id)
-        try:
-            self._malware[malware.id] = malware
-        except AttributeError:
-            self._malware = {malware.id: malware}
+        self._load_stix_object('_malware', malware)
 
     def _load_marking_definition(self, marking_definition: Union[MarkingDefinition_v20, MarkingDefinition_v21]):
         if not hasattr(marking_definition, 'definition_type'):
@@ -333,25 +432,13 @@ class STIX2toMISPParser(STIXtoMISPParser):
             self._marking_definition = {marking_definition.id: data_to_load}
 
     def _load_note(self, note: Note):
-        self._check_uuid(note.id)
-        try:
-            self._note[note.id] = note
-        except AttributeError:
-            self._note = {note.id: note}
+        self._load_stix_object('_note', note)
 
     def _load_observable_object(self, observable: _OBSERVABLE_TYPES):
-        self._check_uuid(observable.id)
-        try:
-            self._observable[observable.id] = observable
-        except AttributeError:
-            self._observable = {observable.id: observable}
+        self._load_stix_object('_observable', observable)
 
     def _load_observed_data(self, observed_data: _OBSERVED_DATA_TYPING):
-        self._check_uuid(observed_data.id)
-        try:
-            self._observed_data[observed_data.id] = observed_data
-        except AttributeError:
-            self._observed_data = {observed_data.id: observed_data}
+        self._load_stix_object('_observed_data', observed_data)
 
     def _load_opinion(self, opinion: Opinion):
         sighting = MISPSighting()
@@ -369,7 +456,7 @@ class STIX2toMISPParser(STIXtoMISPParser):
             }
         sighting.from_dict(**sighting_args)
         for object_ref in opinion.object_refs:
-            sanitised_ref = self._sanitise_uuid(object_ref)
+            sanitised_ref = str(self._sanitise_uuid(object_ref))
             try:
                 self._sighting[sanitised_ref].append(sighting)
             except AttributeError:
@@ -381,7 +468,7 @@ class STIX2toMISPParser(STIXtoMISPParser):
             'referenced_uuid': relationship.target_ref,
             'relationship_type': relationship.relationship_type
         }
-        source_uuid = self._sanitise_uuid(relationship.source_ref)
+        source_uuid = str(self._sanitise_uuid(relationship.source_ref))
         try:
             self._relationship[source_uuid].append(reference)
         except AttributeError:
@@ -389,11 +476,7 @@ class STIX2toMISPParser(STIXtoMISPParser):
             self._relationship[source_uuid].append(reference)
 
     def _load_report(self, report: Union[Report_v20, Report_v21]):
-        self._check_uuid(report.id)
-        try:
-            self._report[report.id] = report
-        except AttributeError:
-            self._report = {report.id: report}
+        self._load_stix_object('_report', report)
 
     def _load_sighting(self, sighting: _SIGHTING_TYPING):
         misp_sighting = MISPSighting()
@@ -410,33 +493,36 @@ class STIX2toMISPParser(STIXtoMISPParser):
                 'name': identity.name
             }
         misp_sighting.from_dict(**sighting_args)
-        sighting_of_ref = self._sanitise_uuid(sighting.sighting_of_ref)
+        sighting_of_ref = str(self._sanitise_uuid(sighting.sighting_of_ref))
         try:
             self._sighting[sighting_of_ref].append(misp_sighting)
         except AttributeError:
             self._sighting = defaultdict(list)
             self._sighting[sighting_of_ref].append(misp_sighting)
 
-    def _load_threat_actor(self, threat_actor: Union[ThreatActor_v20, ThreatActor_v21]):
-        self._check_uuid(threat_actor.id)
+    def _load_stix_object(self, feature: str, stix_object: Union[_STIXBase, dict]):
+        """
+        Indexes a STIX object by id in the given feature. The raw dictionaries
+        of the bundles loaded as such are indexed in a `LazyLoadedSTIX2Objects`
+        instance, which converts them into stix2 objects when they are used.
+        """
+        object_id = stix_object['id']
+        self._check_uuid(object_id)
         try:
-            self._threat_actor[threat_actor.id] = threat_actor
+            getattr(self, feature)[object_id] = stix_object
         except AttributeError:
-            self._threat_actor = {threat_actor.id: threat_actor}
+            loaded_objects = LazyLoadedSTIX2Objects() if isinstance(stix_object, dict) else {}
+            loaded_objects[object_id] = stix_object
+            setattr(self, feature, loaded_objects)
+
+    def _load_threat_actor(self, threat_actor: Union[ThreatActor_v20, ThreatActor_v21]):
+        self._load_stix_object('_threat_actor', threat_actor)
 
     def _load_tool(self, tool: Union[Tool_v20, Tool_v21]):
-        self._check_uuid(tool.id)
-        try:
-            self._tool[tool.id] = tool
-        except AttributeError:
-            self._tool = {tool.id: tool}
+        self._load_stix_object('_tool', tool)
 
     def _load_vulnerability(self, vulnerability: Union[Vulnerability_v20, Vulnerability_v21]):
-        self._check_uuid(vulnerability.id)
-        try:
-            self._vulnerability[vulnerability.id] = vulnerability
-        except AttributeError:
-            self._vulnerability = {vulnerability.id: vulnerability}
+        self._load_stix_object('_vulnerability', vulnerability)
 
     ################################################################################
     #                     MAIN STIX OBJECTS PARSING FUNCTIONS.                     #
@@ -493,6 +579,9 @@ class STIX2toMISPParser(STIXtoMISPParser):
             self._unknown_object_name_warning(error)
         except UnknownParsingFunctionError as error:
             self._unknown_parsing_function_error(error)
+        except STIXError as error:
+            # raw objects are only validated when they are parsed
+            self._critical_error(error)
 
     def _handle_misp_event_tags(self, misp_event: MISPEvent, stix_object: Union[Report_v20, Report_v21, Grouping]):
         if hasattr(stix_object, 'object_marking_refs'):
@@ -530,22 +619,51 @@ class STIX2toMISPParser(STIXtoMISPParser):
             self._parse_SROs()
             self._parse_galaxies()
         else:
-            events = []
-            if hasattr(self, '_report') and self._report is not None:
-                for report in self._report.values():
-                    self.__misp_event = self._misp_event_from_report(report)
-                    self._handle_object_refs(report.object_refs)
-                    self._parse_SROs()
-                    self._parse_galaxies()
-                    events.append(self.misp_event)
-            if hasattr(self, '_grouping') and self._grouping is not None:
-                for grouping in self._grouping.values():
-                    self.__misp_event = self._misp_event_from_grouping(grouping)
-                    self._handle_object_refs(grouping.object_refs)
-                    self._parse_SROs()
-                    self._parse_galaxies()
-                    events.append(self.misp_event)
-            self.__misp_events = events
+            references = []
+            for feature in ('_report', '_grouping'):
+                if hasattr(self, feature) and getattr(self, feature) is not None:
+                    references.extend(
+                        (feature, object_id) for object_id in getattr(self, feature)
+                    )
+            if self.__processes > 1 and len(references) > 1 and 'fork' in get_all_start_methods():
+                self.__misp_events = self._build_misp_events_in_parallel(
+                    references
+                )
+            else:
+                self.__misp_events = [
+                    self._build_misp_event(*reference) for reference in references
+                ]
+
+    def _build_misp_event(self, feature: str, object_id: str) -> MISPEvent:
+        stix_object = getattr(self, feature)[object_id]
+        self.__misp_event = getattr(self, f'_misp_event_from{feature}')(stix_object)
+        self._handle_object_refs(stix_object.object_refs)
+        self._parse_SROs()
+        self._parse_galaxies()
+        return self.misp_event
+
+    def _build_misp_events_in_parallel(self, references: list) -> list:
+        """
+        Builds the MISP events of the different reports and groupings in a
+        pool of forked processes, sharing the loaded STIX objects with the
+        parser they inherit. The errors and warnings of the workers are
+        merged back with the ones of the current parser.
+        """
+        events = []
+        with ProcessPoolExecutor(
+                max_workers=self.__processes, mp_context=get_context('fork'),
+                initializer=_initiate_stix2_worker, initargs=(self,)) as executor:
+            results = executor.map(
+                _build_misp_event_in_worker, *zip(*references)
+            )
+            for misp_event, errors, warnings in results:
+                for identifier, messages in errors.items():
+                    self.errors[identifier].update(messages)
+                for identifier, messages in warnings.items():
+                    self.warnings[identifier].update(messages)
+                events.append(misp_event)
+        self.__misp_event = events[-1]
+        return events
 
     def _parse_bundle_with_no_report(self):
         self.__misp_event = self._create_generic_event()
@@ -855,9 +973,10 @@ class STIX2toMISPParser(STIXtoMISPParser):
     #                 RELATIONSHIPS & SIGHTINGS PARSING FUNCTIONS.                 #
     ################################################################################
 
-    def _parse_attribute_relationships(self, attribute: MISPAttribute):
+    def _parse_attribute_relationships(self, attribute: MISPAttribute,
+                                       relationships: list):
         if self.galaxies_as_tags:
-            for relationship in self._relationship[attribute.uuid]:
+            for relationship in relationships:
                 referenced_uuid = relationship['referenced_uuid']
                 if referenced_uuid in self._clusters:
                     for tag in self._clusters[referenced_uuid]['tag_names']:
@@ -865,7 +984,7 @@ class STIX2toMISPParser(STIXtoMISPParser):
                     self._clusters[referenced_uuid]['used'][self.misp_event.uuid] = True
         else:
             clusters = defaultdict(list)
-            for relationship in self._relationship[attribute.uuid]:
+            for relationship in relationships:
                 referenced_uuid = relationship['referenced_uuid']
                 if referenced_uuid in self._clusters:
                     cluster = self._clusters[referenced_uuid]['cluster']
@@ -875,22 +994,27 @@ class STIX2toMISPParser(STIXtoMISPParser):
                 for galaxy in self._aggregate_galaxy_clusters(clusters):
                     attribute.add_galaxy(galaxy)
 
-    def _parse_attribute_sightings(self, attribute: MISPAttribute):
-        for sighting in self._sighting[attribute.uuid]:
+    def _parse_attribute_sightings(self, attribute: MISPAttribute,
+                                   sightings: list):
+        for sighting in sightings:
             attribute.add_sighting(sighting)
 
-    def _parse_object_relationships(self, misp_object: MISPObject):
+    def _parse_object_relationships(self, misp_object: MISPObject,
+                                    relationships: list):
         if self.galaxies_as_tags:
-            for relationship in self._relationship[misp_object.uuid]:
+            tag_names = []
+            for relationship in relationships:
                 referenced_uuid = relationship['referenced_uuid']
                 if referenced_uuid in self._clusters:
-                    for attribute in misp_object.attributes:
-                        for tag in self._clusters[referenced_uuid]['tag_names']:
-                            attribute.add_tag(tag)
+                    tag_names.extend(self._clusters[referenced_uuid]['tag_names'])
                     self._clusters[referenced_uuid]['used'][self.misp_event.uuid] = True
+            if tag_names:
+                for attribute in misp_object.attributes:
+                    for tag in tag_names:
+                        attribute.add_tag(tag)
         else:
             clusters = defaultdict(list)
-            for relationship in self._relationship[misp_object.uuid]:
+            for relationship in relationships:
                 referenced_uuid = relationship['referenced_uuid']
                 if referenced_uuid in self._clusters:
                     cluster = self._clusters[referenced_uuid]['cluster']
@@ -906,46 +1030,58 @@ class STIX2toMISPParser(STIXtoMISPParser):
                     for attribute in misp_object.attributes:
                         attribute.add_galaxy(galaxy)
 
-    def _parse_object_sightings(self, misp_object: MISPObject):
-        for sighting in self._sighting[misp_object.uuid]:
+    def _parse_object_sightings(self, misp_object: MISPObject,
+                                sightings: list):
+        for sighting in sightings:
             for attribute in misp_object.attributes:
                 attribute.add_sighting(sighting)
 
+    @staticmethod
+    def _fetch_referenced_features(features: dict, references: dict):
+        """
+        Yields the MISP attributes or objects of the current event with their
+        references in the relationships or sightings index, both being keyed
+        by uuid, looking the keys of the smaller one up in the other one.
+        """
+        if len(features) <= len(references):
+            for feature_uuid, feature in features.items():
+                if feature_uuid in references:
+                    yield feature, references[feature_uuid]
+            return
+        for feature_uuid, feature_references in references.items():
+            if feature_uuid in features:
+                yield features[feature_uuid], feature_references
+
     def _parse_relationships(self):
-        for attribute in self.misp_event.attributes:
-            if attribute.uuid in self._relationship:
-                self._parse_attribute_relationships(attribute)
-        for misp_object in self.misp_event.objects:
-            if misp_object.uuid in self._relationship:
-                self._parse_object_relationships(misp_object)
-
-    def _parse_relationships_and_sightings(self):
-        for attribute in self.misp_event.attributes:
-            if attribute.uuid in self._relationship:
-                self._parse_attribute_relationships(attribute)
-            if attribute.uuid in self._sighting:
-                self._parse_attribute_sightings(attribute)
-        for misp_object in self.misp_event.objects:
-            if misp_object.uuid in self._relationship:
-                self._parse_object_relationships(misp_object)
-            if misp_object.uuid in self._sighting:
-                self._parse_object_sightings(misp_object)
+        relationships = self._fetch_referenced_features(
+            self._event_attributes, self._relationship
+        )
+        for misp_attribute, attribute_relationships in relationships:
+            self._parse_attribute_relationships(
+                misp_attribute, attribute_relationships
+            )
+        relationships = self._fetch_referenced_features(
+            self._event_objects, self._relationship
+        )
+        for misp_object, object_relationships in relationships:
+            self._parse_object_relationships(misp_object, object_relationships)
 
     def _parse_sightings(self):
-        for attribute in self.misp_event.attributes:
-            if attribute.uuid in self._sighting:
-                self._parse_attribute_sightings(attribute)
-        for misp_object in self.misp_event.objects:
-            if misp_object.uuid in self._sighting:
-                self._parse_object_sightings(misp_object)
+        sightings = self._fetch_referenced_features(
+            self._event_attributes, self._sighting
+        )
+        for misp_attribute, attribute_sightings in sightings:
+            self._parse_attribute_sightings(misp_attribute, attribute_sightings)
+        sightings = self._fetch_referenced_features(
+            self._event_objects, self._sighting
+        )
+        for misp_object, object_sightings in sightings:
+            self._parse_object_sightings(misp_object, object_sightings)
 
     def _parse_SROs(self):
         if hasattr(self, '_relationship'):
-            if hasattr(self, '_sighting'):
-                self._parse_relationships_and_sightings()
-            else:
-                self._parse_relationships()
-        elif hasattr(self, '_sighting'):
+            self._parse_relationships()
+        if hasattr(self, '_sighting'):
             self._parse_sightings()
 
     ################################################################################
@@ -966,13 +1102,27 @@ class STIX2toMISPParser(STIXtoMISPParser):
             attribute['Tag'] = [{'name': tag} for tag in tags]
         return attribute
 
+    def _append_misp_object(self, misp_object: Union[MISPObject, MISPObjectDict]):
+        if self.fast_mode:
+            self.misp_event.objects.append(misp_object)
+            self.misp_event.edited = True
+        else:
+            self.misp_event.add_object(misp_object)
+        self._event_objects[str(misp_object.uuid)] = misp_object
+
+    def _reset_event_entities(self):
+        self._event_attributes = {}
+        self._event_objects = {}
+
     def _create_generic_event(self) -> MISPEvent:
+        self._reset_event_entities()
         misp_event = MISPEvent()
         misp_event.uuid = self._identifier.split('--')[1]
         misp_event.info = self.generic_info_field
         return misp_event
 
     def _create_misp_event(self, stix_object: Union[Grouping, Report_v20, Report_v21]) -> MISPEvent:
+        self._reset_event_entities()
         misp_event = MISPEvent(force_timestamps=True)
         self._sanitise_object_uuid(misp_event, stix_object.id)
         misp_event.info = stix_object.name if hasattr(stix_object, 'name') else self.generic_info_field
@@ -992,12 +1142,25 @@ class STIX2toMISPParser(STIXtoMISPParser):
         cluster.from_dict(**cluster_args)
         return cluster
 
-    def _create_misp_object(self, name: str, stix_object: Optional[_SDO_TYPING] = None) -> MISPObject:
-        misp_object = MISPObject(
-            name,
-            misp_objects_path_custom=_MISP_OBJECTS_PATH,
-            force_timestamps=True
-        )
+    def _create_misp_attribute(self, attribute: dict) -> Union[MISPAttribute, MISPAttributeDict]:
+        if self.fast_mode and not any(attribute.get(field) for field in _PYMISP_FIELDS):
+            return MISPAttributeDict(attribute)
+        misp_attribute = MISPAttribute()
+        misp_attribute.from_dict(**attribute)
+        return misp_attribute
+
+    def _create_misp_object(self, name: str, stix_object: Optional[_SDO_TYPING] = None) -> Union[MISPObject, MISPObjectDict]:
+        if self.fast_mode:
+            misp_object = MISPObjectDict(
+                name, _load_misp_object_templates().get(name)
+            )
+        else:
+            misp_object = MISPObject(
+                name,
+                misp_objects_path_custom=_MISP_OBJECTS_PATH,
+                misp_objects_template_custom=_load_misp_object_templates().get(name),
+                force_timestamps=True
+            )
         if stix_object is not None:
             self._sanitise_object_uuid(misp_object, stix_object['id'])
             misp_object.update(self._parse_timeline(stix_object))
@@ -20,8 +20,13 @@ class TestCollectionSTIXExport(unittest.TestCase):
         self._current_path = Path(__file__).parent
 
     def tearDown(self):
-        for filename in self._current_path.glob('test_*_collection*.json.out'):
-            os.remove(filename)
+        patterns = (
+            'test_*_collection*.json.out', 'test_*_collection*.json.stix*.out',
+            'test_*_collection*.json_*'
+        )
+        for pattern in patterns:
+            for filename in self._current_path.glob(pattern):
+                os.remove(filename)
 
 
 class TestCollectionSTIX1Export(TestCollectionSTIXExport):
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import tempfile
+import unittest
+from misp_stix_converter.stix2misp.exceptions import UnavailableGalaxyResourcesError
+from misp_stix_converter.stix2misp.importparser import (
+    SynonymsIndex, _load_synonyms_mapping)
+from pathlib import Path
+from unittest import mock
+
+_SYNONYMS_MAPPING = {
+    'APT1': ['misp-galaxy:threat-actor="APT1"'],
+    'Comment Crew': ['misp-galaxy:threat-actor="APT1"'],
+    'Comment Panda': ['misp-galaxy:threat-actor="APT1"'],
+    'APT28': ['misp-galaxy:threat-actor="Sofacy"'],
+    'Fancy Bear': ['misp-galaxy:threat-actor="Sofacy"'],
+    'BlackEnergy': ['misp-galaxy:malware="BlackEnergy"'],
+    'BlackEnergy 3': ['misp-galaxy:malware="BlackEnergy"'],
+    'Mimikatz': [
+        'misp-galaxy:tool="Mimikatz"', 'misp-galaxy:mitre-tool="Mimikatz - S0002"'
+    ]
+}
+
+
+class TestSynonymsIndex(unittest.TestCase):
+    def test_synonyms_index_search(self):
+        index = SynonymsIndex(_SYNONYMS_MAPPING)
+        queries = (
+            '', 'A', 'AP', 'APT', 'APT2', 'APT3', 'Comment', 'ment', 'Panda',
+            'Energy', 'Energy 3', 'Bear', 'katz', 'Mimikatz', 'Unknown', 'ee'
+        )
+        for query in queries:
+            expected = next(
+                (synonym for synonym in _SYNONYMS_MAPPING if query in synonym),
+                None
+            )
+            self.assertEqual(index.search(query), expected, query)
+
+
+class TestSynonymsMapping(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        tmp_path = Path(self._tmp_dir.name)
+        self.clusters_path = tmp_path / 'clusters'
+        self.clusters_path.mkdir()
+        self.cache_path = tmp_path / 'synonymsToTagNames.cache'
+        self.synonyms_path = tmp_path / 'synonymsToTagNames.json'
+        self._write_clusters('threat-actor', 'APT1', 'Comment Crew')
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _load_synonyms_mapping(self):
+        return _load_synonyms_mapping(
+            self.clusters_path, self.cache_path, self.synonyms_path
+        )
+
+    def _write_clusters(self, cluster_type, value, *synonyms):
+        cluster = {'value': value}
+        if synonyms:
+            cluster['meta'] = {'synonyms': list(synonyms)}
+        with open(self.clusters_path / f'{cluster_type}.json', 'wt') as f:
+            f.write(json.dumps({'type': cluster_type, 'values': [cluster]}))
+
+    def test_synonyms_mapping_cache(self):
+        tag_name = 'misp-galaxy:threat-actor="APT1"'
+        expected = {'APT1': [tag_name], 'Comment Crew': [tag_name]}
+        self.assertEqual(self._load_synonyms_mapping(), expected)
+        self.assertTrue(self.cache_path.exists())
+        self.assertEqual(json.loads(self.synonyms_path.read_text()), expected)
+        with mock.patch(
+                'misp_stix_converter.stix2misp.importparser._generate_synonyms_mapping') as generate:
+            self.assertEqual(self._load_synonyms_mapping(), expected)
+            generate.assert_not_called()
+        self._write_clusters('tool', 'Mimikatz')
+        synonyms_mapping = self._load_synonyms_mapping()
+        self.assertEqual(synonyms_mapping['Mimikatz'], ['misp-galaxy:tool="Mimikatz"'])
+
+    def test_synonyms_mapping_without_clusters(self):
+        expected = self._load_synonyms_mapping()
+        for filename in self.clusters_path.glob('*.json'):
+            filename.unlink()
+        self.clusters_path.rmdir()
+        self.assertEqual(self._load_synonyms_mapping(), expected)
+        self.cache_path.unlink()
+        self.assertEqual(self._load_synonyms_mapping(), expected)
+        self.synonyms_path.unlink()
+        with self.assertRaises(UnavailableGalaxyResourcesError):
+            self._load_synonyms_mapping()
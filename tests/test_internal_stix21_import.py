@@ -2,6 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import json
+from misp_stix_converter import InternalSTIX2toMISPParser
+from misp_stix_converter.stix2misp.internal_stix2_to_misp import _parse_misp_labels
+from misp_stix_converter.stix2misp.stix2_to_misp import (
+    LazyLoadedSTIX2Objects, _build_misp_event_in_worker, _initiate_stix2_worker)
 from uuid import uuid5
 from .test_internal_stix21_bundles import TestInternalSTIX21Bundles
 from ._test_stix import TestSTIX21
@@ -152,6 +156,77 @@ class TestInternalSTIX21Import(TestInternalSTIX2Import, TestSTIX21, TestSTIX21Im
         for attribute, custom_attribute in zip(attributes, custom_attributes):
             self._check_custom_attribute(attribute, custom_attribute)
 
+    def test_stix21_bundle_with_custom_attributes_from_raw_content(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_custom_attributes()
+        self.parser.load_stix_bundle(json.loads(bundle.serialize()))
+        self.parser.parse_stix_bundle()
+        event = self.parser.misp_event
+        _, grouping, *custom_attributes = bundle.objects
+        attributes = self._check_misp_event_features_from_grouping(event, grouping)
+        self.assertEqual(len(attributes), len(custom_attributes))
+        for attribute, custom_attribute in zip(attributes, custom_attributes):
+            self._check_custom_attribute(attribute, custom_attribute)
+
+    def test_stix21_bundle_with_galaxy_without_name_label(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_attack_pattern_galaxy()
+        bundle = json.loads(bundle.serialize())
+        _, _, attack_pattern = bundle['objects']
+        attack_pattern['labels'] = [
+            label for label in attack_pattern['labels']
+            if not label.startswith('misp:galaxy-name')
+        ]
+        parser = InternalSTIX2toMISPParser(galaxies_as_tags=True)
+        parser.load_stix_bundle(bundle)
+        parser.parse_stix_bundle()
+        self.assertEqual(dict(parser.errors), {})
+        self.assertIn(
+            f'misp-galaxy:mitre-pre-attack-attack-pattern="{attack_pattern["name"]}"',
+            (tag.name for tag in parser.misp_event.tags)
+        )
+
+    def test_misp_labels_read_only(self):
+        misp_labels = _parse_misp_labels(
+            ('misp:type="domain"', 'misp:category="Network activity"', 'tlp:white')
+        )
+        self.assertEqual(misp_labels.attribute['type'], 'domain')
+        self.assertEqual(misp_labels.tags, ('tlp:white',))
+        with self.assertRaises(TypeError):
+            misp_labels.features['misp:type'] = 'hostname'
+        with self.assertRaises(TypeError):
+            misp_labels.attribute['to_ids'] = True
+        attribute = self.parser._attribute_from_labels(
+            ['misp:type="domain"', 'misp:category="Network activity"', 'tlp:white']
+        )
+        attribute['to_ids'] = True
+        self.assertNotIn('to_ids', misp_labels.attribute)
+
+    def test_stix21_bundle_with_invalid_raw_content(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_domain_ip_indicator_attribute()
+        bundle = json.loads(bundle.serialize())
+        _, _, indicator = bundle['objects']
+        del indicator['pattern']
+        self.parser.load_stix_bundle(bundle)
+        self.assertIsInstance(self.parser._indicator, LazyLoadedSTIX2Objects)
+        self.parser.parse_stix_bundle()
+        self.assertEqual(len(self.parser.misp_event.attributes), 0)
+        messages = self.parser.errors[self.parser._identifier]
+        self.assertEqual(len(messages), 1)
+        self.assertIn('pattern', messages.pop())
+
+    def test_lazy_loaded_stix2_objects_cache(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_custom_attributes()
+        stix_objects = LazyLoadedSTIX2Objects()
+        stix_objects.cache_size = 2
+        for stix_object in json.loads(bundle.serialize())['objects']:
+            stix_objects[stix_object['id']] = stix_object
+        identity_id = bundle.objects[0].id
+        self.assertIs(stix_objects[identity_id], stix_objects[identity_id])
+        self.assertEqual(stix_objects[identity_id], bundle.objects[0])
+        for object_id, stix_object in stix_objects.items():
+            self.assertEqual(stix_object.id, object_id)
+        self.assertEqual(len(stix_objects._cache), 2)
+        self.assertNotIn(identity_id, stix_objects._cache)
+
     def test_stix21_bundle_with_domain_ip_indicator_attribute(self):
         bundle = TestInternalSTIX21Bundles.get_bundle_with_domain_ip_indicator_attribute()
         self.parser.load_stix_bundle(bundle)
@@ -1357,6 +1432,57 @@ class TestInternalSTIX21Import(TestInternalSTIX2Import, TestSTIX21, TestSTIX21Im
             )
         )
 
+    def test_stix21_bundle_with_multiple_reports_as_multiple_events_in_parallel(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_multiple_reports()
+        events = []
+        for processes in (1, 2):
+            parser = InternalSTIX2toMISPParser(galaxies_as_tags=True)
+            parser.load_stix_bundle(bundle)
+            parser.parse_stix_bundle(processes=processes)
+            events.append(
+                [
+                    (
+                        event.uuid, event.info, [tag.name for tag in event.tags],
+                        [
+                            (attribute.uuid, attribute.type, attribute.value)
+                            for attribute in event.attributes
+                        ],
+                        [
+                            (
+                                misp_object.uuid, misp_object.name,
+                                [
+                                    (attribute.object_relation, attribute.value)
+                                    for attribute in misp_object.attributes
+                                ]
+                            ) for misp_object in event.objects
+                        ]
+                    ) for event in parser.misp_events
+                ]
+            )
+        sequential_events, parallel_events = events
+        self.assertEqual(len(sequential_events), 2)
+        self.assertEqual(parallel_events, sequential_events)
+
+    def test_stix21_bundle_with_multiple_reports_worker_messages(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_multiple_reports()
+        bundle = json.loads(bundle.serialize())
+        for stix_object in bundle['objects']:
+            if stix_object['type'] == 'indicator':
+                del stix_object['pattern']
+        parser = InternalSTIX2toMISPParser(galaxies_as_tags=True)
+        parser.load_stix_bundle(bundle)
+        parser._critical_error(Exception('Error inherited by the workers'))
+        _initiate_stix2_worker(parser)
+        results = [
+            _build_misp_event_in_worker('_grouping', grouping_id)[1:]
+            for grouping_id in parser._grouping
+        ]
+        self.assertEqual(results[0], ({}, {}))
+        errors, warnings = results[1]
+        self.assertEqual(len(errors[bundle['id']]), 1)
+        self.assertIn('pattern', errors[bundle['id']].pop())
+        self.assertEqual(warnings, {})
+
     def test_stix21_bundle_with_multiple_reports_as_single_event(self):
         bundle = TestInternalSTIX21Bundles.get_bundle_with_multiple_reports()
         self.parser.load_stix_bundle(bundle)
@@ -1405,6 +1531,26 @@ class TestInternalSTIX21Import(TestInternalSTIX2Import, TestSTIX21, TestSTIX21Im
             self.assertEqual(sighting.Organisation['uuid'], identity.id.split('--')[1])
             self.assertEqual(sighting.Organisation['name'], identity.name)
 
+    def test_stix21_bundle_with_sightings_of_sanitised_uuids(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_sightings()
+        observed_data_uuid = bundle.objects[6].id.split('--')[1]
+        invalid_uuid = f'{observed_data_uuid[:14]}0{observed_data_uuid[15:]}'
+        self.parser.load_stix_bundle(
+            json.loads(bundle.serialize().replace(observed_data_uuid, invalid_uuid))
+        )
+        self.assertTrue(all(isinstance(key, str) for key in self.parser._sighting))
+        self.parser.parse_stix_bundle()
+        AS, domain = self.parser.misp_event.attributes
+        self.assertEqual(str(AS.uuid), str(self.parser.replacement_uuids[invalid_uuid]))
+        self.assertEqual(len(AS.sightings), 4)
+        self.assertEqual(len(domain.sightings), 4)
+        features = {'uuid1': 'feature1', 'uuid2': 'feature2', 'uuid3': 'feature3'}
+        references = {'uuid2': ['reference'], 'uuid4': ['reference']}
+        for arguments in ((features, references), (references, features)):
+            self.assertEqual(
+                len(list(self.parser._fetch_referenced_features(*arguments))), 1
+            )
+
     def test_stix21_bundle_with_single_report(self):
         bundle = TestInternalSTIX21Bundles.get_bundle_with_single_report()
         self.parser.load_stix_bundle(bundle)
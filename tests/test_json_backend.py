@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from misp_stix_converter import InternalSTIX2toMISPParser, misp_stix_json
+from misp_stix_converter.misp_stix_json import (
+    json_dumps, json_loads, load_stix2_bundle, misp_json_default)
+from pymisp import MISPEvent
+from stix2.base import STIXJSONEncoder
+from stix2.v21 import Bundle, Indicator
+from unittest import mock
+from .test_internal_stix21_bundles import TestInternalSTIX21Bundles
+
+
+def _ijson_parse(f, use_float=False):
+    # top level events of the ijson parser, enough to read a bundle header
+    yield '', 'start_map', None
+    for key, value in json.load(f).items():
+        yield '', 'map_key', key
+        if isinstance(value, str):
+            yield key, 'string', value
+        else:
+            yield key, 'start_array', None
+            yield key, 'end_array', None
+    yield '', 'end_map', None
+
+
+def _ijson_items(f, prefix, use_float=False):
+    yield from json.load(f)[prefix.split('.')[0]]
+
+
+class TestJSONBackend(unittest.TestCase):
+    def setUp(self):
+        self.indicator = Indicator(
+            id='indicator--91ae0a21-c7ae-4c7f-b84b-b84a7ce53d1f',
+            created=datetime(2020, 10, 25, 16, 22, 0),
+            modified=datetime(2020, 10, 25, 16, 22, 0, 123000),
+            pattern="[domain-name:value = 'circl.lu']",
+            pattern_type='stix',
+            valid_from=datetime(2020, 10, 25, 16, 22, 0)
+        )
+
+    def _check_stix_dumps(self, compact):
+        bundle = Bundle(self.indicator)
+        reference = json.loads(json.dumps(bundle, cls=STIXJSONEncoder))
+        self.assertEqual(json.loads(json_dumps(bundle, compact=compact)), reference)
+        indicator = json.loads(json_dumps(self.indicator, compact=compact))
+        self.assertEqual(indicator['created'], '2020-10-25T16:22:00.000Z')
+        self.assertEqual(indicator['modified'], '2020-10-25T16:22:00.123Z')
+
+    def test_stix_dumps(self):
+        self._check_stix_dumps(False)
+        self._check_stix_dumps(True)
+
+    def test_stix_dumps_stdlib_fallback(self):
+        with mock.patch.object(misp_stix_json, 'HAS_ORJSON', False):
+            self._check_stix_dumps(False)
+            self._check_stix_dumps(True)
+            self.assertIn('\n    "type": "bundle"', json_dumps(Bundle(self.indicator)))
+            self.assertNotIn('\n', json_dumps(Bundle(self.indicator), compact=True))
+
+    def test_indented_dumps(self):
+        bundle = Bundle(self.indicator)
+        indented = json_dumps(bundle)
+        self.assertEqual(indented, json.dumps(bundle, cls=STIXJSONEncoder, indent=4))
+        with mock.patch.object(misp_stix_json, 'HAS_ORJSON', False):
+            self.assertEqual(json_dumps(bundle), indented)
+
+    def test_misp_event_dumps(self):
+        misp_event = MISPEvent()
+        misp_event.from_dict(
+            uuid='a6ef1f2f-9c67-4e44-a5b5-7a3f2c5c2a0e',
+            info='MISP-STIX-Converter test event'
+        )
+        misp_event.add_attribute(type='domain', value='circl.lu')
+        reference = json.loads(misp_event.to_json())
+        self.assertEqual(
+            json_loads(json_dumps(misp_event, default=misp_json_default)),
+            reference
+        )
+        self.assertEqual(
+            json_loads(json_dumps(misp_event, compact=True, default=misp_json_default)),
+            reference
+        )
+
+    def _check_load_stix2_bundle(self):
+        bundle = Bundle(self.indicator)
+        reference = json.loads(bundle.serialize())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / 'bundle.json'
+            filename.write_text(bundle.serialize())
+            stix2_bundle = load_stix2_bundle(filename)
+            stix2_bundle['objects'] = list(stix2_bundle['objects'])
+            self.assertEqual(stix2_bundle, reference)
+
+    def test_load_stix2_bundle(self):
+        self._check_load_stix2_bundle()
+        with mock.patch.object(misp_stix_json, 'HAS_IJSON', False):
+            self._check_load_stix2_bundle()
+
+    def test_load_stix2_bundle_streamed_objects(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_custom_attributes()
+        reference = json.loads(bundle.serialize())
+        ijson = mock.Mock(parse=mock.Mock(side_effect=_ijson_parse),
+                          items=mock.Mock(side_effect=_ijson_items))
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch.object(misp_stix_json, 'ijson', ijson, create=True), \
+                mock.patch.object(misp_stix_json, 'HAS_IJSON', True):
+            filename = Path(tmp_dir) / 'bundle.json'
+            # the bundle id may come after the objects
+            filename.write_text(
+                json.dumps({'type': 'bundle', 'objects': reference['objects'],
+                            'id': reference['id']})
+            )
+            stix2_bundle = load_stix2_bundle(filename)
+            self.assertEqual(ijson.items.call_count, 0)
+            self.assertEqual(
+                {key: value for key, value in stix2_bundle.items() if key != 'objects'},
+                {'type': 'bundle', 'id': reference['id']}
+            )
+            self.assertNotIsInstance(stix2_bundle['objects'], list)
+            parser = InternalSTIX2toMISPParser()
+            parser.load_stix_bundle(stix2_bundle)
+            self.assertEqual(ijson.items.call_args.args[1], 'objects.item')
+            self.assertEqual(list(stix2_bundle['objects']), [])
+        parser.parse_stix_bundle()
+        reference_parser = InternalSTIX2toMISPParser()
+        reference_parser.load_stix_bundle(reference)
+        reference_parser.parse_stix_bundle()
+        self.assertEqual(
+            json.loads(parser.misp_event.to_json()),
+            json.loads(reference_parser.misp_event.to_json())
+        )
+
+    def test_loads(self):
+        content = '{"Event": {"info": "test", "Attribute": [{"value": "circl.lu"}]}}'
+        self.assertEqual(json_loads(content), json.loads(content))
+        self.assertEqual(json_loads(content.encode()), json.loads(content))
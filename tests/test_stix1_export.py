@@ -1,13 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
 import re
+import threading
 import unittest
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from misp_stix_converter import (MISPtoSTIX1EventsParser, misp_attribute_collection_to_stix1,
-                                 misp_event_collection_to_stix1, misp_to_stix1)
+from mixbox import idgen
+from misp_stix_converter import (MISPtoSTIX1AttributesParser, MISPtoSTIX1EventsParser,
+                                 misp_attribute_collection_to_stix1,
+                                 misp_event_collection_to_stix1, misp_to_stix, misp_to_stix1,
+                                 stix1_id_namespace)
+from misp_stix_converter.misp2stix.framing import set_stix1_id_namespace, stix1_framing
+from misp_stix_converter.misp2stix.stix1_dicts import STIX1IndicatorDict, STIX1ObservableDict
+from misp_stix_converter.misp2stix.stix1_mapping import MISPtoSTIX1Mapping
 from pymisp import MISPEvent
+from stix.core import STIXPackage
 from uuid import uuid5, UUID
 from .test_events import *
 from ._test_stix import TestSTIX
@@ -4165,6 +4175,30 @@ class TestCollectionStix1Export(TestCollectionSTIX1Export):
         )
         self._check_stix1_export_results(to_test_name, reference_name)
 
+    def test_attribute_collection_json_export(self):
+        name = 'test_attributes_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        packages = []
+        for in_memory in (True, False):
+            self.assertEqual(
+                misp_attribute_collection_to_stix1(
+                    output_file,
+                    *input_files,
+                    return_format='json',
+                    in_memory=in_memory
+                ),
+                1
+            )
+            with open(output_file, 'rt', encoding='utf-8') as f:
+                packages.append(json.load(f))
+        reference, package = packages
+        self.assertEqual(package['indicators'], reference['indicators'])
+        self.assertEqual(
+            package['observables']['observables'],
+            reference['observables']['observables']
+        )
+
     def test_event_collection_export_11(self):
         name = 'test_events_collection'
         to_test_name = f'{name}.json.out'
@@ -4193,6 +4227,83 @@ class TestCollectionStix1Export(TestCollectionSTIX1Export):
         )
         self._check_stix1_collection_export_results(to_test_name, reference_name)
 
+    def test_collection_export_namespaces(self):
+        orgnames = ('FRAMINGA', 'FRAMINGB')
+        for to_call, name in ((misp_attribute_collection_to_stix1, 'test_attributes_collection'),
+                              (misp_event_collection_to_stix1, 'test_events_collection')):
+            input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+            # converted one after the other, so the id namespace of the first
+            # organisation is the current one when the second framing is built
+            for orgname in orgnames:
+                self.assertEqual(
+                    to_call(
+                        self._current_path / f'{name}_{orgname}.json.out',
+                        *input_files,
+                        return_format='xml',
+                        version='1.1.1',
+                        namespace=f'https://{orgname}.example.org',
+                        org=orgname
+                    ),
+                    1
+                )
+            for orgname in orgnames:
+                filename = self._current_path / f'{name}_{orgname}.json.out'
+                with open(filename, 'rt', encoding='utf-8') as f:
+                    content = f.read()
+                self.assertIn(f'xmlns:{orgname}="https://{orgname}.example.org"', content)
+                for other in orgnames:
+                    if other != orgname:
+                        self.assertNotIn(f'xmlns:{other}=', content)
+
+    def test_event_collection_export_11_in_parallel(self):
+        name = 'test_events_collection'
+        to_test_name = f'{name}.json.out'
+        reference_name = f'{name}_stix11.xml'
+        output_file = self._current_path / to_test_name
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        self.assertEqual(
+            misp_event_collection_to_stix1(
+                output_file,
+                *input_files,
+                return_format='xml',
+                version='1.1.1',
+                processes=2
+            ),
+            1
+        )
+        self._check_stix1_collection_export_results(to_test_name, reference_name)
+
+    def test_event_collection_export_11_in_parts(self):
+        name = 'test_events_collection'
+        output_file = self._current_path / f'{name}.json.out'
+        input_files = [self._current_path / f'{name}_{n}.json' for n in (1, 2)]
+        reference = STIXPackage.from_xml(str(self._current_path / f'{name}_stix11.xml'))
+        for processes, in_memory in ((1, False), (1, True), (2, False), (2, True)):
+            self.assertEqual(
+                misp_event_collection_to_stix1(
+                    output_file,
+                    *input_files,
+                    return_format='xml',
+                    version='1.1.1',
+                    in_memory=in_memory,
+                    processes=processes,
+                    max_events=3
+                ),
+                1
+            )
+            with open(self._current_path / f'{name}.json_index.json', 'rt', encoding='utf-8') as f:
+                index = json.load(f)
+            self.assertEqual([part['events'] for part in index['parts']], [3, 1])
+            related_packages = []
+            for number, part in enumerate(index['parts'], start=1):
+                self.assertEqual(part['filename'], f'{name}.json_{number}.out')
+                package = STIXPackage.from_xml(str(self._current_path / part['filename']))
+                related_packages.extend(package.related_packages)
+            self.assertEqual(
+                [related_package.item.id_ for related_package in related_packages],
+                [related_package.item.id_ for related_package in reference.related_packages]
+            )
+
     def test_event_collection_export_12(self):
         name = 'test_events_collection'
         to_test_name = f'{name}.json.out'
@@ -4230,3 +4341,186 @@ class TestCollectionStix1Export(TestCollectionSTIX1Export):
         name = 'test_events_collection_1.json'
         self.assertEqual(misp_to_stix1(self._current_path / name, 'xml', '1.2'), 1)
         self._check_stix1_export_results(f'{name}.out', 'test_event_stix12.xml')
+
+    def test_event_export_multiple_versions(self):
+        name = 'test_events_collection_1.json'
+        self.assertEqual(misp_to_stix(self._current_path / name, '1.1.1', '1.2'), 1)
+        self._check_stix1_export_results(f'{name}.stix111.out', 'test_event_stix11.xml')
+        self._check_stix1_export_results(f'{name}.stix12.out', 'test_event_stix12.xml')
+
+    def test_event_export_with_concurrent_namespaces(self):
+        filename = self._current_path / 'test_events_collection_1.json'
+
+        def _convert(orgname):
+            with stix1_id_namespace(f'https://{orgname}.example.org', orgname):
+                parser = MISPtoSTIX1EventsParser(orgname, '1.1.1')
+                parser.parse_json_content(filename)
+                stix_package = parser.stix_package
+                return stix_package.id_, stix_package.to_xml().decode()
+
+        orgnames = ('ORGA', 'ORGB', 'ORGC', 'ORGD') * 2
+        with ThreadPoolExecutor(4) as executor:
+            results = executor.map(_convert, orgnames)
+            for orgname, (package_id, content) in zip(orgnames, results):
+                self.assertTrue(package_id.startswith(f'{orgname}:'))
+                self.assertIn(f'xmlns:{orgname}="https://{orgname}.example.org"', content)
+
+    def test_indicator_templates_per_package(self):
+        parser = MISPtoSTIX1EventsParser(_DEFAULT_ORGNAME, '1.1.1')
+        tags = [
+            'tlp:white', 'misp:confidence-level="usually-confident"',
+            'misp:confidence-level="confidence-cannot-be-evaluated"'
+        ]
+        for ordered_tags in (tags, tags[::-1]):
+            misp_object = {
+                'name': 'ip-port',
+                'Attribute': [{'Tag': [{'name': tag}]} for tag in ordered_tags]
+            }
+            self.assertEqual(
+                parser._handle_object_tags_and_galaxies(misp_object, None),
+                tuple(sorted(tags))
+            )
+        parser.parse_misp_event(get_event_with_object_confidence_tags()['Event'])
+        self.assertTrue(parser._indicator_templates)
+        parser.parse_misp_event(get_event_with_domain_attribute()['Event'])
+        self.assertEqual(set(parser._indicator_templates), {('domain', ())})
+
+    def test_id_namespace_in_threads(self):
+        previous = (idgen.get_id_namespace(), idgen.get_id_namespace_prefix())
+        self.addCleanup(set_stix1_id_namespace, *previous)
+        set_stix1_id_namespace('https://main.example.org', 'MAIN')
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(
+                executor.submit(idgen.get_id_namespace).result(),
+                'https://main.example.org'
+            )
+
+        def _framing(orgname):
+            namespace = f'https://{orgname}.example.org'
+            with stix1_id_namespace(namespace, orgname):
+                header, _, _ = stix1_framing(namespace, orgname, 'xml', '1.1.1')
+                return header, idgen.create_id('indicator')
+
+        orgnames = ('THREADA', 'THREADB', 'THREADC', 'THREADD') * 2
+        with ThreadPoolExecutor(4) as executor:
+            results = executor.map(_framing, orgnames)
+            for orgname, (header, indicator_id) in zip(orgnames, results):
+                self.assertTrue(indicator_id.startswith(f'{orgname}:indicator-'))
+                self.assertIn(f'xmlns:{orgname}="https://{orgname}.example.org"', header)
+                for other in set(orgnames).difference({orgname}):
+                    self.assertNotIn(f'xmlns:{other}=', header)
+        self.assertEqual(idgen.get_id_namespace(), 'https://main.example.org')
+        self.assertEqual(idgen.get_id_namespace_prefix(), 'MAIN')
+
+    def test_simultaneous_id_namespaces(self):
+        barrier = threading.Barrier(2, timeout=30)
+
+        def _convert(orgname):
+            with stix1_id_namespace(f'https://{orgname}.example.org', orgname):
+                barrier.wait()
+                parser = MISPtoSTIX1EventsParser(orgname, '1.1.1')
+                parser.parse_misp_event(get_event_with_domain_attribute()['Event'])
+                barrier.wait()
+                content = parser.stix_package.to_xml().decode()
+                return content, idgen.create_id('indicator')
+
+        orgnames = ('THREADA', 'THREADB')
+        with ThreadPoolExecutor(2) as executor:
+            results = executor.map(_convert, orgnames)
+            for orgname, other in zip(orgnames, orgnames[::-1]):
+                content, indicator_id = next(results)
+                self.assertTrue(indicator_id.startswith(f'{orgname}:indicator-'))
+                self.assertIn(f'xmlns:{orgname}="https://{orgname}.example.org"', content)
+                self.assertNotIn(f'xmlns:{other}=', content)
+                self.assertNotIn(f'{other}:', content)
+
+    def _get_attributes_converted_as_dicts(self):
+        attributes = []
+        for event in (get_event_with_domain_attribute(), get_event_with_filename_attribute(),
+                      get_event_with_hash_attributes(), get_event_with_hostname_attribute(),
+                      get_event_with_ip_attributes(), get_event_with_mutex_attribute(),
+                      get_event_with_url_attributes()):
+            attributes.extend(event['Event']['Attribute'])
+        for index, value in enumerate(('2001:db8::1', '192.168.0.0/24')):
+            attributes.append(
+                {
+                    'uuid': str(uuid5(UUID(attributes[0]['uuid']), value)),
+                    'type': 'ip-dst',
+                    'category': 'Network activity',
+                    'value': value,
+                    'to_ids': bool(index),
+                    'timestamp': '1603642920'
+                }
+            )
+        for attribute in attributes[1::3]:
+            attribute['to_ids'] = False
+        return attributes
+
+    def _check_json_export_with_dicts(self, parser_class, attributes, parse):
+        reference_parser = parser_class(_DEFAULT_ORGNAME, '1.1.1')
+        parse(reference_parser, deepcopy(attributes))
+        parser = parser_class(_DEFAULT_ORGNAME, '1.1.1', 'json')
+        parse(parser, deepcopy(attributes))
+        package = parser.stix_package.to_dict()
+        reference = reference_parser.stix_package.to_dict()
+        if parser_class is MISPtoSTIX1AttributesParser:
+            # random package ids
+            package.pop('id')
+            reference.pop('id')
+        self.assertEqual(json.dumps(package), json.dumps(reference))
+        return parser.stix_package
+
+    def _check_converted_dicts(self, attributes, indicators, observables):
+        self.assertEqual(len(indicators) + len(observables), len(attributes))
+        json_types = MISPtoSTIX1Mapping().json_attribute_types_mapping
+        self.assertEqual(
+            sum(isinstance(indicator, STIX1IndicatorDict) for indicator in indicators),
+            sum(attribute['to_ids'] and attribute['type'] in json_types for attribute in attributes)
+        )
+        self.assertEqual(
+            sum(isinstance(observable, STIX1ObservableDict) for observable in observables),
+            sum(not attribute['to_ids'] and attribute['type'] in json_types for attribute in attributes)
+        )
+
+    def test_attribute_collection_json_export_with_dicts(self):
+        attributes = self._get_attributes_converted_as_dicts()
+        filename = self._current_path / 'test_attributes_converted_as_dicts.json'
+        filename.write_text(json.dumps({'response': {'Attribute': attributes}}))
+
+        def _parse(parser, _):
+            parser.parse_json_content(filename)
+
+        try:
+            package = self._check_json_export_with_dicts(
+                MISPtoSTIX1AttributesParser, attributes, _parse
+            )
+        finally:
+            filename.unlink()
+        self._check_converted_dicts(
+            attributes, package.indicators, package.observables.observables
+        )
+
+    def test_event_json_export_with_dicts(self):
+        attributes = self._get_attributes_converted_as_dicts()
+        attributes[0]['Tag'] = [
+            {'name': 'tlp:white'},
+            {'name': 'misp:confidence-level="fairly-confident"'},
+            {'name': 'misp:tool="misp2stix"'}
+        ]
+        attributes[0]['comment'] = 'Domain test attribute'
+        attributes[2]['Tag'] = [{'name': 'tlp:amber'}]
+
+        def _parse(parser, attributes):
+            event = get_base_event()['Event']
+            event['Attribute'] = attributes
+            parser.parse_misp_event(event)
+
+        package = self._check_json_export_with_dicts(
+            MISPtoSTIX1EventsParser, attributes, _parse
+        )
+        incident = package.incidents[0]
+        self._check_converted_dicts(
+            attributes,
+            [related_indicator.item for related_indicator in incident.related_indicators],
+            [related_observable.item for related_observable in incident.related_observables]
+        )
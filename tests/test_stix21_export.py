@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
+import re
 from datetime import datetime
 from misp_stix_converter import (
-    MISPtoSTIX21Mapping, MISPtoSTIX21Parser, misp_collection_to_stix2_1,
-    misp_to_stix2_1)
+    MISPtoSTIX21Mapping, MISPtoSTIX21Parser, STIX2ExportCache,
+    STIX2ObjectsRegistry, misp_collection_to_stix2_1, misp_to_stix, misp_to_stix2_1)
 from pymisp import MISPAttribute, MISPEvent
 from .test_events import *
 from .update_documentation import (
@@ -6097,6 +6099,122 @@ class TestCollectionSTIX21Export(TestCollectionSTIX2Export):
         self.assertEqual(misp_to_stix2_1(self._current_path / name), 1)
         self._check_stix2_results_export(f'{name}.out', 'test_event_stix21.json')
 
+    def test_event_export_multiple_versions(self):
+        name = 'test_events_collection_1.json'
+        self.assertEqual(misp_to_stix(self._current_path / name, '2.0', '2.1'), 1)
+        self._check_stix2_results_export(f'{name}.stix20.out', 'test_event_stix20.json')
+        self._check_stix2_results_export(f'{name}.stix21.out', 'test_event_stix21.json')
+
+    def test_event_export_with_registry(self):
+        name = 'test_events_collection_1.json'
+        store = self._current_path / 'test_events_collection_registry.json.out'
+        registry = STIX2ObjectsRegistry(store)
+        self.assertEqual(misp_to_stix2_1(self._current_path / name, registry=registry), 1)
+        self._check_stix2_results_export(f'{name}.out', 'test_event_stix21.json')
+        identity_id = 'identity--a0c22599-9e58-4da4-96ac-7051603fa951'
+        self.assertIn(identity_id, registry)
+        self.assertEqual(misp_to_stix2_1(self._current_path / name, registry=registry), 1)
+        self._check_stix2_results_export(f'{name}.out', 'test_event_stix21.json')
+        with open(self._current_path / f'{name}.out', 'rt', encoding='utf-8') as f:
+            bundle = json.loads(f.read())
+        stix_ids = [stix_object['id'] for stix_object in bundle['objects']]
+        self.assertEqual(stix_ids.count(identity_id), 1)
+        persisted = STIX2ObjectsRegistry(store)
+        self.assertEqual(len(persisted), len(registry))
+        self.assertIn(identity_id, persisted)
+        output_file = self._current_path / 'test_events_collection.json.out'
+        input_files = [self._current_path / f'test_events_collection_{n}.json' for n in (1, 2)]
+        for in_memory in (False, True):
+            self.assertEqual(
+                misp_collection_to_stix2_1(
+                    output_file, *input_files, in_memory=in_memory, registry=persisted
+                ), 1
+            )
+            self._check_stix2_results_export(
+                'test_events_collection.json.out', 'test_events_collection_stix21.json'
+            )
+
+    def test_event_export_with_cache(self):
+        store = self._current_path / 'test_events_collection_cache.json.out'
+        cache = STIX2ExportCache(store)
+        event = get_event_with_domain_ip_attribute()
+        parser = MISPtoSTIX21Parser(cache=cache)
+        parser.parse_misp_event(event)
+        reference = [stix_object.serialize() for stix_object in parser.stix_objects]
+        self.assertEqual(len(cache), 1)
+        cache.save()
+        for export_cache in (cache, STIX2ExportCache(store)):
+            parser = MISPtoSTIX21Parser(cache=export_cache)
+            parser.parse_misp_event(event)
+            self.assertEqual(
+                [stix_object.serialize() for stix_object in parser.stix_objects],
+                reference
+            )
+        event['Event']['Attribute'][0].update(
+            {
+                'timestamp': '1603642950',
+                'value': 'circl.lu|149.13.33.15'
+            }
+        )
+        parser = MISPtoSTIX21Parser(cache=cache)
+        parser.parse_misp_event(event)
+        indicator = parser.stix_objects[-1]
+        self.assertEqual(
+            indicator.pattern,
+            "[domain-name:value = 'circl.lu' AND "
+            "domain-name:resolves_to_refs[*].value = '149.13.33.15']"
+        )
+        self.assertEqual(indicator.modified, datetime(2020, 10, 25, 16, 22, 30))
+
+    def _check_cached_event_export(self, event, store_name: str) -> list:
+        store = self._current_path / store_name
+        cache = STIX2ExportCache(store)
+        parser = MISPtoSTIX21Parser(cache=cache)
+        parser.parse_misp_event(event)
+        reference = self._serialise_stix_objects(parser.stix_objects)
+        cache.save()
+        for export_cache in (cache, STIX2ExportCache(store)):
+            parser = MISPtoSTIX21Parser(cache=export_cache)
+            parser.parse_misp_event(event)
+            self.assertEqual(
+                self._serialise_stix_objects(parser.stix_objects), reference
+            )
+        return parser.stix_objects
+
+    @staticmethod
+    def _serialise_stix_objects(stix_objects: list) -> list:
+        # the ids of the relationships are random
+        return [
+            re.sub('relationship--[0-9a-f-]{36}', 'relationship', stix_object.serialize())
+            for stix_object in stix_objects
+        ]
+
+    def test_event_export_with_cache_and_references(self):
+        event = get_event_with_object_references()
+        stix_objects = self._check_cached_event_export(
+            event, 'test_events_collection_cache_references.json.out'
+        )
+        relationships = [
+            stix_object for stix_object in stix_objects
+            if stix_object.type == 'relationship'
+        ]
+        references = sum(
+            len(misp_object.get('ObjectReference', []))
+            for misp_object in event['Event']['Object']
+        )
+        self.assertEqual(len(relationships), references)
+
+    def test_event_export_with_cache_and_markings(self):
+        event = get_event_with_domain_ip_attribute()
+        event['Event']['Attribute'][0]['Tag'] = [{'name': 'tlp:white'}]
+        stix_objects = self._check_cached_event_export(
+            event, 'test_events_collection_cache_markings.json.out'
+        )
+        marking_id = MISPtoSTIX21Mapping().tlp_markings['tlp:white'].id
+        stix_objects = {stix_object.type: stix_object for stix_object in stix_objects}
+        self.assertEqual(stix_objects['indicator'].object_marking_refs, [marking_id])
+        self.assertEqual(stix_objects['marking-definition'].id, marking_id)
+
 
 class TestFeedSTIX21Export(TestSTIX2Export):
     def setUp(self):
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import re
+import unittest
+from misp_stix_converter import (
+    ExternalSTIX2toMISPParser, InternalSTIX2toMISPParser)
+from misp_stix_converter.stix2misp.misp_dicts import (
+    MISPAttributeDict, MISPObjectDict)
+from pymisp import MISPAttribute, MISPObject
+from .test_external_stix21_bundles import TestExternalSTIX21Bundles
+from .test_internal_stix21_bundles import TestInternalSTIX21Bundles
+
+_UUID_REGEX = re.compile(
+    '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+)
+
+
+# the custom galaxies are parsed as galaxy clusters, even when the galaxies
+# are converted as tags
+_FAILING_BUNDLES = {'get_bundle_with_custom_galaxy': AttributeError}
+
+
+class TestSTIX2ImportFastMode(unittest.TestCase):
+    def _check_fast_mode(self, parser_class, bundles_class, failing_bundles=None):
+        if failing_bundles is None:
+            failing_bundles = {}
+        for name in dir(bundles_class):
+            if not name.startswith('get_bundle_with'):
+                continue
+            bundle = getattr(bundles_class, name)()
+            with self.subTest(bundle=name):
+                if name in failing_bundles:
+                    for fast_mode in (False, True):
+                        with self.assertRaises(failing_bundles[name]):
+                            self._convert_bundle(parser_class, bundle, fast_mode=fast_mode)
+                    continue
+                self.assertEqual(
+                    self._convert_bundle(parser_class, bundle, fast_mode=True),
+                    self._convert_bundle(parser_class, bundle)
+                )
+
+    @staticmethod
+    def _convert_bundle(parser_class, bundle, **kwargs) -> str:
+        parser = parser_class(galaxies_as_tags=True, **kwargs)
+        parser.load_stix_bundle(bundle)
+        parser.parse_stix_bundle()
+        misp_events = parser.misp_events
+        if not isinstance(misp_events, list):
+            misp_events = [misp_events]
+        content = json.dumps(
+            [json.loads(misp_event.to_json()) for misp_event in misp_events],
+            sort_keys=True
+        )
+        # the uuids generated during the conversion are random
+        stix_uuids = set(_UUID_REGEX.findall(bundle.serialize()))
+        return _UUID_REGEX.sub(
+            lambda match: match.group(0) if match.group(0) in stix_uuids else 'uuid',
+            content
+        )
+
+    def test_external_stix2_import_fast_mode(self):
+        self._check_fast_mode(
+            ExternalSTIX2toMISPParser, TestExternalSTIX21Bundles
+        )
+
+    def test_internal_stix2_import_fast_mode(self):
+        self._check_fast_mode(
+            InternalSTIX2toMISPParser, TestInternalSTIX21Bundles,
+            failing_bundles=_FAILING_BUNDLES
+        )
+
+    def test_misp_features_types(self):
+        bundle = TestInternalSTIX21Bundles.get_bundle_with_asn_observable_object()
+        for fast_mode, attribute_type, object_type in ((False, MISPAttribute, MISPObject),
+                                                       (True, MISPAttributeDict, MISPObjectDict)):
+            parser = InternalSTIX2toMISPParser(fast_mode=fast_mode)
+            parser.load_stix_bundle(bundle)
+            parser.parse_stix_bundle()
+            misp_object = parser.misp_event.objects[0]
+            self.assertIsInstance(misp_object, object_type)
+            self.assertEqual(misp_object.name, 'asn')
+            for attribute in misp_object.attributes:
+                self.assertIsInstance(attribute, attribute_type)
+                self.assertEqual(attribute.object_relation, attribute['object_relation'])
+        attribute = MISPAttributeDict({'type': 'domain', 'value': ' circl.lu ', 'to_ids': '1'})
+        attribute.add_tag('tlp:white')
+        attribute.add_tag({'name': 'tlp:white'})
+        reference = MISPAttribute()
+        reference.from_dict(uuid=attribute.uuid, type='domain', value=' circl.lu ', to_ids='1')
+        reference.add_tag('tlp:white')
+        self.assertEqual(json.loads(json.dumps(attribute)), json.loads(reference.to_json()))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from misp_stix_converter.stix2misp import STIX2PatternParser
+from misp_stix_converter.stix2misp import stix2_pattern_parser
+from misp_stix_converter.stix2misp.stix2_pattern_parser import (
+    _COMPILER_FEATURES, _STIXPatternCompiler, _parse_simple_pattern)
+
+_SIMPLE_PATTERNS = (
+    "[domain-name:value = 'circl.lu']",
+    "[ipv4-addr:value = '8.8.8.8' OR ipv4-addr:value = '8.8.4.4']",
+    "[file:name = 'oui' AND file:hashes.MD5 = 'b2a5abfeef9e36964281a31e17b57c97']",
+    "[file:hashes.'SHA-256' = '2bac8e2a5b58d8c2b8d7b1bb1df28f6e1b0f7ba0b2d1dbb71acd9a0ef2e7f2b8']",
+    "[file:hashes.MD5 = 'not a hash']",
+    "[network-traffic:src_ref.type = 'ipv4-addr' AND network-traffic:src_ref.value = '1.2.3.4']",
+    "[email-message:from_ref.value IN ('donald.duck@disney.com', 'mickey@disney.com')]",
+    "[ x509-certificate : serial_number = '1234'\n AND x509-certificate:issuer = 'C=US'  ]",
+    "[url:value = 'http://example.com/it\\'s']",
+    "[windows-registry-key:key = 'HKLM\\\\Software'] ",
+    "[x-misp-object:'quoted name' = '']",
+    "[file:name='a'AND file:size_name IN('b')]"
+)
+_COMPLEX_PATTERNS = (
+    "[file:name = 'a'] AND [file:name = 'b']",
+    "[ipv4-addr:value = '1.2.3.4'] WITHIN 60 SECONDS",
+    "[file:size > 1024]",
+    "[file:name == 'a']",
+    "[file:name = 'a' AND (file:size = 2)]",
+    "[network-traffic:dst_port = 443]",
+    "[file:hashes[*] = 'b2a5abfeef9e36964281a31e17b57c97']",
+    "[email-message:to_refs[0].value = 'a@b.c']",
+    "[file:name LIKE 'a%']",
+    "[file:name NOT = 'a']",
+    "[file:name = 'a' /* comment */]",
+    "[process:AND = 'a']",
+    "[file:nameIN ('a')]",
+    "[file:na-me = 'a']",
+    "[file:name = 'invalid \\escape']",
+    "[file:name = 'a' AND]",
+    "[file:name = 'a']]",
+    "file:name = 'a'"
+)
+
+
+class TestSTIX2PatternParser(unittest.TestCase):
+    def _check_antlr_result(self, pattern: str):
+        for version in _COMPILER_FEATURES:
+            compiler = _STIXPatternCompiler(*_COMPILER_FEATURES[version])
+            pattern_data, errors = compiler.parse(pattern)
+            simple_pattern_data = _parse_simple_pattern(pattern)
+            if simple_pattern_data is not None:
+                self.assertEqual(errors, [])
+                self.assertEqual(simple_pattern_data, pattern_data)
+
+    def test_simple_patterns(self):
+        for pattern in _SIMPLE_PATTERNS:
+            self.assertIsNotNone(_parse_simple_pattern(pattern), pattern)
+            self._check_antlr_result(pattern)
+
+    def test_complex_patterns(self):
+        for pattern in _COMPLEX_PATTERNS:
+            self.assertIsNone(_parse_simple_pattern(pattern), pattern)
+            self._check_antlr_result(pattern)
+
+    def test_pattern_parser(self):
+        parser = STIX2PatternParser()
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[2])
+        self.assertTrue(parser.valid)
+        self.assertEqual(
+            parser.pattern.comparisons['file'],
+            [
+                [['name'], '=', 'oui'],
+                [['hashes', 'MD5'], '=', 'b2a5abfeef9e36964281a31e17b57c97']
+            ]
+        )
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[4])
+        self.assertFalse(parser.valid)
+        self.assertEqual(
+            parser.errors, ["FAIL: 'not a hash' is not a valid MD5 hash"]
+        )
+        parser.load_stix_pattern("[file:name = 'a'] AND [file:name = 'b']")
+        self.assertTrue(parser.valid)
+        self.assertEqual(parser.pattern.observation_ops, {'AND'})
+
+    def test_pattern_parser_cache(self):
+        stix2_pattern_parser._compile_stix_pattern.cache_clear()
+        parser = STIX2PatternParser()
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[0])
+        pattern_data = parser.pattern
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[1])
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[0])
+        self.assertIs(parser.pattern, pattern_data)
+        parser.version = '2.0'
+        parser.load_stix_pattern(_SIMPLE_PATTERNS[0])
+        self.assertIsNot(parser.pattern, pattern_data)
+        self.assertEqual(parser.pattern, pattern_data)